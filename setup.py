@@ -84,7 +84,8 @@ setup(
     tests_require=['pytest'],
     scripts=['scripts/sovrin', 'scripts/init_sovrin_raet_keep',
              'scripts/start_sovrin_node',
-             'scripts/generate_sovrin_pool_transactions', 'scripts/get_keys'],
+             'scripts/generate_sovrin_pool_transactions', 'scripts/get_keys',
+             'scripts/load_sovrin_checkpoint'],
     cmdclass={
         'install': PostInstall,
         'develop': PostInstallDev
@@ -39,7 +39,7 @@ from sovrin.client.wallet.wallet import Wallet
 from sovrin.common.exceptions import LinkNotFound, LinkAlreadyExists, \
     NotConnectedToNetwork, LinkNotReady
 from sovrin.common.identity import Identity
-from sovrin.common.txn import ENDPOINT
+from sovrin.common.txn import ENDPOINT, TXN_TYPE, GET_TXNS
 from sovrin.common.util import ensureReqCompleted
 
 logger = getlogger()
@@ -92,10 +92,18 @@ class Walleted(AgentIssuer, AgentProver, AgentVerifier):
         obs = self._wallet.handleIncomingReply
         if not self.client.hasObserver(obs):
             self.client.registerObserver(obs)
+        if not self.client.hasObserver(self._syncNextPage):
+            self.client.registerObserver(self._syncNextPage)
         self._wallet.pendSyncRequests()
         prepared = self._wallet.preparePending()
         self.client.submitReqs(*prepared)
 
+    def _syncNextPage(self, observerName, reqId, frm, result, numReplies):
+        # The wallet pends the request for the next page of txns when
+        # handling a GET_TXNS reply
+        if result.get(TXN_TYPE) == GET_TXNS and self._wallet.pendingCount:
+            self.client.submitReqs(*self._wallet.preparePending())
+
     @property
     def wallet(self) -> Wallet:
         return self._wallet
@@ -22,12 +22,13 @@ from raet.raeting import AutoMode
 from sovrin.common.config_util import getConfig
 from sovrin.common.txn import TXN_TYPE, ATTRIB, DATA, GET_NYM, ROLE, \
     SPONSOR, NYM, GET_TXNS, LAST_TXN, TXNS, CLAIM_DEF, ISSUER_KEY, SKEY, DISCLO,\
-    GET_ATTR
+    GET_ATTR, GET_NYMS
 from sovrin.persistence.client_req_rep_store_file import ClientReqRepStoreFile
 from sovrin.persistence.client_req_rep_store_orientdb import \
     ClientReqRepStoreOrientDB
 from sovrin.persistence.client_txn_log import ClientTxnLog
-from sovrin.persistence.identity_graph import getEdgeByTxnType, IdentityGraph
+from sovrin.persistence.identity_graph import IdentityGraph
+from sovrin.persistence.orientdb_pool import getOrientDbPool
 
 logger = getlogger()
 
@@ -82,15 +83,22 @@ class Client(PlenumClient):
                              dbName=self.name,
                              storageType=pyorient.STORAGE_TYPE_PLOCAL)
 
+    def _getOrientDbPool(self, store):
+        return getOrientDbPool(store, self.name, self.config)
+
     def getReqRepStore(self):
         if self.config.ReqReplyStore == "orientdb":
-            return ClientReqRepStoreOrientDB(self._getOrientDbStore())
+            store = self._getOrientDbStore()
+            return ClientReqRepStoreOrientDB(store,
+                                             self._getOrientDbPool(store))
         else:
             return ClientReqRepStoreFile(self.name, self.basedirpath)
 
     def getGraphStore(self):
-        return IdentityGraph(self._getOrientDbStore()) if \
-            self.config.ClientIdentityGraph else None
+        if not self.config.ClientIdentityGraph:
+            return None
+        store = self._getOrientDbStore()
+        return IdentityGraph(store, self._getOrientDbPool(store))
 
     def getTxnLogStore(self):
         return ClientTxnLog(self.name, self.basedirpath)
@@ -134,6 +142,11 @@ class Client(PlenumClient):
                 if self.graphStore:
                     if DATA in result and result[DATA]:
                         self.addNymToGraph(json.loads(result[DATA]))
+            elif result[TXN_TYPE] == GET_NYMS:
+                if self.graphStore:
+                    for txn in json.loads(result[DATA]).values():
+                        if txn:
+                            self.addNymToGraph(txn)
             elif result[TXN_TYPE] == GET_TXNS:
                 if DATA in result and result[DATA]:
                     data = json.loads(result[DATA])
@@ -197,13 +210,7 @@ class Client(PlenumClient):
 
     def getTxnsByType(self, txnType):
         if self.graphStore:
-            edgeClass = getEdgeByTxnType(txnType)
-            if edgeClass:
-                cmd = "select from {}".format(edgeClass)
-                result = self.graphStore.client.command(cmd)
-                if result:
-                    return [r.oRecordData for r in result]
-            return []
+            return self.graphStore.getTxnsByType(txnType)
         else:
             txns = self.txnLog.getTxnsByType(txnType)
             # TODO: Fix ASAP
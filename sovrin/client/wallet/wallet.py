@@ -10,7 +10,7 @@ from plenum.client.wallet import Wallet as PWallet
 from plenum.common.did_method import DidMethods
 from plenum.common.log import getlogger
 from plenum.common.txn import TXN_TYPE, TARGET_NYM, DATA, \
-    IDENTIFIER, NYM, ROLE, VERKEY, NODE
+    IDENTIFIER, NYM, ROLE, VERKEY, NODE, RAW
 from plenum.common.types import Identifier, f
 
 from sovrin.client.wallet.attribute import Attribute, AttributeKey
@@ -21,7 +21,10 @@ from sovrin.client.wallet.upgrade import Upgrade
 from sovrin.common.did_method import DefaultDidMethods
 from sovrin.common.exceptions import LinkNotFound
 from sovrin.common.identity import Identity
-from sovrin.common.txn import ATTRIB, GET_TXNS, GET_ATTR, GET_NYM, POOL_UPGRADE
+from sovrin.common.txn import ATTRIB, GET_TXNS, GET_ATTR, GET_NYM, \
+    POOL_UPGRADE, GET_NYMS, GET_ATTRS, TARGETS, LAST_TXN, MORE_TXNS, \
+    PAGE_SIZE
+from sovrin.common.types import Request
 
 ENCODING = "utf-8"
 
@@ -61,6 +64,8 @@ class Wallet(PWallet, Sponsoring):
             GET_ATTR: self._getAttrReply,
             NYM: self._nymReply,
             GET_NYM: self._getNymReply,
+            GET_NYMS: self._getNymsReply,
+            GET_ATTRS: self._getAttrsReply,
             GET_TXNS: self._getTxnsReply,
             NODE: self._nodeReply,
             POOL_UPGRADE: self._poolUpgradeReply
@@ -171,23 +176,31 @@ class Wallet(PWallet, Sponsoring):
     def getLastKnownSeqs(self, identifier):
         return self.lastKnownSeqs.get(identifier)
 
-    def getPendingTxnRequests(self, *identifiers):
+    def getPendingTxnRequests(self, *identifiers, pageSize: int=None):
+        """
+        Requests for the first page of txns of each identifier after the
+        last txn known for it. Replies saying there are more txns make the
+        wallet pend the request for the next page.
+        """
         if not identifiers:
             identifiers = self.idsToSigners.keys()
         else:
             identifiers = set(identifiers).intersection(
                 set(self.idsToSigners.keys()))
-        requests = []
-        for identifier in identifiers:
-            lastTxn = self.getLastKnownSeqs(identifier)
-            op = {
-                TARGET_NYM: identifier,
-                TXN_TYPE: GET_TXNS,
-            }
-            if lastTxn:
-                op[DATA] = lastTxn
-            requests.append(self.signOp(op, identifier=identifier))
-        return requests
+        return [self._getTxnsRequest(identifier, pageSize)
+                for identifier in identifiers]
+
+    def _getTxnsRequest(self, identifier, pageSize: int=None):
+        lastTxn = self.getLastKnownSeqs(identifier)
+        op = {
+            TARGET_NYM: identifier,
+            TXN_TYPE: GET_TXNS,
+        }
+        if lastTxn:
+            op[DATA] = lastTxn
+        if pageSize:
+            op[PAGE_SIZE] = pageSize
+        return self.signOp(op, identifier=identifier)
 
     def pendSyncRequests(self):
         pendingTxnsReqs = self.getPendingTxnRequests()
@@ -239,6 +252,20 @@ class Wallet(PWallet, Sponsoring):
         else:
             logger.debug("No attribute found")
 
+    def _getAttrsReply(self, result, preparedReq):
+        _, attrKeys = preparedReq
+        data = json.loads(result[DATA])
+        for attrKey in attrKeys:
+            attrib = self.getAttribute(AttributeKey(*attrKey))
+            found = data.get(attrib.dest)
+            if found:
+                # Same as the value in the reply to a `GET_ATTR`
+                attrib.value = json.dumps(found[DATA], sort_keys=True)
+                attrib.seqNo = found[F.seqNo.name]
+            else:
+                logger.debug("No attribute {} found for {}".
+                             format(attrib.name, attrib.dest))
+
     def _nymReply(self, result, preparedReq):
         target = result[TARGET_NYM]
         idy = self._sponsored.get(target)
@@ -260,20 +287,36 @@ class Wallet(PWallet, Sponsoring):
     def _getNymReply(self, result, preparedReq):
         jsonData = result.get(DATA)
         if jsonData:
-            data = json.loads(jsonData)
-            nym = data.get(TARGET_NYM)
-            idy = self.knownIds.get(nym)
-            if idy:
-                idy.role = data.get(ROLE)
-                idy.sponsor = data.get(f.IDENTIFIER.nm)
-                idy.last_synced = datetime.datetime.utcnow()
-                idy.verkey = data.get(VERKEY)
-                # TODO: THE GET_NYM reply should contain the sequence number of
-                # the NYM transaction
+            self._updateKnownId(json.loads(jsonData))
+
+    def _getNymsReply(self, result, preparedReq):
+        for data in json.loads(result[DATA]).values():
+            if data:
+                self._updateKnownId(data)
+
+    def _updateKnownId(self, data):
+        nym = data.get(TARGET_NYM)
+        idy = self.knownIds.get(nym)
+        if idy:
+            idy.role = data.get(ROLE)
+            idy.sponsor = data.get(f.IDENTIFIER.nm)
+            idy.last_synced = datetime.datetime.utcnow()
+            idy.verkey = data.get(VERKEY)
+            # TODO: THE GET_NYM reply should contain the sequence number of
+            # the NYM transaction
 
     def _getTxnsReply(self, result, preparedReq):
-        # TODO
-        pass
+        # TODO: Keep the txns
+        if not result.get(DATA):
+            return
+        data = json.loads(result[DATA])
+        identifier = result[TARGET_NYM]
+        if data.get(LAST_TXN):
+            self.addLastKnownSeqs(identifier, data[LAST_TXN])
+        if data.get(MORE_TXNS):
+            req, _ = preparedReq
+            self.pendRequest(self._getTxnsRequest(
+                identifier, req.operation.get(PAGE_SIZE)))
 
     def pendRequest(self, req, key=None):
         self._pending.appendleft((req, key))
@@ -313,6 +356,39 @@ class Wallet(PWallet, Sponsoring):
         if req:
             return self.prepReq(req)
 
+    # TODO: sender by default should be `self.defaultId`
+    def requestIdentities(self, identities: List[Identity], sender):
+        """
+        Used to get several nyms from Sovrin with a single `GET_NYMS`
+        """
+        for identity in identities:
+            self.knownIds[identity.identifier] = identity
+        op = {
+            TXN_TYPE: GET_NYMS,
+            TARGETS: [identity.identifier for identity in identities]
+        }
+        return self.prepReq(Request(identifier=sender, operation=op))
+
+    # TODO: sender by default should be `self.defaultId`
+    def requestAttributes(self, attribs: List[Attribute], sender):
+        """
+        Used to get a raw attribute of several nyms from Sovrin with a single
+        `GET_ATTRS`, all attributes should have the same name
+        """
+        names = {attrib.name for attrib in attribs}
+        if len(names) != 1:
+            raise ValueError("Attributes should have the same name, got {}".
+                             format(names))
+        for attrib in attribs:
+            self._attributes[attrib.key()] = attrib
+        op = {
+            TXN_TYPE: GET_ATTRS,
+            RAW: names.pop(),
+            TARGETS: [attrib.dest for attrib in attribs]
+        }
+        return self.prepReq(Request(identifier=sender, operation=op),
+                            key=[attrib.key() for attrib in attribs])
+
     def prepReq(self, req, key=None):
         self.pendRequest(req, key=key)
         return self.preparePending()[0]
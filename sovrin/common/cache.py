@@ -0,0 +1,90 @@
+from collections import OrderedDict
+from typing import Any, Hashable, Callable
+
+
+class LRUCache:
+    """
+    Bounded mapping that evicts the least recently used entry once it holds
+    `maxSize` entries or, if `maxWeight` is given, once the total weight of
+    its entries as given by `weigher` exceeds it. Lookups through `get` are
+    counted as hits or misses.
+    """
+
+    _missing = object()
+
+    def __init__(self, maxSize: int, maxWeight: int=None,
+                 weigher: Callable[[Any], int]=None):
+        assert maxSize > 0, "maxSize should be positive, got {}".\
+            format(maxSize)
+        assert maxWeight is None or weigher, "maxWeight needs a weigher"
+        self.maxSize = maxSize
+        self.maxWeight = maxWeight
+        self.weigher = weigher
+        self.weight = 0
+        self._entries = OrderedDict()
+        self._weights = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default=None) -> Any:
+        value = self._entries.get(key, self._missing)
+        if value is self._missing:
+            self.misses += 1
+            return default
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return value
+
+    def peek(self, key: Hashable, default=None) -> Any:
+        """
+        Like `get` but neither counted nor refreshing the entry
+        """
+        return self._entries.get(key, default)
+
+    def put(self, key: Hashable, value: Any):
+        if key in self._entries:
+            self._entries.move_to_end(key)
+        self._entries[key] = value
+        if self.weigher:
+            weight = self.weigher(value)
+            self.weight += weight - self._weights.get(key, 0)
+            self._weights[key] = weight
+        while len(self._entries) > self.maxSize or \
+                (self.maxWeight is not None and self.weight > self.maxWeight):
+            evicted, _ = self._entries.popitem(last=False)
+            self.weight -= self._weights.pop(evicted, 0)
+            self.evictions += 1
+
+    def pop(self, key: Hashable, default=None) -> Any:
+        self.weight -= self._weights.pop(key, 0)
+        return self._entries.pop(key, default)
+
+    def clear(self):
+        self._entries.clear()
+        self._weights.clear()
+        self.weight = 0
+
+    def __contains__(self, key: Hashable):
+        return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def hitRate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "size": len(self),
+            "maxSize": self.maxSize,
+            "weight": self.weight,
+            "maxWeight": self.maxWeight,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hitRate": self.hitRate
+        }
@@ -0,0 +1,69 @@
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Sequence
+
+
+class LatencyHistogram:
+    """
+    Counts of observed durations, in seconds, per bucket of `bounds`. The
+    last bucket counts durations above the largest bound.
+    """
+
+    # From 100 microseconds to 10 seconds
+    defaultBounds = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+                     0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+    def __init__(self, bounds: Sequence[float]=defaultBounds):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, duration: float):
+        self.counts[bisect_left(self.bounds, duration)] += 1
+        self.count += 1
+        self.total += duration
+        self.max = max(self.max, duration)
+
+    @contextmanager
+    def time(self):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, p: float) -> float:
+        """
+        Upper bound of the bucket holding the `p`th percentile, the largest
+        duration seen if it is in the last bucket
+        """
+        if not self.count:
+            return 0.0
+        rank = p / 100 * self.count
+        seen = 0
+        for bound, count in zip(self.bounds, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return self.max
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "count": self.count,
+            "total": self.total,
+            "mean": self.mean,
+            "max": self.max,
+            "p50": self.percentile(50),
+            "p99": self.percentile(99),
+            "buckets": {"<={}".format(bound): count for bound, count in
+                        zip(self.bounds, self.counts)},
+            "overflow": self.counts[-1]
+        }
@@ -24,16 +24,19 @@ OWNER = '<owner>'
 
 LAST_TXN = "lastTxn"
 TXNS = "Txns"
+MORE_TXNS = "moreTxns"
+PAGE_SIZE = "pageSize"
 
 ENC_TYPE = "encType"
 SKEY = "secretKey"
 REF = "ref"
+TARGETS = "targets"
 PRIMARY = "primary"
 REVOCATION = "revocation"
 
 allOpKeys = (TXN_TYPE, TARGET_NYM, VERKEY, ORIGIN, ROLE, DATA, NONCE, REF, RAW,
              ENC, HASH, ALIAS, ACTION, SCHEDULE, TIMEOUT, SHA256, START, CANCEL,
-             NAME, VERSION)
+             NAME, VERSION, TARGETS, PAGE_SIZE)
 
 reqOpKeys = (TXN_TYPE,)
 
@@ -50,6 +53,8 @@ ADD_AGENT = "ADD_AGENT"
 DISCLO = "DISCLO"
 GET_ATTR = "GET_ATTR"
 GET_NYM = "GET_NYM"
+GET_ATTRS = "GET_ATTRS"
+GET_NYMS = "GET_NYMS"
 GET_TXNS = "GET_TXNS"
 GET_TXN = "GET_TXN"
 CLAIM_DEF = "CLAIM_DEF"
@@ -67,7 +72,8 @@ NODE_UPGRADE = 'NODE_UPGRADE'
 # Temp for demo
 GEN_CRED = "GEN_CRED"
 
-openTxns = (GET_NYM, GET_ATTR, GET_CLAIM_DEF, GET_ISSUER_KEY)
+openTxns = (GET_NYM, GET_ATTR, GET_CLAIM_DEF, GET_ISSUER_KEY, GET_NYMS,
+            GET_ATTRS)
 
 
 # TXN_TYPE -> (requireds, optionals)
@@ -86,6 +92,8 @@ IDENTITY_TXN_TYPES = {NYM,
                      DISCLO,
                      GET_ATTR,
                      GET_NYM,
+                     GET_ATTRS,
+                     GET_NYMS,
                      GET_TXNS,
                      CLAIM_DEF,
                      GET_CLAIM_DEF,
@@ -0,0 +1,116 @@
+from collections.abc import Mapping
+from hashlib import sha256
+from typing import Iterable, Optional
+
+from plenum.common.txn import RAW, ENC, HASH
+
+ATTRIB_VALUE_KEYS = (RAW, ENC, HASH)
+
+
+def attribValueHash(value: str) -> str:
+    """
+    Hex sha256 of the `RAW` or `ENC` value of an ATTRIB txn
+    """
+    return sha256(value.encode()).hexdigest()
+
+
+class TxnView(Mapping):
+    """
+    Read-only view of a txn with some of its fields replaced or left out,
+    reading the other fields from the txn instead of copying it. The txn
+    should not be changed while views of it are used.
+
+    An ATTRIB txn has its value hashed once per view, and the views
+    derived from it keep the hash as long as they keep the value.
+    """
+
+    __slots__ = ("_txn", "_replaced", "_removed", "_attribHash")
+
+    def __init__(self, txn: Mapping, replaced: dict=None,
+                 removed: Iterable=()):
+        removed = frozenset(removed)
+        if isinstance(txn, TxnView):
+            # Stack no views, read from the txn of `txn`
+            kept = {key: value for key, value in txn._replaced.items()
+                    if key not in removed}
+            kept.update(replaced or {})
+            replaced = kept
+            removed = txn._removed.union(removed).difference(replaced)
+            txn = txn._txn
+        self._txn = txn
+        self._replaced = replaced or {}
+        self._removed = removed
+        self._attribHash = None
+
+    def __getitem__(self, key):
+        if key in self._replaced:
+            return self._replaced[key]
+        if key in self._removed:
+            raise KeyError(key)
+        return self._txn[key]
+
+    def __contains__(self, key):
+        return key in self._replaced or \
+               (key not in self._removed and key in self._txn)
+
+    def __iter__(self):
+        yield from self._replaced
+        for key in self._txn:
+            if key not in self._replaced and key not in self._removed:
+                yield key
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return repr(self.toDict())
+
+    def replace(self, **fields) -> 'TxnView':
+        view = TxnView(self, replaced=fields)
+        if not set(fields).intersection(ATTRIB_VALUE_KEYS):
+            view._attribHash = self._attribHash
+        return view
+
+    def without(self, *keys) -> 'TxnView':
+        view = TxnView(self, removed=keys)
+        view._attribHash = self._attribHash
+        return view
+
+    def toDict(self) -> dict:
+        """
+        The txn as a new dict, sharing the values of its fields
+        """
+        d = {key: value for key, value in self._txn.items()
+             if key not in self._removed}
+        d.update(self._replaced)
+        return d
+
+    @property
+    def attribKey(self) -> Optional[str]:
+        """
+        Which of `RAW`, `ENC` and `HASH` an ATTRIB txn has
+        """
+        for key in ATTRIB_VALUE_KEYS:
+            if key in self:
+                return key
+        return None
+
+    @property
+    def attribHash(self) -> Optional[str]:
+        if self._attribHash is None:
+            key = self.attribKey
+            if key == HASH:
+                self._attribHash = self[HASH]
+            elif key is not None:
+                self._attribHash = attribValueHash(self[key])
+        return self._attribHash
+
+    def hashedAttrib(self) -> 'TxnView':
+        """
+        View of an ATTRIB txn with its value replaced by the hash of it, as
+        it is written to the ledger and signed
+        """
+        key = self.attribKey
+        if key is None or key == HASH:
+            return self
+        return self.replace(**{key: self.attribHash})
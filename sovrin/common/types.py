@@ -1,11 +1,9 @@
-from copy import deepcopy
-from hashlib import sha256
-
 from plenum.common.request import Request as PRequest
-from plenum.common.txn import TXN_TYPE, RAW, ENC, HASH
+from plenum.common.txn import TXN_TYPE
 from plenum.common.types import OPERATION
 
 from sovrin.common.txn import ATTRIB
+from sovrin.common.txn_view import TxnView
 
 
 class Request(PRequest):
@@ -16,10 +14,8 @@ class Request(PRequest):
         :return: state to be used when signing
         """
         if self.operation.get(TXN_TYPE) == ATTRIB:
-            d = deepcopy(super().getSigningState())
-            op = d[OPERATION]
-            keyName = {RAW, ENC, HASH}.intersection(set(op.keys())).pop()
-            op[keyName] = sha256(op[keyName].encode()).hexdigest()
+            d = dict(super().getSigningState())
+            d[OPERATION] = TxnView(d[OPERATION]).hashedAttrib().toDict()
             return d
         return super().getSigningState()
 
@@ -1,4 +1,5 @@
 import datetime
+import json
 import random
 from typing import Tuple, Union
 
@@ -71,6 +72,25 @@ def dateTimeEncoding(obj):
     raise TypeError('Not sure how to serialize %s' % (obj,))
 
 
+def composeJsonObject(items) -> str:
+    """
+    JSON object with the given keys and already serialized values, the same
+    as `json.dumps` with `sort_keys` of the deserialized values would give
+    when those were serialized with `sort_keys` too
+
+    :param items: iterable of (key, JSON text) pairs
+    """
+    return "{" + ", ".join("{}: {}".format(json.dumps(k), v) for k, v in
+                           sorted(items)) + "}"
+
+
+def rawAttrName(raw: str) -> str:
+    """
+    Name of a raw attribute, which is a JSON object with a single key
+    """
+    return next(iter(json.loads(raw)))
+
+
 def getNonce(length=32):
     hexChars = [hex(i)[2:] for i in range(0, 16)]
     return "".join([random.choice(hexChars) for i in range(length)])
@@ -35,6 +35,102 @@ hashStore = {
     "type": "orientdb"
 }
 
+'''
+The storage nodes use for the identity graph. "orientdb" needs a running
+OrientDB server, "sqlite" keeps the graph in an embedded database in the
+node's data directory. Combined with a "file" `hashStore`, a node does not
+need OrientDB at all.
+
+Possible values: "orientdb"|"sqlite"
+'''
+graphStore = "orientdb"
+
+# Maximum number of nyms whose role, verkey and sponsor a node keeps in
+# memory in front of the identity graph
+IdentityCacheSize = 10000
+
+# Maximum number of entries and total size in bytes of the replies to graph
+# reads (GET_NYM, GET_ATTR, GET_CLAIM_DEF, GET_ISSUER_KEY) a node caches
+ReadCacheSize = 10000
+ReadCacheMaxBytes = 64 * 1024 * 1024
+
+# Number of replies to write requests a node keeps in memory to answer
+# retries of those requests with
+RecentReplyCacheSize = 10000
+
+# How the txns appended to the domain and config ledgers are made durable.
+# "fsync" fsyncs each txn as it is appended, "group" fsyncs the txns ordered
+# together once, before the replies for them are sent, and "none" leaves it
+# to the OS. None follows EnsureLedgerDurability. "group" needs a "file"
+# `hashStore`, the hashes of an OrientDB hash store cannot be fsynced
+LedgerDurabilityMode = None
+
+# With the "group" durability mode, the longest time in seconds replies
+# wait for more txns to be fsynced with theirs, or until that many replies
+# wait. With 0 the txns ordered in a loop iteration are fsynced at its end
+GroupCommitMaxDelay = 0.005
+GroupCommitMaxTxns = 1000
+
+# Number of domain ledger txns between the checkpoints a node takes of its
+# ledgers and identity graph for new nodes to start from, see
+# `load_sovrin_checkpoint`. 0 takes no checkpoints
+CheckpointInterval = 0
+CheckpointsToKeep = 2
+
+# Raw and encrypted attribute values of at least this many bytes, encoded
+# as UTF-8, are kept out of the OrientDB identity graph, in a store of files
+# named by the sha256 of the values, None keeps all values in the graph.
+# Values of at least AttributeBlobMmapSize bytes are read through a memory
+# map
+AttributeBlobMinSize = None
+AttributeBlobMmapSize = 1024 * 1024
+
+# Number of merkle proofs (root hash and audit path) of ledger txns a node
+# keeps in memory
+MerkleProofCacheSize = 10000
+
+# Maximum number of targets in a single GET_NYMS or GET_ATTRS request
+MaxReadTargets = 100
+
+'''
+A reply to GET_TXNS has at most `GetTxnsPageSize` txns unless the request
+asks for a page size, which is capped at `GetTxnsMaxPageSize`. Clients ask
+for the next page with the `lastTxn` of the previous reply.
+'''
+GetTxnsPageSize = 100
+GetTxnsMaxPageSize = 1000
+
+'''
+If True, nodes write ordered txns to the identity graph in batches from a
+separate thread instead of on the event loop. A batch is written once it has
+`GraphWriteBatchSize` txns or `GraphWriteFlushInterval` seconds after its
+first txn was queued.
+'''
+GraphWritesAsync = False
+GraphWriteBatchSize = 100
+GraphWriteFlushInterval = 0.1
+
+'''
+A batch the graph writer cannot write is retried every
+`GraphWriteRetryInterval` seconds, up to `GraphWriteMaxRetries` times. The
+writer then gives up and the node stops, the graph being rebuilt from the
+ledger when it starts again. Reads waiting for txns of their nyms to be
+written are refused after `GraphWriteFlushTimeout` seconds.
+'''
+GraphWriteRetryInterval = 1
+GraphWriteMaxRetries = 10
+GraphWriteFlushTimeout = 5
+
+'''
+If the identity graph of a node starting up is behind its domain ledger by
+more than `GraphBulkRebuildThreshold` txns, the missing txns are bulk loaded
+in chunks of `GraphRebuildChunkSize`, using up to `GraphRebuildWorkers`
+processes to prepare the chunks where the graph backend supports it.
+'''
+GraphBulkRebuildThreshold = 10000
+GraphRebuildChunkSize = 1000
+GraphRebuildWorkers = 4
+
 primaryStorage = None
 
 secondaryStorage = None
@@ -46,6 +142,43 @@ OrientDB = {
     "port": 2424
 }
 
+# Maximum number of connections nodes and clients open to each of their
+# OrientDB databases
+OrientDbPoolSize = 4
+
+# Number of threads a node answers graph reads (GET_NYM, GET_ATTR,
+# GET_CLAIM_DEF, GET_ISSUER_KEY, GET_NYMS, GET_ATTRS) with, so they do not
+# wait behind graph writes. Only used with the "orientdb" graph store, 0
+# answers them on the node's own thread
+GraphReadWorkers = 0
+
+# If True, nodes answer read requests (GET_NYM, GET_ATTR, GET_TXNS, ...)
+# with the reply alone, which also acknowledges the request, instead of
+# sending a REQACK before it
+CoalesceReadAcks = False
+
+# Number of threads verifying the signatures of client requests, 0 verifies
+# them on the node's own thread
+SigVerificationWorkers = 0
+
+'''
+Token buckets limiting the write requests (requests for txns of the ledgers)
+a node admits from each identifier and from all the identifiers of a role
+together, by role of the identifier, None being identity owners. Each limit
+is (requests per second, burst). Requests over a limit get a REQNACK without
+being propagated. Roles not listed are not limited, e.g.
+
+WriteRateLimits = {
+    None: {"identifier": (5, 20), "role": (100, 500)},
+    "SPONSOR": {"identifier": (50, 200), "role": (500, 2000)}
+}
+'''
+WriteRateLimits = {}
+
+# Maximum number of identifiers whose token buckets a node keeps, the least
+# recently used being dropped beyond that
+WriteRateLimitIdentifiers = 100000
+
 '''
 Client has the identity graph or not. True will make the client have
 identity graph and False will make client not have it
@@ -0,0 +1,67 @@
+import mmap
+import os
+import tempfile
+from typing import Optional
+
+from sovrin.common.txn_view import attribValueHash
+
+
+class BlobStore:
+    """
+    Content-addressed store of attribute values, each kept once in a file
+    named by the sha256 of the value, the hash the ledger has for it. Files
+    are sharded in directories by the first two bytes of the hash.
+
+    Values of at least `mmapSize` bytes are read through a memory map
+    instead of being read into a buffer first.
+    """
+
+    def __init__(self, baseDir: str, mmapSize: int=1024 * 1024):
+        self.baseDir = baseDir
+        self.mmapSize = mmapSize
+        os.makedirs(baseDir, exist_ok=True)
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.baseDir, key[:2], key[2:4], key)
+
+    def put(self, value: str) -> str:
+        """
+        Store `value` unless already stored
+
+        :return: the key of `value`, its sha256 in hex
+        """
+        key = attribValueHash(value)
+        path = self.path(key)
+        if os.path.exists(path):
+            return key
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Written to a temporary file first so that a value is never seen
+        # partly written, by this or another thread or process, and synced
+        # before being renamed so that it is not lost or empty after a crash
+        fd, tmpPath = tempfile.mkstemp(dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(value.encode())
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmpPath, path)
+        except Exception:
+            if os.path.exists(tmpPath):
+                os.remove(tmpPath)
+            raise
+        return key
+
+    def has(self, key: str) -> bool:
+        return os.path.exists(self.path(key))
+
+    def get(self, key: str) -> Optional[str]:
+        try:
+            with open(self.path(key), "rb") as f:
+                if os.fstat(f.fileno()).st_size < self.mmapSize:
+                    return f.read().decode()
+                # Decoded straight from the mapped pages, without a copy of
+                # the file in a buffer
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+                    return str(m, "utf-8")
+        except FileNotFoundError:
+            return None
@@ -0,0 +1,296 @@
+import io
+import json
+import os
+import tarfile
+import time
+from concurrent.futures import ThreadPoolExecutor, Future
+from hashlib import sha256
+from typing import Dict, List, Optional
+
+from plenum.common.log import getlogger
+
+from sovrin.persistence.group_commit import transactionLogFiles, \
+    hashStoreFiles
+
+logger = getlogger()
+
+CHECKPOINT_FORMAT = 1
+MANIFEST = "manifest.json"
+# Directories of the checkpoint holding the data files and the graph
+DATA_DIR = "data"
+GRAPH_DIR = "graph"
+CHECKPOINT_PREFIX = "checkpoint_"
+CHECKPOINT_SUFFIX = ".tar.gz"
+
+
+def checkpointFileName(seqNo: int) -> str:
+    return "{}{:012d}{}".format(CHECKPOINT_PREFIX, seqNo, CHECKPOINT_SUFFIX)
+
+
+def checkpointSeqNo(path: str) -> int:
+    """
+    Size of the domain ledger in the checkpoint at `path`, as in its name
+    """
+    return int(os.path.basename(path)[len(CHECKPOINT_PREFIX):
+                                      -len(CHECKPOINT_SUFFIX)])
+
+
+def listCheckpoints(checkpointDir: str) -> List[str]:
+    """
+    Paths of the checkpoints in `checkpointDir`, oldest first
+    """
+    if not os.path.isdir(checkpointDir):
+        return []
+    return [os.path.join(checkpointDir, name) for name in
+            sorted(os.listdir(checkpointDir))
+            if name.startswith(CHECKPOINT_PREFIX) and
+            name.endswith(CHECKPOINT_SUFFIX)]
+
+
+class _HashingReader:
+    """
+    File-like reading from `f` and hashing what is read
+    """
+
+    def __init__(self, f):
+        self.f = f
+        self.hash = sha256()
+
+    def read(self, size=-1):
+        data = self.f.read(size)
+        self.hash.update(data)
+        return data
+
+
+class Checkpointer:
+    """
+    Checkpoints of a node's ledgers and identity graph, for new nodes to
+    start from instead of catching up and rebuilding the graph from the
+    first txn.
+
+    A checkpoint is a gzipped tar of the files of the ledgers as of when it
+    was taken, the attribute values of `blobStore` if given and, if the
+    graph store can make one, a snapshot of the graph. Its manifest gives
+    the size and root hash of each ledger, the last ledger txn applied to
+    the graph, and the size and sha256 of each file.
+
+    The ledger files are only appended to and the files of the blob store
+    are never changed once written, so taking a checkpoint on the node's
+    thread only needs the sizes of the ledger files. Another thread writes
+    the tar, copying the ledger files up to those sizes and the snapshot of
+    the graph taken with them, `snapshotPages` pages at a time.
+    """
+
+    def __init__(self, dataDir: str, ledgers: Dict[str, object], graphStore,
+                 checkpointDir: str, keep: int=2, blobStore=None,
+                 snapshotPages: int=1024):
+        self.dataDir = dataDir
+        self.ledgers = ledgers
+        self.graphStore = graphStore
+        self.checkpointDir = checkpointDir
+        self.keep = keep
+        self.blobStore = blobStore
+        self.snapshotPages = snapshotPages
+        self.ledgerFiles = {}
+        for name, ledger in ledgers.items():
+            files = transactionLogFiles(ledger)
+            if not files:
+                raise ValueError("No open files found for the {} ledger".
+                                 format(name))
+            # A hash store keeping no files is rebuilt from the txns
+            files += hashStoreFiles(ledger)
+            for f in files:
+                self.relPath(f.name)
+            self.ledgerFiles[name] = files
+        self.executor = ThreadPoolExecutor(1)
+        self._writing = None  # type: Optional[Future]
+        checkpoints = listCheckpoints(checkpointDir)
+        # Size of the domain ledger in the last checkpoint taken
+        self.lastSeqNo = checkpointSeqNo(checkpoints[-1]) if checkpoints \
+            else 0
+
+    def relPath(self, path: str) -> str:
+        """
+        Path of a file of the data directory relative to it
+        """
+        rel = os.path.relpath(os.path.abspath(path),
+                              os.path.abspath(self.dataDir))
+        if rel.startswith(os.pardir):
+            raise ValueError("{} is not in {}".format(path, self.dataDir))
+        return rel
+
+    def ledgerFileSizes(self) -> Dict[str, int]:
+        """
+        Size of each file of the ledgers, flushed first, by its path
+        relative to the data directory
+        """
+        sizes = {}
+        for files in self.ledgerFiles.values():
+            for f in files:
+                f.flush()
+                sizes[self.relPath(f.name)] = os.fstat(f.fileno()).st_size
+        return sizes
+
+    def blobFiles(self) -> Dict[str, int]:
+        """
+        Size of each file of the blob store by its path relative to the data
+        directory, leaving out values still being written
+        """
+        files = {}
+        if not self.blobStore:
+            return files
+        for root, dirs, names in os.walk(self.blobStore.baseDir):
+            for name in names:
+                path = os.path.join(root, name)
+                if path == self.blobStore.path(name):
+                    files[self.relPath(path)] = os.path.getsize(path)
+        return files
+
+    def create(self) -> Optional[Future]:
+        """
+        Take a checkpoint, written to `checkpointDir` by the returned
+        future, unless the previous one is still being written
+        """
+        if self._writing and not self._writing.done():
+            logger.info("{} skipping checkpoint, the previous one is still "
+                        "being written".format(self))
+            return None
+        files = self.ledgerFileSizes()
+        ledgers = {name: {"size": ledger.size,
+                          "rootHash": ledger.hashToStr(ledger.tree.root_hash)}
+                   for name, ledger in self.ledgers.items()}
+        manifest = {
+            "format": CHECKPOINT_FORMAT,
+            "createdAt": int(time.time()),
+            "ledgers": ledgers,
+            "graph": None,
+            "files": {}
+        }
+        snapshot = None
+        if hasattr(self.graphStore, "snapshot"):
+            # Taken with the ledger sizes so that the graph has no txns the
+            # ledgers of the checkpoint do not
+            snapshot = self.graphStore.snapshot()
+            manifest["graph"] = {
+                "file": os.path.basename(self.graphStore.dbPath),
+                "lastSeqNo": snapshot.lastSeqNo
+            }
+        seqNo = ledgers.get("domain", {}).get("size", 0)
+        self.lastSeqNo = seqNo
+        self._writing = self.executor.submit(self._write, manifest, files,
+                                             snapshot, seqNo)
+        return self._writing
+
+    def _write(self, manifest: dict, files: Dict[str, int], snapshot,
+               seqNo: int) -> str:
+        os.makedirs(self.checkpointDir, exist_ok=True)
+        path = os.path.join(self.checkpointDir, checkpointFileName(seqNo))
+        tmpPath = path + ".tmp"
+        graphPath = None
+        try:
+            if snapshot:
+                graphPath = os.path.join(self.checkpointDir,
+                                         ".{}.snapshot".
+                                         format(manifest["graph"]["file"]))
+                if os.path.exists(graphPath):
+                    os.remove(graphPath)
+                snapshot.copyTo(graphPath, self.snapshotPages)
+            files.update(self.blobFiles())
+            with tarfile.open(tmpPath, "w:gz") as tar:
+                for rel, size in sorted(files.items()):
+                    self._addFile(tar, os.path.join(self.dataDir, rel),
+                                  os.path.join(DATA_DIR, rel), size, manifest)
+                if graphPath:
+                    self._addFile(tar, graphPath,
+                                  os.path.join(GRAPH_DIR,
+                                               manifest["graph"]["file"]),
+                                  os.path.getsize(graphPath), manifest)
+                data = json.dumps(manifest, sort_keys=True, indent=2).encode()
+                info = tarfile.TarInfo(MANIFEST)
+                info.size = len(data)
+                info.mtime = manifest["createdAt"]
+                tar.addfile(info, io.BytesIO(data))
+            os.replace(tmpPath, path)
+        except Exception:
+            if os.path.exists(tmpPath):
+                os.remove(tmpPath)
+            raise
+        finally:
+            if snapshot:
+                snapshot.close()
+            if graphPath and os.path.exists(graphPath):
+                os.remove(graphPath)
+        logger.info("{} wrote checkpoint {}".format(self, path))
+        self.prune()
+        return path
+
+    @staticmethod
+    def _addFile(tar, path: str, name: str, size: int, manifest: dict):
+        info = tarfile.TarInfo(name)
+        info.size = size
+        info.mtime = manifest["createdAt"]
+        with open(path, "rb") as f:
+            reader = _HashingReader(f)
+            tar.addfile(info, reader)
+        manifest["files"][name] = {"size": size,
+                                   "sha256": reader.hash.hexdigest()}
+
+    def prune(self):
+        for path in listCheckpoints(self.checkpointDir)[:-self.keep]:
+            os.remove(path)
+
+    def stop(self):
+        self.executor.shutdown()
+
+    def __repr__(self):
+        return self.__class__.__name__
+
+
+def readManifest(checkpointPath: str) -> dict:
+    with tarfile.open(checkpointPath, "r:gz") as tar:
+        return json.loads(tar.extractfile(MANIFEST).read().decode())
+
+
+def loadCheckpoint(checkpointPath: str, dataDir: str,
+                   graphDir: str=None) -> dict:
+    """
+    Extract a checkpoint into the data directory `dataDir` of a node and the
+    graph snapshot, if any, into `graphDir` (`dataDir` by default), checking
+    each file against the manifest
+
+    :return: the manifest of the checkpoint
+    """
+    graphDir = graphDir or dataDir
+    manifest = readManifest(checkpointPath)
+    if manifest.get("format") != CHECKPOINT_FORMAT:
+        raise ValueError("Unknown checkpoint format {}".
+                         format(manifest.get("format")))
+    with tarfile.open(checkpointPath, "r:gz") as tar:
+        for member in tar:
+            if member.name == MANIFEST:
+                continue
+            expected = manifest["files"].get(member.name)
+            if not member.isfile() or expected is None:
+                raise ValueError("{} is not in the manifest".
+                                 format(member.name))
+            top, _, rel = member.name.partition("/")
+            if top not in (DATA_DIR, GRAPH_DIR) or not rel:
+                raise ValueError("{} is not a data or graph file".
+                                 format(member.name))
+            baseDir = dataDir if top == DATA_DIR else graphDir
+            path = os.path.abspath(os.path.join(baseDir, rel))
+            if not path.startswith(os.path.abspath(baseDir) + os.sep):
+                raise ValueError("{} is outside {}".format(member.name,
+                                                          baseDir))
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            reader = _HashingReader(tar.extractfile(member))
+            with open(path, "wb") as f:
+                while True:
+                    chunk = reader.read(1024 * 1024)
+                    if not chunk:
+                        break
+                    f.write(chunk)
+            if reader.hash.hexdigest() != expected["sha256"]:
+                raise ValueError("{} does not match the manifest".
+                                 format(member.name))
+    return manifest
@@ -10,6 +10,7 @@ from plenum.persistence.orientdb_store import OrientDbStore
 from sovrin.common.txn import getTxnOrderedFields
 from sovrin.common.types import Request
 from sovrin.persistence.client_req_rep_store import ClientReqRepStore
+from sovrin.persistence.orientdb_query import QueryRunner
 
 REQ_DATA = "ReqData"
 """
@@ -23,8 +24,9 @@ LAST_TXN_DATA = "LastTxnData"
 
 
 class ClientReqRepStoreOrientDB(ClientReqRepStore):
-    def __init__(self, store: OrientDbStore):
+    def __init__(self, store: OrientDbStore, pool=None):
         self.store = store
+        self.queries = QueryRunner(store.client, pool)
         self.bootstrap()
 
     @property
@@ -67,77 +69,75 @@ class ClientReqRepStoreOrientDB(ClientReqRepStore):
 
     @property
     def lastReqId(self):
-        result = self.store.client.command("select max({}) as lastId from {}".
-                                           format(f.REQ_ID.nm, REQ_DATA))
+        result = self.queries.command("select max({}) as lastId from {}".
+                                      format(f.REQ_ID.nm, REQ_DATA))
         return 0 if not result else result[0].oRecordData['lastId']
 
     def addRequest(self, req: Request):
-        self.store.client.command(
-            "insert into {} set {} = {}, {} = '{}',{} = '{}', "
+        self.queries.command(
+            "insert into {} set {} = :reqId, {} = :identifier, {} = :typ, "
             "nacks = {{}}, replies = {{}}".
-            format(REQ_DATA, f.REQ_ID.nm, req.reqId,
-                   f.IDENTIFIER.nm, req.identifier,
-                   TXN_TYPE, req.operation[TXN_TYPE]))
+            format(REQ_DATA, f.REQ_ID.nm, f.IDENTIFIER.nm, TXN_TYPE),
+            reqId=req.reqId, identifier=req.identifier,
+            typ=req.operation[TXN_TYPE])
+
+    def _forRequest(self, template: str, identifier: str, reqId: int,
+                    **params):
+        """
+        Run `template` with a `{where}` for the request of `identifier` and
+        `reqId` in it
+        """
+        return self.queries.command(
+            template.format(where="where {} = :identifier and {} = :reqId".
+                            format(f.IDENTIFIER.nm, f.REQ_ID.nm)),
+            identifier=identifier, reqId=reqId, **params)
 
     def addAck(self, msg: Any, sender: str):
         identifier = msg[f.IDENTIFIER.nm]
         reqId = msg[f.REQ_ID.nm]
-        self.store.client.command(
-            "update {} add acks = '{}' where {} = '{}' and {} = {}".
-            format(REQ_DATA, sender, f.IDENTIFIER.nm, identifier, f.REQ_ID.nm,
-                   reqId))
+        self._forRequest("update {} add acks = :sender {{where}}".
+                         format(REQ_DATA), identifier, reqId, sender=sender)
 
     def addNack(self, msg: Any, sender: str):
         identifier = msg[f.IDENTIFIER.nm]
         reqId = msg[f.REQ_ID.nm]
         reason = msg[f.REASON.nm]
-        reason = reason.replace('"', '\\"').replace("'", "\\'")
-        self.store.client.command(
-            "update {} set nacks.{} = '{}' where {} = '{}' and {} = {}".
-            format(REQ_DATA, sender, reason, f.IDENTIFIER.nm, identifier,
-                   f.REQ_ID.nm,
-                   reqId))
+        self._forRequest("update {} set nacks.{} = :reason {{where}}".
+                         format(REQ_DATA, sender), identifier, reqId,
+                         reason=reason)
 
     def addReply(self, identifier: str, reqId: int, sender: str, result: Any) -> \
             Sequence[str]:
         txnId = result[TXN_ID]
         txnTime = result.get(TXN_TIME)
         serializedTxn = self.txnSerializer.serialize(result, toBytes=False)
-        serializedTxn = serializedTxn.replace('"', '\\"').replace("'", "\\'")
-        res = self.store.client.command(
-            "update {} set replies.{} = '{}' return "
-            "after @this.replies where {} = '{}' and {} = {}".
-            format(REQ_DATA, sender, serializedTxn, f.IDENTIFIER.nm, identifier,
-                   f.REQ_ID.nm, reqId))
+        res = self._forRequest("update {} set replies.{} = :txn return "
+                               "after @this.replies {{where}}".
+                               format(REQ_DATA, sender), identifier, reqId,
+                               txn=serializedTxn)
         replies = res[0].oRecordData['value']
         # TODO: Set txnId txnTime, txnType only when got same f+1 replies
         if len(replies) == 1:
-            self.store.client.command(
-                "update {} set {} = '{}', {} = {}, {} = '{}' "
-                "where {} = '{}' and {} = {}".
-                format(REQ_DATA, TXN_ID, txnId, TXN_TIME,
-                       txnTime, TXN_TYPE, result[TXN_TYPE],
-                       f.IDENTIFIER.nm, identifier,
-                       f.REQ_ID.nm, reqId))
+            self._forRequest("update {} set {} = :txnId, {} = :txnTime, "
+                             "{} = :typ {{where}}".
+                             format(REQ_DATA, TXN_ID, TXN_TIME, TXN_TYPE),
+                             identifier, reqId, txnId=txnId, txnTime=txnTime,
+                             typ=result[TXN_TYPE])
         return len(replies)
 
     def requestConfirmed(self, identifier, reqId):
-        result = self.store.client.command(
-            "select {} from {} where {} = '{}' and {} = {}".
-            format(TXN_ID, REQ_DATA, f.IDENTIFIER.nm, identifier, f.REQ_ID.nm,
-                   reqId))
+        result = self._forRequest("select {} from {} {{where}}".
+                                  format(TXN_ID, REQ_DATA), identifier, reqId)
         return bool(result[0].oRecordData.get(TXN_ID) if result else False)
 
     def hasRequest(self, identifier: str, reqId: int):
-        result = self.store.client.command(
-            "select from {} where {} = '{}' and {} = {}".
-            format(REQ_DATA, f.IDENTIFIER.nm, identifier, f.REQ_ID.nm, reqId))
+        result = self._forRequest("select from {} {{where}}".format(REQ_DATA),
+                                  identifier, reqId)
         return bool(result)
 
     def getReplies(self, identifier: str, reqId: int):
-        result = self.store.client.command(
-            "select replies from {} where {} = '{}' and {} = {}".
-            format(REQ_DATA, f.IDENTIFIER.nm, identifier, f.REQ_ID.nm, reqId))
+        result = self._forRequest("select replies from {} {{where}}".
+                                  format(REQ_DATA), identifier, reqId)
         if not result:
             return {}
         else:
@@ -147,31 +147,26 @@ class ClientReqRepStoreOrientDB(ClientReqRepStore):
                 }
 
     def getAcks(self, identifier: str, reqId: int) -> List[str]:
-        result = self.store.client.command(
-            "select acks from {} where {} = '{}' and {} = {}".
-            format(REQ_DATA, f.IDENTIFIER.nm, identifier, f.REQ_ID.nm, reqId))
+        result = self._forRequest("select acks from {} {{where}}".
+                                  format(REQ_DATA), identifier, reqId)
         if not result:
             return []
         result = result[0].oRecordData.get('acks', [])
         return result
 
     def getNacks(self, identifier: str, reqId: int) -> dict:
-        result = self.store.client.command(
-            "select nacks from {} where {} = '{}' and {} = {}".
-            format(REQ_DATA, f.IDENTIFIER.nm, identifier, f.REQ_ID.nm, reqId))
+        result = self._forRequest("select nacks from {} {{where}}".
+                                  format(REQ_DATA), identifier, reqId)
         return {} if not result else result[0].oRecordData.get('nacks', {})
 
     def setConsensus(self, identifier: str, reqId: int, value='true'):
-        self.store.client.command(
-            "update {} set hasConsensus = {} where {} = '{}' and {} = {}".
-            format(REQ_DATA, value, f.IDENTIFIER.nm, identifier, f.REQ_ID.nm,
-                   reqId))
+        self._forRequest("update {} set hasConsensus = :value {{where}}".
+                         format(REQ_DATA), identifier, reqId,
+                         value=value in (True, 'true'))
 
     def hasConsensus(self, identifier: str, reqId: int):
-        result = self.store.client.command("select hasConsensus from {} where "
-                                           "{} = '{}' and {} = {}".format(
-            REQ_DATA, f.IDENTIFIER.nm, identifier, f.REQ_ID.nm,
-            reqId))
+        result = self._forRequest("select hasConsensus from {} {{where}}".
+                                  format(REQ_DATA), identifier, reqId)
         if result and result[0].oRecordData.get('hasConsensus'):
             replies = self.getReplies(identifier, reqId).values()
             fVal = getMaxFailures(len(list(replies)))
@@ -180,15 +175,14 @@ class ClientReqRepStoreOrientDB(ClientReqRepStore):
             return False
 
     def setLastTxnForIdentifier(self, identifier, value: str):
-        self.store.client.command(
-            "update {} set value = '{}', {} = '{}' upsert "
-            "where {} = '{}'".
-            format(LAST_TXN_DATA, value, f.IDENTIFIER.nm,
-                   identifier, f.IDENTIFIER.nm, identifier))
+        self.queries.command(
+            "update {} set value = :value, {} = :identifier upsert "
+            "where {} = :identifier".
+            format(LAST_TXN_DATA, f.IDENTIFIER.nm, f.IDENTIFIER.nm),
+            value=value, identifier=identifier)
 
     def getLastTxnForIdentifier(self, identifier):
-        result = self.store.client.command(
-            "select value from {} where {} = '{}'".
-            format(LAST_TXN_DATA, f.IDENTIFIER.nm,
-                   identifier))
+        result = self.queries.command(
+            "select value from {} where {} = :identifier".
+            format(LAST_TXN_DATA, f.IDENTIFIER.nm), identifier=identifier)
         return None if not result else result[0].oRecordData['value']
@@ -0,0 +1,142 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from ledger.util import F
+from plenum.common.log import getlogger
+
+from sovrin.common.txn import TXN_TYPE, NYM
+from sovrin.persistence.graph_writer import addTxnToGraph
+
+logger = getlogger()
+
+
+def chunked(iterable, size):
+    it = iter(iterable)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class GraphRebuilder:
+    """
+    Loads a range of the domain ledger into the identity graph in bulk, for
+    when the graph is missing many txns, like after it was lost or on a node
+    that just joined.
+
+    The ledger is read in two passes, first the NYM txns so that every nym
+    exists before the second pass adds the txns referring to nyms. The ledger
+    is read and the txns are loaded in chunks of `chunkSize`, so only a few
+    chunks of the ledger are in memory at a time. Graph backends supporting
+    bulk inserts (`bulkRows` and `bulkInsert`) get one insert per chunk, with
+    the rows prepared by `workers` processes; other backends get the txns one
+    by one.
+
+    The graph's watermark is only advanced once both passes are done, so an
+    interrupted rebuild is resumed from the start of the range.
+    """
+
+    def __init__(self, graphStore, chunkSize: int=1000, workers: int=1,
+                 progressInterval: float=10):
+        self.graphStore = graphStore
+        self.chunkSize = chunkSize
+        self.workers = workers
+        self.progressInterval = progressInterval
+
+    @property
+    def supportsBulk(self):
+        return hasattr(self.graphStore, "bulkRows") and \
+               hasattr(self.graphStore, "bulkInsert")
+
+    def rebuild(self, ledger, frm: int=1) -> int:
+        """
+        Add the txns of `ledger` from sequence number `frm` to the graph
+
+        :return: the number of txns added
+        """
+        start = time.perf_counter()
+        total = 0
+        lastSeqNo = None
+        executor = ProcessPoolExecutor(self.workers) \
+            if self.supportsBulk and self.workers > 1 else None
+        # Txns appended during the rebuild are left to the node
+        to = ledger.size
+        try:
+            for nymPass in (True, False):
+                txns = self._txns(ledger, frm, to, nymPass)
+                count, passLastSeqNo = self._load(txns, executor,
+                                                  "nyms" if nymPass
+                                                  else "other txns")
+                total += count
+                if passLastSeqNo is not None:
+                    lastSeqNo = max(lastSeqNo or 0, passLastSeqNo)
+        finally:
+            if executor:
+                executor.shutdown()
+        if lastSeqNo is not None:
+            self.graphStore.setLastSeqNo(lastSeqNo)
+        elapsed = time.perf_counter() - start
+        logger.info("{} loaded {} txns into graph in {:.2f} seconds "
+                    "({:.0f} txns/sec)".
+                    format(self, total, elapsed, total / elapsed
+                           if elapsed else 0))
+        return total
+
+    def _txns(self, ledger, frm, to, nymPass):
+        for lo in range(frm, to + 1, self.chunkSize):
+            hi = min(lo + self.chunkSize - 1, to)
+            for seqNo, txn in ledger.getAllTxn(frm=lo, to=hi).items():
+                if (txn[TXN_TYPE] == NYM) == nymPass:
+                    txn[F.seqNo.name] = seqNo
+                    yield txn
+
+    def _load(self, txns, executor, what):
+        start = lastReport = time.perf_counter()
+        count = 0
+        lastSeqNo = None
+        chunks = chunked(txns, self.chunkSize)
+        for chunk, rows in self._prepare(chunks, executor):
+            if rows is None:
+                for txn in chunk:
+                    addTxnToGraph(self.graphStore, txn)
+            else:
+                self.graphStore.bulkInsert(*rows)
+            count += len(chunk)
+            lastSeqNo = chunk[-1][F.seqNo.name]
+            now = time.perf_counter()
+            if now - lastReport >= self.progressInterval:
+                lastReport = now
+                logger.info("{} loaded {} {} into graph, up to seqNo {} "
+                            "({:.0f} txns/sec)".
+                            format(self, count, what, lastSeqNo,
+                                   count / (now - start)))
+        return count, lastSeqNo
+
+    def _prepare(self, chunks, executor):
+        """
+        Yield each chunk with its bulk insert rows, or `None` if the graph
+        does not support bulk inserts
+        """
+        if not self.supportsBulk:
+            for chunk in chunks:
+                yield chunk, None
+        elif executor is None:
+            for chunk in chunks:
+                yield chunk, self.graphStore.bulkRows(chunk)
+        else:
+            # Keep at most a couple of chunks per worker in flight so that
+            # the ledger is not read into memory ahead of the inserts
+            pending = []
+            for chunk in chunks:
+                pending.append((chunk, executor.submit(
+                    type(self.graphStore).bulkRows, chunk)))
+                if len(pending) >= 2 * self.workers:
+                    chunk, future = pending.pop(0)
+                    yield chunk, future.result()
+            for chunk, future in pending:
+                yield chunk, future.result()
+
+    def __repr__(self):
+        return self.__class__.__name__
@@ -0,0 +1,287 @@
+import threading
+import time
+from collections import deque, Counter
+from contextlib import ExitStack
+from typing import List
+
+from ledger.util import F
+from plenum.common.log import getlogger
+
+from plenum.common.types import f
+
+from sovrin.common.txn import TXN_TYPE, NYM, ATTRIB, CLAIM_DEF, ISSUER_KEY, \
+    TXN_ID, TARGET_NYM
+
+logger = getlogger()
+
+
+class GraphWriteError(Exception):
+    """
+    Raised waiting on a `GraphWriter` which gave up writing txns to the graph
+    """
+
+
+def addTxnToGraph(graphStore, txn):
+    if txn[TXN_TYPE] == NYM:
+        graphStore.addNymTxnToGraph(txn)
+    elif txn[TXN_TYPE] == ATTRIB:
+        graphStore.addAttribTxnToGraph(txn)
+    elif txn[TXN_TYPE] == CLAIM_DEF:
+        graphStore.addClaimDefTxnToGraph(txn)
+    elif txn[TXN_TYPE] == ISSUER_KEY:
+        graphStore.addIssuerKeyTxnToGraph(txn)
+    else:
+        logger.debug("Got an unknown type {} to process".
+                     format(txn[TXN_TYPE]))
+
+
+def writeTxnsToGraph(graphStore, txns):
+    """
+    Add txns to the graph and advance the graph's watermark to the highest
+    sequence number among them, in one transaction if the backend
+    supports it.
+
+    If a txn cannot be written the watermark is only advanced to the txns
+    written before it and the error is raised, so that the txn is written
+    again instead of being skipped.
+    """
+    with ExitStack() as stack:
+        if hasattr(graphStore, "batch"):
+            stack.enter_context(graphStore.batch())
+        seqNos = []
+        error = None
+        for txn in txns:
+            try:
+                addTxnToGraph(graphStore, txn)
+            except Exception as ex:
+                logger.error("Could not write txn {} to graph: {}".
+                             format(txn.get(TXN_ID), ex))
+                error = ex
+                break
+            if txn.get(F.seqNo.name) is not None:
+                seqNos.append(txn[F.seqNo.name])
+        if seqNos:
+            graphStore.setLastSeqNo(max(seqNos))
+        if error is not None:
+            raise error
+
+
+class GraphWriter:
+    """
+    Writes ordered txns to the identity graph from a worker thread so that
+    the node's event loop does not wait on graph I/O.
+
+    Txns are written in batches of up to `batchSize`, at the latest
+    `flushInterval` seconds after the first txn of a batch was queued. Until
+    a txn has been written it stays available through `getPendingTxn` and
+    `getPendingNymTxns` so the node can read its own writes.
+
+    A batch that cannot be written is retried every `retryInterval` seconds,
+    up to `maxRetries` times. The writer then gives up: it is `faulted`, no
+    more txns are written and waiting on it raises `GraphWriteError`. The
+    txns it did not write are after the graph's watermark, so they are
+    written again when the graph is rebuilt from the ledger.
+
+    The worker must be given a graph store of its own, no other thread
+    should use it.
+    """
+
+    def __init__(self, graphStore, batchSize: int, flushInterval: float,
+                 retryInterval: float=1, maxRetries: int=10):
+        self.graphStore = graphStore
+        self.batchSize = batchSize
+        self.flushInterval = flushInterval
+        self.retryInterval = retryInterval
+        self.maxRetries = maxRetries
+
+        self._cond = threading.Condition()
+        self._queue = deque()
+        # txnId -> txn, for txns queued or being written
+        self._pending = {}
+        # nym -> NYM txns for that nym, in the order they were queued
+        self._pendingNyms = {}
+        # nym -> number of txns queued or being written targeting or sent
+        # by that nym
+        self._pendingForNyms = Counter()
+        self._inFlight = 0
+        self._flushRequested = False
+        self._stopped = False
+        # The error the writer gave up on
+        self.error = None
+
+        self.batchesWritten = 0
+        self.txnsWritten = 0
+
+        self._worker = threading.Thread(target=self._run, name="GraphWriter",
+                                        daemon=True)
+        self._worker.start()
+
+    def add(self, txn):
+        with self._cond:
+            if self._stopped:
+                raise RuntimeError("{} is stopped".format(self))
+            self._queue.append(txn)
+            self._pending[txn[TXN_ID]] = txn
+            if txn[TXN_TYPE] == NYM:
+                self._pendingNyms.setdefault(txn[TARGET_NYM], []).append(txn)
+            self._pendingForNyms.update(self._nymsOf(txn))
+            if len(self._queue) == 1 or len(self._queue) >= self.batchSize:
+                self._cond.notify_all()
+
+    def getPendingTxn(self, txnId):
+        with self._cond:
+            return self._pending.get(txnId)
+
+    def getPendingNymTxns(self, nym) -> List[dict]:
+        with self._cond:
+            return list(self._pendingNyms.get(nym, ()))
+
+    def hasPendingTxnsFor(self, nym) -> bool:
+        """
+        Whether a txn targeting or sent by `nym` is yet to be written
+        """
+        with self._cond:
+            return self._pendingForNyms[nym] > 0
+
+    @staticmethod
+    def _nymsOf(txn) -> set:
+        return {nym for nym in (txn.get(TARGET_NYM), txn.get(f.IDENTIFIER.nm))
+                if nym}
+
+    @property
+    def pendingCount(self) -> int:
+        with self._cond:
+            return len(self._pending)
+
+    @property
+    def faulted(self) -> bool:
+        return self.error is not None
+
+    def flush(self, timeout: float=None):
+        """
+        Block till every txn queued so far has been written to the graph.
+
+        :raises GraphWriteError: if the writer gave up writing txns
+        :raises TimeoutError: if the txns are not written in `timeout`
+        seconds
+        """
+        deadline = None if timeout is None else \
+            time.perf_counter() + timeout
+        with self._cond:
+            self._flushRequested = True
+            self._cond.notify_all()
+            try:
+                while self._queue or self._inFlight:
+                    if self.faulted:
+                        raise GraphWriteError(
+                            "{} gave up writing txns: {}".
+                            format(self, self.error)) from self.error
+                    remaining = None if deadline is None else \
+                        deadline - time.perf_counter()
+                    if remaining is not None and remaining <= 0:
+                        raise TimeoutError(
+                            "{} did not write {} txns in {} seconds".
+                            format(self, len(self._pending), timeout))
+                    self._cond.wait(remaining)
+            finally:
+                self._flushRequested = False
+
+    def stop(self, timeout: float=None):
+        """
+        Stop the writer once the txns queued are written, or after `timeout`
+        seconds or as soon as it gave up, leaving the rest unwritten
+        """
+        try:
+            self.flush(timeout)
+        except (GraphWriteError, TimeoutError) as ex:
+            logger.error("{} stopping with {} txns not written to graph: {}".
+                         format(self, self.pendingCount, ex))
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        self._worker.join(timeout)
+
+    def _nextBatch(self):
+        with self._cond:
+            while not self._queue:
+                if self._stopped:
+                    return None
+                self._cond.wait()
+            deadline = time.perf_counter() + self.flushInterval
+            while len(self._queue) < self.batchSize and \
+                    not (self._flushRequested or self._stopped):
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            batch = [self._queue.popleft() for _ in
+                     range(min(self.batchSize, len(self._queue)))]
+            self._inFlight = len(batch)
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._nextBatch()
+            if batch is None:
+                return
+            try:
+                self._write(batch)
+            except Exception as ex:
+                logger.error("{} gave up writing txns to graph: {}".
+                             format(self, ex))
+                with self._cond:
+                    # The txns not written stay pending so the node still
+                    # reads its own writes
+                    self.error = ex
+                    self._queue.extendleft(reversed(batch))
+                    self._inFlight = 0
+                    self._cond.notify_all()
+                return
+            with self._cond:
+                for txn in batch:
+                    self._pending.pop(txn[TXN_ID], None)
+                    if txn[TXN_TYPE] == NYM:
+                        nymTxns = self._pendingNyms[txn[TARGET_NYM]]
+                        nymTxns.remove(txn)
+                        if not nymTxns:
+                            self._pendingNyms.pop(txn[TARGET_NYM])
+                    self._pendingForNyms.subtract(self._nymsOf(txn))
+                # Drops the nyms with no txns left to write
+                self._pendingForNyms += Counter()
+                self._inFlight = 0
+                self.batchesWritten += 1
+                self.txnsWritten += len(batch)
+                self._cond.notify_all()
+
+    def _write(self, batch):
+        """
+        Write `batch` to the graph, retrying the txns after the graph's
+        watermark till they are all written. The error of the last attempt is
+        raised after `maxRetries` retries, or once the writer is stopped.
+        """
+        start = time.perf_counter()
+        retries = 0
+        while True:
+            try:
+                writeTxnsToGraph(self.graphStore, batch)
+                break
+            except Exception as ex:
+                with self._cond:
+                    stopped = self._stopped
+                if retries >= self.maxRetries or stopped:
+                    raise
+                retries += 1
+                logger.error("{} could not write batch to graph, retry {} of "
+                             "{} in {} seconds: {}".
+                             format(self, retries, self.maxRetries,
+                                    self.retryInterval, ex))
+            lastSeqNo = self.graphStore.getLastSeqNo() or 0
+            batch = [txn for txn in batch
+                     if txn.get(F.seqNo.name) is None or
+                     txn[F.seqNo.name] > lastSeqNo]
+            time.sleep(self.retryInterval)
+        logger.debug("{} wrote {} txns to graph in {:.4f} seconds".
+                     format(self, len(batch), time.perf_counter() - start))
+
+    def __repr__(self):
+        return self.__class__.__name__
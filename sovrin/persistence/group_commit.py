@@ -0,0 +1,155 @@
+import os
+import time
+from typing import Callable, Hashable, List, Sequence
+
+from plenum.common.log import getlogger
+
+from sovrin.common.metrics import LatencyHistogram
+
+logger = getlogger()
+
+# Ways appended ledger txns are made durable
+DURABILITY_FSYNC = "fsync"
+DURABILITY_GROUP = "group"
+DURABILITY_NONE = "none"
+DURABILITY_MODES = (DURABILITY_FSYNC, DURABILITY_GROUP, DURABILITY_NONE)
+
+
+def durabilityMode(config) -> str:
+    """
+    `LedgerDurabilityMode` of `config`, or if not set the mode matching
+    `EnsureLedgerDurability`
+    """
+    mode = getattr(config, "LedgerDurabilityMode", None)
+    if mode is None:
+        return DURABILITY_FSYNC if config.EnsureLedgerDurability \
+            else DURABILITY_NONE
+    if mode not in DURABILITY_MODES:
+        raise ValueError("LedgerDurabilityMode should be one of {}, got {}".
+                         format(", ".join(DURABILITY_MODES), mode))
+    return mode
+
+
+def storeFiles(store) -> List:
+    """
+    Open files of a store of a ledger: the file of a file store, like the
+    transaction log, or the files of the node and leaf stores of a file hash
+    store. Empty for stores keeping no files, like an OrientDB or in-memory
+    hash store.
+    """
+    if store is None:
+        return []
+    if hasattr(store, "nodesFile") and hasattr(store, "leavesFile"):
+        return storeFiles(store.nodesFile) + storeFiles(store.leavesFile)
+    dbFile = getattr(store, "_dbFile", None)
+    return [dbFile] if dbFile is not None and not dbFile.closed else []
+
+
+def transactionLogFiles(ledger) -> List:
+    return storeFiles(getattr(ledger, "_transactionLog", None))
+
+
+def hashStoreFiles(ledger) -> List:
+    return storeFiles(getattr(ledger.tree, "hashStore", None))
+
+
+class GroupCommitter:
+    """
+    Makes the txns appended to `ledgers` durable with one fsync per file for
+    all the txns appended together, and holds back the actions depending on
+    them being durable, like sending their replies, until then.
+
+    Actions wait at most `maxDelay` seconds, or until `maxTxns` of them are
+    waiting, for more txns to be made durable at the same time.
+
+    The files of the ledgers are found once. A ledger whose transaction log
+    or hash store keeps no files, like one with an OrientDB hash store, is
+    refused as its txns could not be made durable.
+    """
+
+    def __init__(self, ledgers: Sequence, maxDelay: float, maxTxns: int):
+        self.ledgers = ledgers
+        self.files = []
+        for ledger in ledgers:
+            for name, files in (("transaction log",
+                                 transactionLogFiles(ledger)),
+                                ("hash store", hashStoreFiles(ledger))):
+                if not files:
+                    raise ValueError(
+                        "The {} of {} keeps no files, its txns could not be "
+                        "made durable. The \"group\" LedgerDurabilityMode "
+                        "needs a \"file\" hashStore.".format(name, ledger))
+                self.files.extend(files)
+        self.maxDelay = maxDelay
+        self.maxTxns = maxTxns
+        self._pending = []  # type: List[Callable[[], None]]
+        # Keys of the requests whose txns are waiting to be made durable
+        self._pendingKeys = set()
+        self._firstPendingAt = None
+        self.commits = 0
+        self.txns = 0
+        self.fsyncLatency = LatencyHistogram()
+
+    def defer(self, action: Callable[[], None], key: Hashable=None):
+        """
+        Run `action` once the txns appended so far are durable. `key` is
+        the key of the request whose txn was appended with the action, if
+        any.
+        """
+        if not self._pending:
+            self._firstPendingAt = time.perf_counter()
+        self._pending.append(action)
+        if key is not None:
+            self._pendingKeys.add(key)
+            self.txns += 1
+
+    def isPending(self, key: Hashable) -> bool:
+        """
+        Whether the txn of the request with `key` is not yet durable
+        """
+        return key in self._pendingKeys
+
+    def service(self, force: bool=False) -> int:
+        """
+        Commit and run the actions waiting if they waited long enough or
+        enough of them are waiting
+        """
+        if not self._pending:
+            return 0
+        if not force and len(self._pending) < self.maxTxns and \
+                time.perf_counter() - self._firstPendingAt < self.maxDelay:
+            return 0
+        self.commit()
+        actions, self._pending = self._pending, []
+        self._pendingKeys.clear()
+        for action in actions:
+            try:
+                action()
+            except Exception as ex:
+                logger.error("{} could not run {} after commit: {}".
+                             format(self, action, ex))
+        return len(actions)
+
+    def commit(self):
+        start = time.perf_counter()
+        for f in self.files:
+            f.flush()
+            os.fsync(f.fileno())
+        self.fsyncLatency.observe(time.perf_counter() - start)
+        self.commits += 1
+
+    @property
+    def pendingCount(self) -> int:
+        return len(self._pending)
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "commits": self.commits,
+            "txns": self.txns,
+            "pending": self.pendingCount,
+            "fsyncLatency": self.fsyncLatency.stats
+        }
+
+    def __repr__(self):
+        return self.__class__.__name__
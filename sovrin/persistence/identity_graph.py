@@ -1,9 +1,8 @@
 import datetime
 import json
 import time
-from functools import reduce
 from itertools import chain
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 
 import pyorient
 from ledger.util import F
@@ -19,12 +18,34 @@ from plenum.server.node import Node
 from sovrin.common.txn import NYM, TXN_ID, TARGET_NYM, SPONSOR, \
     STEWARD, ROLE, REF, TXN_TIME, ATTRIB, CLAIM_DEF, ATTR_NAMES, ISSUER_KEY, TGB, \
     TRUSTEE
+from sovrin.common.util import rawAttrName
+from sovrin.persistence.blob_store import BlobStore
+from sovrin.persistence.orientdb_query import QueryRunner, Rid, assignments
 from sovrin.server.auth import Authoriser
 
 logger = getlogger()
 
 MIN_TXN_TIME = time.mktime(datetime.datetime(2000, 1, 1).timetuple())
 
+GRAPH_META = "GraphMeta"
+LAST_SEQ_NO = "lastSeqNo"
+ATTR_NAMES_INDEXED = "attrNamesIndexed"
+KEYS_INDEXED = "claimDefsAndIssuerKeysIndexed"
+TXN_IDS_INDEXED = "txnIdsIndexed"
+
+# Maps the id of each txn to the record, and its class, the txn was added as:
+# its edge in `txnEdges` or, for genesis and updated nyms, the nym vertex
+TXN_INDEX = "TxnIndex"
+TXN_REC = "rec"
+TXN_REC_CLASS = "recClass"
+
+# Name of a raw attribute, kept on its `AddsAttribute` edge
+ATTR_NAME = "attrName"
+# Keys in the blob store of the raw or encrypted values of attributes kept
+# there, on their `Attribute` vertices
+RAW_BLOB = "rawBlob"
+ENC_BLOB = "encBlob"
+
 
 class Vertices:
     Nym = NYM
@@ -34,7 +55,7 @@ class Vertices:
 
     _Properties = {
         Nym: (NYM, VERKEY, TXN_ID, ROLE, F.seqNo.name),
-        Attribute: (RAW, ENC, HASH),
+        Attribute: (RAW, ENC, HASH, RAW_BLOB, ENC_BLOB),
         ClaimDef: (TYPE, ATTR_NAMES),
         IssuerKey: (REF, DATA)
     }
@@ -79,6 +100,24 @@ def getTxnTypeFromEdge(edgeClass: str):
 
 class IdentityGraph(OrientDbGraphStore):
 
+    def __init__(self, store, pool=None, blobStore: BlobStore=None,
+                 blobMinSize: Optional[int]=None):
+        # All statements go through `queries` which binds values to them and
+        # runs them on a connection of `pool` if given
+        self.queries = QueryRunner(store.client, pool)
+        # Raw and encrypted attribute values of at least `blobMinSize` bytes
+        # when encoded are kept in `blobStore`, their vertices only have the
+        # key of the value
+        self.blobStore = blobStore
+        self.blobMinSize = blobMinSize
+        super().__init__(store)
+
+    def bootstrap(self):
+        super().bootstrap()
+        self._indexAttrNames()
+        self._indexClaimDefsAndIssuerKeys()
+        self._indexTxnIds()
+
     @property
     def classesNeeded(self):
         return [
@@ -91,7 +130,9 @@ class IdentityGraph(OrientDbGraphStore):
             (Edges.AddsAttribute, self.createAddsAttributeClass),
             (Edges.HasAttribute, self.createHasAttributeClass),
             (Edges.AddsClaimDef, self.createAddsClaimDefClass),
-            (Edges.HasIssuerKey, self.createHasIssuerClass)
+            (Edges.HasIssuerKey, self.createHasIssuerClass),
+            (GRAPH_META, self.createGraphMetaClass),
+            (TXN_INDEX, self.createTxnIndexClass)
         ]
 
     # Creates a vertex class which has a property called `nym` with a unique
@@ -169,25 +210,189 @@ class IdentityGraph(OrientDbGraphStore):
 
     def createAddsAttributeClass(self):
         self.createEdgeClassWithTxnData(Edges.AddsAttribute,
-                                        properties={TARGET_NYM: "string"})
+                                        properties={TARGET_NYM: "string",
+                                                    ATTR_NAME: "string"})
         # Not specifying `out` here as both Sponsor and Agent can add attributes
         self.addEdgeConstraint(Edges.AddsAttribute, iN=Vertices.Attribute)
+        self._createIndex(Edges.AddsAttribute, TARGET_NYM, ATTR_NAME)
+
+    def _indexAttrNames(self):
+        """
+        Add the name of raw attributes to `AddsAttribute` edges created
+        before names were kept on them, done once per graph
+        """
+        if self._getMeta(ATTR_NAMES_INDEXED):
+            return
+        try:
+            self.queries.command("create property {}.{} string".
+                                 format(Edges.AddsAttribute, ATTR_NAME))
+            self._createIndex(Edges.AddsAttribute, TARGET_NYM, ATTR_NAME)
+        except pyorient.PyOrientCommandException:
+            # Graph created with the property and index
+            pass
+        edgeRecs = self.queries.command(
+            "select @rid as __rid, in.{} as __raw from {} where {} is null "
+            "and in.{} is not null".format(RAW, Edges.AddsAttribute,
+                                           ATTR_NAME, RAW)) or []
+        for rec in edgeRecs:
+            self.queries.command("update :rid set {} = :name".
+                                 format(ATTR_NAME),
+                                 rid=Rid(rec.oRecordData['__rid'].get()),
+                                 name=rawAttrName(rec.oRecordData['__raw']))
+        logger.debug("{} indexed names of {} attributes".
+                     format(self, len(edgeRecs)))
+        self._setMeta(ATTR_NAMES_INDEXED, 1)
 
     def createHasAttributeClass(self):
         self.createUniqueTxnIdEdgeClass(Edges.HasAttribute)
         self.addEdgeConstraint(Edges.HasAttribute, iN=Vertices.Attribute)
 
     def createAddsClaimDefClass(self):
-        # TODO: Add compound index on the name and version
         self.createUniqueTxnIdEdgeClass(Edges.AddsClaimDef, properties={
+            f.IDENTIFIER.nm: "string",
             NAME: "string",
             VERSION: "string"
         })
         self.addEdgeConstraint(Edges.AddsClaimDef, iN=Vertices.ClaimDef)
+        self._createIndex(Edges.AddsClaimDef, f.IDENTIFIER.nm, NAME, VERSION)
 
     def createHasIssuerClass(self):
-        self.createUniqueTxnIdEdgeClass(Edges.HasIssuerKey)
+        self.createUniqueTxnIdEdgeClass(Edges.HasIssuerKey, properties={
+            f.IDENTIFIER.nm: "string",
+            REF: "string"
+        })
         self.addEdgeConstraint(Edges.HasAttribute, out=Vertices.Nym)
+        self._createIndex(Edges.HasIssuerKey, f.IDENTIFIER.nm, REF)
+
+    def _createIndex(self, className, *properties):
+        self.queries.command("create index {}_{} on {} ({}) notunique".
+                             format(className, "_".join(properties),
+                                    className, ", ".join(properties)))
+
+    def _indexClaimDefsAndIssuerKeys(self):
+        """
+        Add the issuer, and the reference for issuer keys, to `AddsClaimDef`
+        and `HasIssuerKey` edges created before they were kept on them, and
+        index them. Done once per graph
+        """
+        if self._getMeta(KEYS_INDEXED):
+            return
+        for className, properties in (
+                (Edges.AddsClaimDef, (f.IDENTIFIER.nm, NAME, VERSION)),
+                (Edges.HasIssuerKey, (f.IDENTIFIER.nm, REF))):
+            try:
+                for prop in properties:
+                    if prop not in (NAME, VERSION):
+                        self.queries.command("create property {}.{} string".
+                                             format(className, prop))
+                self._createIndex(className, *properties)
+            except pyorient.PyOrientCommandException:
+                # Graph created with the properties and index
+                pass
+            self.queries.command("update {} set {} = out.{} where {} is null".
+                                 format(className, f.IDENTIFIER.nm, NYM,
+                                        f.IDENTIFIER.nm))
+        self.queries.command("update {} set {} = in.{} where {} is null".
+                             format(Edges.HasIssuerKey, REF, REF, REF))
+        self._setMeta(KEYS_INDEXED, 1)
+
+    def createGraphMetaClass(self):
+        self.store.createClass(GRAPH_META)
+        self.store.createClassProperties(GRAPH_META, {
+            NAME: "string",
+            "value": "long",
+        })
+        self.store.createUniqueIndexOnClass(GRAPH_META, NAME)
+
+    def createTxnIndexClass(self):
+        self.store.createClass(TXN_INDEX)
+        self.store.createClassProperties(TXN_INDEX, {
+            TXN_ID: "string",
+            TXN_REC_CLASS: "string",
+            TXN_REC: "link",
+        })
+        self.store.createUniqueIndexOnClass(TXN_INDEX, TXN_ID)
+
+    def _indexTxn(self, txnId, className, rid):
+        self.queries.command("update {} set {} upsert where {} = :{}".
+                             format(TXN_INDEX,
+                                    assignments((TXN_ID, TXN_REC_CLASS,
+                                                 TXN_REC)),
+                                    TXN_ID, TXN_ID),
+                             **{TXN_ID: txnId, TXN_REC_CLASS: className,
+                                TXN_REC: Rid(rid)})
+
+    def _indexTxnIds(self):
+        """
+        Add the txns of graphs created before `TXN_INDEX` to it, done once
+        per graph
+        """
+        if self._getMeta(TXN_IDS_INDEXED):
+            return
+        # Start over if an earlier run was interrupted
+        self.queries.command("delete from {}".format(TXN_INDEX))
+        for edgeClass in txnEdges.values():
+            self.queries.command(
+                "insert into {} from select {}, '{}' as {}, @rid as {} from {}".
+                format(TXN_INDEX, TXN_ID, edgeClass, TXN_REC_CLASS, TXN_REC,
+                       edgeClass))
+        # Nyms not added through an edge, or updated since, are known by
+        # the txn id kept on their vertex
+        indexed = {rec.oRecordData.get(TXN_ID) for rec in self.queries.command(
+            "select {} from {}".format(TXN_ID, TXN_INDEX)) or []}
+        nymRecs = self.queries.command("select {}, @rid as __rid from {}".
+                                       format(TXN_ID, Vertices.Nym)) or []
+        for rec in nymRecs:
+            txnId = rec.oRecordData.get(TXN_ID)
+            if txnId and txnId not in indexed:
+                self._indexTxn(txnId, Vertices.Nym,
+                               rec.oRecordData['__rid'].get())
+        self._setMeta(TXN_IDS_INDEXED, 1)
+
+    def createVertex(self, name, **kwargs):
+        cmd = "create vertex {}".format(name)
+        if kwargs:
+            cmd += " set " + assignments(kwargs)
+        return self.queries.command(cmd, **kwargs)[0]
+
+    def createEdge(self, name, frm, to, **kwargs):
+        """
+        Create an edge of class `name` from `frm` to `to`, each either the
+        `Rid` of a vertex or a nym
+        """
+        cmd = "create edge {} from {} to {}".format(
+            name, self._vertexRef(frm, "edgeFrm"), self._vertexRef(to, "edgeTo"))
+        if kwargs:
+            cmd += " set " + assignments(kwargs)
+        return self.queries.command(cmd, edgeFrm=frm, edgeTo=to, **kwargs)[0]
+
+    @staticmethod
+    def _vertexRef(vertex, param):
+        if isinstance(vertex, Rid):
+            return ":" + param
+        return "(select from {} where {} = :{})".format(Vertices.Nym, NYM,
+                                                        param)
+
+    def getEntityByUniqueAttr(self, entityClassName, attrName, attrValue):
+        return self.getEntityByAttrs(entityClassName, {attrName: attrValue})
+
+    def getEntityByAttrs(self, entityClassName, attrs: Dict):
+        result = self.queries.command("select from {} where {}".format(
+            entityClassName, assignments(attrs, " and ")), **attrs)
+        return None if not result else result[0]
+
+    def countEntitiesByAttrs(self, entityClassName, attrs: Dict):
+        result = self.queries.command("select count(*) from {} where {}".format(
+            entityClassName, assignments(attrs, " and ")), **attrs)
+        return result[0].oRecordData['count']
+
+    def updateEntityWithUniqueId(self, entityClassName, uniqueAttr,
+                                 uniqueAttrVal, **kwargs):
+        if kwargs:
+            self.queries.command("update {} set {} where {} = :uniqueAttrVal".
+                                 format(entityClassName, assignments(kwargs),
+                                        uniqueAttr),
+                                 uniqueAttrVal=uniqueAttrVal, **kwargs)
 
     def getEdgeByTxnId(self, edgeClassName, txnId):
         return self.getEntityByUniqueAttr(edgeClassName, TXN_ID, txnId)
@@ -215,26 +420,21 @@ class IdentityGraph(OrientDbGraphStore):
             # In case of genesis transaction
             kwargs[F.seqNo.name] = seqNo
 
-        self.createVertex(Vertices.Nym, **kwargs)
+        vertex = self.createVertex(Vertices.Nym, **kwargs)
         if not frm:
             logger.debug("frm not available while adding nym")
+            self._indexTxn(txnId, Vertices.Nym, vertex._rid)
         else:
-            frmV = "(select from {} where {} = '{}')".format(Vertices.Nym,
-                                                             NYM,
-                                                             frm)
-            toV = "(select from {} where {} = '{}')".format(Vertices.Nym,
-                                                            NYM,
-                                                            nym)
-
-            self.createEdge(Edges.AddsNym, frmV, toV, **kwargs)
+            edge = self.createEdge(Edges.AddsNym, frm, nym, **kwargs)
+            self._indexTxn(txnId, Edges.AddsNym, edge._rid)
             if reference:
                 nymEdge = self.getEdgeByTxnId(Edges.AddsNym, txnId=reference)
-                referredNymRid = nymEdge.oRecordData['in'].get()
+                referredNymRid = Rid(nymEdge.oRecordData['in'].get())
                 kwargs = {
                     REF: reference,
                     TXN_ID: txnId
                 }
-                self.createEdge(Edges.AliasOf, referredNymRid, toV, **kwargs)
+                self.createEdge(Edges.AliasOf, referredNymRid, nym, **kwargs)
 
     def addAttribute(self, frm, txnId, raw=None, enc=None, hash=None, to=None):
         # Only one of `raw`, `enc`, `hash` should be provided so 2 should be
@@ -242,27 +442,38 @@ class IdentityGraph(OrientDbGraphStore):
         if (raw, enc, hash).count(None) != 2:
             error("One and only one of raw, enc and hash should be provided")
 
-        if raw:
+        value = raw or enc
+        # Values are only encoded to be measured if long enough in
+        # characters, a character being at most 4 bytes
+        if value and self.blobStore and self.blobMinSize is not None and \
+                len(value) * 4 >= self.blobMinSize and \
+                len(value.encode()) >= self.blobMinSize:
+            key = self.blobStore.put(value)
+            attrVertex = self.createVertex(Vertices.Attribute,
+                                           **{RAW_BLOB if raw else ENC_BLOB:
+                                              key})
+        elif raw:
             attrVertex = self.createVertex(Vertices.Attribute, raw=raw)
         elif enc:
             attrVertex = self.createVertex(Vertices.Attribute, enc=enc)
         elif hash:
             attrVertex = self.createVertex(Vertices.Attribute, hash=hash)
 
-        frm = "(select from {} where {} = '{}')".format(Vertices.Nym, NYM,
-                                                        frm)
         kwargs = {
             TARGET_NYM: to,
             TXN_ID: txnId,
         }
-        self.createEdge(Edges.AddsAttribute, frm, attrVertex._rid, **kwargs)
+        if raw:
+            kwargs[ATTR_NAME] = rawAttrName(raw)
+        edge = self.createEdge(Edges.AddsAttribute, frm, Rid(attrVertex._rid),
+                               **kwargs)
+        self._indexTxn(txnId, Edges.AddsAttribute, edge._rid)
         if to:
-            to = "(select from {} where {} = '{}')".format(Vertices.Nym, NYM,
-                                                           to)
             kwargs = {
                 TXN_ID: txnId
             }
-            self.createEdge(Edges.HasAttribute, to, attrVertex._rid, **kwargs)
+            self.createEdge(Edges.HasAttribute, to, Rid(attrVertex._rid),
+                            **kwargs)
 
     def addClaimDef(self, frm, txnId, name, version, attrNames,
                    typ: Optional[str]=None):
@@ -271,14 +482,15 @@ class IdentityGraph(OrientDbGraphStore):
             ATTR_NAMES: attrNames
         }
         vertex = self.createVertex(Vertices.ClaimDef, **kwargs)
-        frm = "(select from {} where {} = '{}')".format(Vertices.Nym, NYM,
-                                                        frm)
         kwargs = {
             TXN_ID: txnId,
+            f.IDENTIFIER.nm: frm,
             NAME: name,
             VERSION: version
         }
-        self.createEdge(Edges.AddsClaimDef, frm, vertex._rid, **kwargs)
+        edge = self.createEdge(Edges.AddsClaimDef, frm, Rid(vertex._rid),
+                               **kwargs)
+        self._indexTxn(txnId, Edges.AddsClaimDef, edge._rid)
 
     def addIssuerKey(self, frm, txnId, data, reference):
         kwargs = {
@@ -286,12 +498,14 @@ class IdentityGraph(OrientDbGraphStore):
             REF: reference
         }
         vertex = self.createVertex(Vertices.IssuerKey, **kwargs)
-        frm = "(select from {} where {} = '{}')".format(Vertices.Nym, NYM,
-                                                        frm)
         kwargs = {
             TXN_ID: txnId,
+            f.IDENTIFIER.nm: frm,
+            REF: str(reference)
         }
-        self.createEdge(Edges.HasIssuerKey, frm, vertex._rid, **kwargs)
+        edge = self.createEdge(Edges.HasIssuerKey, frm, Rid(vertex._rid),
+                               **kwargs)
+        self._indexTxn(txnId, Edges.HasIssuerKey, edge._rid)
 
     def updateNym(self, txnId, nym, verkey, seqNo, role):
         kwargs = {
@@ -303,72 +517,119 @@ class IdentityGraph(OrientDbGraphStore):
             kwargs[VERKEY] = verkey
 
         self.updateEntityWithUniqueId(Vertices.Nym, NYM, nym, **kwargs)
+        # The vertex is now known by the id of the updating txn
+        rid = self.getNym(nym)._rid
+        self.queries.command("delete from {} where {} = :rid".
+                             format(TXN_INDEX, TXN_REC), rid=Rid(rid))
+        self._indexTxn(txnId, Vertices.Nym, rid)
 
     def getRawAttrs(self, frm, *attrNames):
-        cmd = 'select expand(outE("{}").inV("{}")) from {} where {}="{}"'.\
-            format(Edges.HasAttribute, Vertices.Attribute, Vertices.Nym,
-                   NYM, frm)
-        allAttrsRecords = self.client.command(cmd)
-        attrVIds = [a._rid for a in allAttrsRecords]
+        if attrNames:
+            return self._getRawAttrsByName(frm, *attrNames)
+        cmd = "select expand(outE('{}').inV('{}')) from {} where {} = :nym".\
+            format(Edges.HasAttribute, Vertices.Attribute, Vertices.Nym, NYM)
+        allAttrsRecords = self.queries.command(cmd, nym=frm)
+        attrVIds = [Rid(a._rid) for a in allAttrsRecords]
         seqNos = {}
         if attrVIds:
-            edgeRecs = self.client.command("select expand(inE('{}')) from [{}]"
-                                           .format(Edges.AddsAttribute,
-                                                   ", ".join(attrVIds)))
+            edgeRecs = self.queries.command("select expand(inE('{}')) from "
+                                            ":rids".format(Edges.AddsAttribute),
+                                            rids=attrVIds)
             seqNos = {str(rec._in): int(rec.oRecordData.get(F.seqNo.name))
                       for rec in edgeRecs}
         result = {}
         for attrRec in allAttrsRecords:
-            raw = json.loads(attrRec.oRecordData.get(RAW))
+            raw = json.loads(self._attrValue(attrRec.oRecordData, RAW,
+                                             RAW_BLOB))
             key, value = raw.popitem()
             if len(attrNames) == 0 or key in attrNames:
                 result[key] = [value, seqNos[attrRec._rid]]
         return result
 
+    def _attrValue(self, data, name, blobName) -> Optional[str]:
+        """
+        Value of an attribute kept in the graph under `name`, or in the blob
+        store under the key in `blobName`
+        """
+        if data.get(name) is not None or not data.get(blobName):
+            return data.get(name)
+        if not self.blobStore:
+            raise RuntimeError("{} has attribute values in a blob store but "
+                               "has no blob store".format(self))
+        return self.blobStore.get(data[blobName])
+
+    def _resolveBlobs(self, data: dict):
+        """
+        In the fields of a txn read from the graph, replace the keys of
+        attribute values kept in the blob store with the values themselves
+        """
+        for name, blobName in ((RAW, RAW_BLOB), (ENC, ENC_BLOB)):
+            if data.get(blobName):
+                data[name] = self._attrValue(data, name, blobName)
+            data.pop(blobName, None)
+
+    def _getRawAttrsByName(self, frm, *attrNames):
+        """
+        Latest value and sequence number of each of the named raw attributes
+        of `frm`, looked up through the index on the attribute's target and
+        name
+        """
+        recs = self.queries.command(
+            "select {}, {}, in.{} as __raw, in.{} as __rawBlob from {} where "
+            "{} = :nym and {} in :names".format(ATTR_NAME, F.seqNo.name, RAW,
+                                                RAW_BLOB, Edges.AddsAttribute,
+                                                TARGET_NYM, ATTR_NAME),
+            nym=frm, names=attrNames) or []
+        result = {}
+        for rec in recs:
+            data = rec.oRecordData
+            seqNo = int(data.get(F.seqNo.name))
+            name = data.get(ATTR_NAME)
+            if name not in result or result[name][1] < seqNo:
+                raw = self._attrValue(data, '__raw', '__rawBlob')
+                result[name] = [json.loads(raw)[name], seqNo]
+        return result
+
+    def _latestEdge(self, template, **params):
+        # Edges are few per key, the latest is picked here since sequence
+        # numbers are not stored with the same type on every edge class
+        recs = self.queries.command(template, **params)
+        if not recs:
+            return None
+        return max((rec.oRecordData for rec in recs),
+                   key=lambda data: int(data.get(F.seqNo.name) or 0))
+
     def getClaimDef(self, frm, name, version):
-        # TODO: Can this query be made similar to get attribute?
-        cmd = "select outV('{}')[{}='{}'], expand(inV('{}')) from {} where " \
-              "name = '{}' and version = '{}'".format(Vertices.Nym, NYM, frm,
-                                                      Vertices.ClaimDef,
-                                                      Edges.AddsClaimDef, name,
-                                                      version)
-        claimDefs = self.client.command(cmd)
-        if claimDefs:
-            claimDef = claimDefs[0].oRecordData
-            edgeData = self.client.command(
-                "select expand(inE('{}')) from {}".format(
-                    Edges.AddsClaimDef, claimDefs[0]._rid))[0].oRecordData
+        data = self._latestEdge(
+            "select {}, in.{} as __type, in.{} as __attrNames from {} where "
+            "{}".format(F.seqNo.name, TYPE, ATTR_NAMES, Edges.AddsClaimDef,
+                        assignments((f.IDENTIFIER.nm, NAME, VERSION),
+                                    " and ")),
+            **{f.IDENTIFIER.nm: frm, NAME: name, VERSION: version})
+        if data:
             return {
                 NAME: name,
                 VERSION: version,
-                TYPE: claimDef.get(TYPE),
-                F.seqNo.name: edgeData.get(F.seqNo.name),
-                ATTR_NAMES: claimDef.get(ATTR_NAMES),
+                TYPE: data.get('__type'),
+                F.seqNo.name: data.get(F.seqNo.name),
+                ATTR_NAMES: data.get('__attrNames'),
                 ORIGIN: frm,
             }
         return None
 
     def getIssuerKeys(self, frm, ref):
-        cmd = "select expand(outE('{}').inV('{}')) from {} where " \
-              "{} = '{}'".format(Edges.HasIssuerKey, Vertices.IssuerKey,
-                                 Vertices.Nym, NYM, frm)
-        haystack = self.client.command(cmd)
-        needle = None
-        if haystack:
-            for rec in haystack:
-                if rec.oRecordData.get(REF) == str(ref):
-                    needle = rec
-                    break
-            if needle:
-                edgeData = self.client.command(
-                    "select expand(inE('{}')) from {}".format(
-                        Edges.HasIssuerKey, needle._rid))[0].oRecordData
-                return {
-                    ORIGIN: frm,
-                    REF: ref,
-                    F.seqNo.name: edgeData.get(F.seqNo.name),
-                    DATA: json.loads(needle.oRecordData.get(DATA))
-                }
+        data = self._latestEdge(
+            "select {}, in.{} as __data from {} where {}".
+            format(F.seqNo.name, DATA, Edges.HasIssuerKey,
+                   assignments((f.IDENTIFIER.nm, REF), " and ")),
+            **{f.IDENTIFIER.nm: frm, REF: str(ref)})
+        if data:
+            return {
+                ORIGIN: frm,
+                REF: ref,
+                F.seqNo.name: data.get(F.seqNo.name),
+                DATA: json.loads(data.get('__data'))
+            }
         return None
 
     def getNym(self, nym, role=None):
@@ -427,48 +688,131 @@ class IdentityGraph(OrientDbGraphStore):
             return nymV.oRecordData.get(ROLE)
 
     def getSponsorFor(self, nym):
-        sponsor = self.client.command("select expand (out) from {} where "
-                                      "{} = '{}'".format(Edges.AddsNym,
-                                                         NYM, nym))
+        sponsor = self.queries.command("select expand (out) from {} where "
+                                       "{} = :nym".format(Edges.AddsNym, NYM),
+                                       nym=nym)
         return None if not sponsor else sponsor[0].oRecordData.get(NYM)
 
+    def getNymStates(self, *nyms) -> Dict[str, Optional[dict]]:
+        """
+        Role, verkey, sponsor and sequence number of each of `nyms` present
+        in the graph, with a single query
+        """
+        nyms = set(nyms)
+        result = dict.fromkeys(nyms)
+        if not nyms:
+            return result
+        recs = self.queries.command(
+            "select {nym}, {role}, {verkey}, {seqNo}, "
+            "in('{adds}').{nym} as __sponsor from {vertex} "
+            "where {nym} in :nyms".format(nym=NYM, role=ROLE, verkey=VERKEY,
+                                          seqNo=F.seqNo.name,
+                                          adds=Edges.AddsNym,
+                                          vertex=Vertices.Nym),
+            nyms=nyms)
+        for rec in recs or []:
+            data = rec.oRecordData
+            result[data.get(NYM)] = {
+                ROLE: data.get(ROLE),
+                VERKEY: data.get(VERKEY),
+                "sponsor": self._first(data.get('__sponsor')),
+                F.seqNo.name: data.get(F.seqNo.name)
+            }
+        return result
+
     def countStewards(self):
         return self.countEntitiesByAttrs(Vertices.Nym, {ROLE: STEWARD})
 
     def getAddNymTxn(self, nym):
-        nymEdge = self.getAddsNymEdge(nym)
-        if not nymEdge:
-            # For the special case where steward(s) are added through genesis
-            # transactions so they wont have an edge
-            nymV = self.getNym(nym)
-            if not nymV:
-                return None
-            else:
-                return {
-                    TXN_ID: nymV.oRecordData.get(TXN_ID),
+        return self.getAddNymTxns(nym)[nym]
+
+    def getAddNymTxns(self, *nyms) -> Dict[str, Optional[dict]]:
+        """
+        Txns adding each of `nyms`, with a single query over their vertices
+        which also reads the `AddsNym` edge to each, if any
+        """
+        nyms = set(nyms)
+        result = dict.fromkeys(nyms)
+        if not nyms:
+            return result
+        recs = self.queries.command(
+            "select {nym}, {txnId}, {role}, {verkey}, "
+            "inE('{adds}').{txnId} as __eTxnId, "
+            "inE('{adds}').{role} as __eRole, "
+            "in('{adds}').{nym} as __frm from {vertex} "
+            "where {nym} in :nyms".format(nym=NYM, txnId=TXN_ID, role=ROLE,
+                                          verkey=VERKEY, adds=Edges.AddsNym,
+                                          vertex=Vertices.Nym),
+            nyms=nyms)
+        for rec in recs or []:
+            data = rec.oRecordData
+            nym = data.get(NYM)
+            edgeTxnId = self._first(data.get('__eTxnId'))
+            if edgeTxnId is None:
+                # For the special case where steward(s) are added through
+                # genesis transactions so they wont have an edge
+                result[nym] = {
+                    TXN_ID: data.get(TXN_ID),
                     TARGET_NYM: nym,
-                    ROLE: nymV.oRecordData.get(ROLE),
-                    VERKEY: nymV.oRecordData.get(VERKEY)
+                    ROLE: data.get(ROLE),
+                    VERKEY: data.get(VERKEY)
                 }
-        else:
-            edgeData = nymEdge.oRecordData
-            result = {
-                TXN_ID: edgeData.get(TXN_ID),
-                ROLE: edgeData.get(ROLE)
+                continue
+            txn = {
+                TXN_ID: edgeTxnId,
+                ROLE: self._first(data.get('__eRole')),
+                f.IDENTIFIER.nm: self._first(data.get('__frm')),
+                TARGET_NYM: nym
             }
-            frm, to = self.store.getByRecordIds(edgeData['out'].get(),
-                                                edgeData['in'].get())
-            result[f.IDENTIFIER.nm] = frm.oRecordData.get(NYM)
-            result[TARGET_NYM] = to.oRecordData.get(NYM)
-            verkey = to.oRecordData.get(VERKEY)
-            if verkey is not None:
-                result[VERKEY] = verkey
-            return result
+            if data.get(VERKEY) is not None:
+                txn[VERKEY] = data[VERKEY]
+            result[nym] = txn
+        return result
+
+    def getRawAttrsForNyms(self, attrName, *nyms) -> Dict[str, list]:
+        """
+        Latest value and sequence number of raw attribute `attrName` for
+        each of `nyms` that has it, with a single query
+        """
+        if not nyms:
+            return {}
+        recs = self.queries.command(
+            "select {}, {}, in.{} as __raw, in.{} as __rawBlob from {} where "
+            "{} in :nyms and {} = :name".format(TARGET_NYM, F.seqNo.name, RAW,
+                                                RAW_BLOB, Edges.AddsAttribute,
+                                                TARGET_NYM, ATTR_NAME),
+            nyms=set(nyms), name=attrName)
+        result = {}
+        for rec in recs or []:
+            data = rec.oRecordData
+            seqNo = int(data.get(F.seqNo.name))
+            nym = data.get(TARGET_NYM)
+            if nym not in result or result[nym][1] < seqNo:
+                raw = self._attrValue(data, '__raw', '__rawBlob')
+                result[nym] = [json.loads(raw)[attrName], seqNo]
+        return result
+
+    @staticmethod
+    def _first(value):
+        # Traversals in projections, like `in('AddsNym').NYM`, give lists
+        if isinstance(value, list):
+            return value[0] if value else None
+        return value
+
+    def getTxnsByType(self, txnType) -> List[dict]:
+        """
+        Records of the edges of all the txns of type `txnType`
+        """
+        edgeClass = getEdgeByTxnType(txnType)
+        if not edgeClass:
+            return []
+        result = self.queries.command("select from {}".format(edgeClass))
+        return [r.oRecordData for r in result or []]
 
     def getAddAttributeTxnIds(self, nym):
-        attrEdges = self.client.command("select {} from {} where {} = '{}'".
-                                        format(TXN_ID, Edges.AddsAttribute,
-                                               TARGET_NYM, nym)) or []
+        attrEdges = self.queries.command("select {} from {} where {} = :nym".
+                                         format(TXN_ID, Edges.AddsAttribute,
+                                                TARGET_NYM), nym=nym) or []
         return [edge.oRecordData[TXN_ID] for edge in attrEdges]
 
     def getTxn(self, identifier, reqId, **kwargs):
@@ -480,83 +824,71 @@ class IdentityGraph(OrientDbGraphStore):
                                 chain.from_iterable(
                                     Vertices._Properties.values()))
         txnId = Node.genTxnId(identifier, reqId)
-        cmd = "select {}, {} from {} where {} = '{}'". \
-            format(edgeProps, vertexProps, edgeClass, f.TXN_ID.nm, txnId)
+        cmd = "select {}, {} from {} where {} = :txnId". \
+            format(edgeProps, vertexProps, edgeClass, f.TXN_ID.nm)
 
-        result = self.client.command(cmd)
-        return None if not result \
-            else self.makeResult(typ, self.cleanKeyNames(result[0].oRecordData))
+        result = self.queries.command(cmd, txnId=txnId)
+        if not result:
+            return None
+        oRecordData = self.cleanKeyNames(result[0].oRecordData)
+        self._resolveBlobs(oRecordData)
+        return self.makeResult(typ, oRecordData)
 
-    def getResultForTxnIds(self, *txnIds, seqNo=None) -> dict:
-        txnIds = set(txnIds)
-        txnIdsStr = ",".join(["'{}'".format(tid) for tid in txnIds])
-
-        def getTxnsFromEdge(edgeClass):
-            # TODO: Need to do this to get around a bug in pyorient,
-            # https://github.com/mogui/pyorient/issues/207
-            edgeProps = ", ".join("@this.{} as __e_{}".format(name, name)
-                                  for name in txnEdgeProps)
-            vertexProps = ", ".join("in.{} as __v_{}".format(name, name)
-                                    for name in chain.from_iterable(
-                                        Vertices._Properties.values()))
-            cmd = "select {}, {} from {} where {} in [{}]".\
-                format(edgeProps, vertexProps, edgeClass, TXN_ID, txnIdsStr)
-            if seqNo:
-                cmd += " and {} > {}".format(F.seqNo.name, seqNo)
-            result = self.client.command(cmd)
-            if not result:
-                return {}
-            else:
-                out = {}
-                for r in result:
-                    if r.oRecordData:
-                        oRecordData = self.cleanKeyNames(r.oRecordData)
-                        out[oRecordData[F.seqNo.name]] = self.makeResult(
-                            NYM, oRecordData)
-                return out
-
-        result = reduce(lambda d1, d2: {**d1, **d2},
-                      map(getTxnsFromEdge, list(txnEdges.values())))
-
-        if len(txnIds) > len(result):
-            # Some transactions missing so look for transactions without edges
-            result.update(self.getTxnsWithoutEdge(*(txnIds.difference(
-                {r.get(TXN_ID) for r in result.values()})), seqNo=seqNo))
-        return result
+    def getResultForTxnIds(self, *txnIds, seqNo=None, limit: int=None) \
+            -> dict:
+        """
+        Results of the txns with `txnIds`, keyed by sequence number, read
+        with a single query over `TXN_INDEX` following each entry to the
+        edge, or for genesis and updated nyms the vertex, of the txn.
 
-    def getTxnsWithoutEdge(self, *txnIds, seqNo=None):
-        # For getting transactions for which have no edges in the graph as in
-        # case of genesis transactions, currently looking for only `NYM`
-        # transactions
-        txnIdsStr = ",".join(["'{}'".format(tid) for tid in txnIds])
-        cmd = "select from {} where {} in [{}]".format(Vertices.Nym, TXN_ID,
-                                                       txnIdsStr)
-        if seqNo:
-            cmd += " and {} > {}".format(F.seqNo.name, seqNo)
-        result = self.client.command(cmd)
-        if not result:
+        Only the txns after `seqNo` are read if given, and only the first
+        `limit` of them by sequence number if given.
+        """
+        txnIds = set(txnIds)
+        if not txnIds:
             return {}
-        else:
-            out = {}
-            for r in result:
-                if r.oRecordData:
-                    r.oRecordData[TARGET_NYM] = r.oRecordData.pop(NYM)
-                    out[r.oRecordData[F.seqNo.name]] = self.makeResult(
-                        NYM, r.oRecordData)
-            return out
+        # TODO: Need to do this to get around a bug in pyorient,
+        # https://github.com/mogui/pyorient/issues/207
+        edgeProps = ", ".join("{}.{} as __e_{}".format(TXN_REC, name, name)
+                              for name in txnEdgeProps)
+        vertexProps = ", ".join("{}.in.{} as __v_{}".format(TXN_REC, name,
+                                                            name)
+                                for name in chain.from_iterable(
+                                    Vertices._Properties.values()))
+        cmd = "select {} as __class, {}.{} as __nym, {}.{} as __role, {}, {} " \
+              "from {} where {} in :txnIds".\
+            format(TXN_REC_CLASS, TXN_REC, NYM, TXN_REC, ROLE, edgeProps,
+                   vertexProps, TXN_INDEX, TXN_ID)
+        if seqNo:
+            cmd += " and {}.{} > :seqNo".format(TXN_REC, F.seqNo.name)
+        if limit is not None:
+            cmd += " order by __e_{} limit :limit".format(F.seqNo.name)
+        out = {}
+        for r in self.queries.command(cmd, txnIds=txnIds,
+                                      seqNo=int(seqNo or 0),
+                                      limit=limit) or []:
+            if not r.oRecordData:
+                continue
+            oRecordData = self.cleanKeyNames(r.oRecordData)
+            nym = oRecordData.pop('__nym', None)
+            role = oRecordData.pop('__role', None)
+            if oRecordData.pop('__class', None) == Vertices.Nym:
+                oRecordData[TARGET_NYM] = nym
+                oRecordData[ROLE] = role
+            self._resolveBlobs(oRecordData)
+            out[oRecordData[F.seqNo.name]] = self.makeResult(NYM,
+                                                             oRecordData)
+        return out
 
     def _updateTxnIdEdgeWithTxn(self, txnId, edgeClass, txn, properties=None):
         properties = properties or txnEdgeProps
-        updates = ', '.join(["{}={}".format(prop, txn[prop])
-                             if isinstance(txn[prop], (int, float)) else
-                             "{}='{}'".format(prop, txn[prop])
-                             for prop in properties if (prop in txn and
-                                                        txn[prop] is not None)])
-        updateCmd = "update {} set {} where {}='{}'". \
-            format(edgeClass, updates, TXN_ID, txnId)
-        logger.debug("updating edge {} with command {}".format(edgeClass,
-                                                               updateCmd))
-        self.client.command(updateCmd)
+        updates = {prop: txn[prop] for prop in properties
+                   if prop in txn and txn[prop] is not None}
+        logger.debug("updating edge {} of txn {} with {}".
+                     format(edgeClass, txnId, updates))
+        self.queries.command("update {} set {} where {} = :edgeTxnId".
+                             format(edgeClass, assignments(updates), TXN_ID),
+                             edgeTxnId=txnId, **updates)
 
     def addNymTxnToGraph(self, txn):
         origin = txn.get(f.IDENTIFIER.nm)
@@ -635,12 +967,33 @@ class IdentityGraph(OrientDbGraphStore):
             fault(ex, "Error adding issuer key to orientdb")
         pass
 
+    def getLastSeqNo(self) -> Optional[int]:
+        """
+        Sequence number of the last ledger txn applied to the graph, `None`
+        for graphs created before it was recorded
+        """
+        return self._getMeta(LAST_SEQ_NO)
+
+    def setLastSeqNo(self, seqNo: int):
+        self._setMeta(LAST_SEQ_NO, seqNo)
+
+    def _getMeta(self, name) -> Optional[int]:
+        result = self.queries.command("select value from {} where {} = :name".
+                                      format(GRAPH_META, NAME), name=name)
+        return None if not result else int(result[0].oRecordData['value'])
+
+    def _setMeta(self, name, value: int):
+        self.queries.command("update {} set value = :value, {} = :name "
+                             "upsert where {} = :name".
+                             format(GRAPH_META, NAME, NAME),
+                             value=int(value), name=name)
+
     def countTxns(self):
         seqNos = set()
         for txnEdgeClass in (list(txnEdges.values())+[Vertices.Nym]):
             cmd = "select distinct({}) as seqNo from {}". \
                 format(F.seqNo.name, txnEdgeClass)
-            result = self.client.command(cmd)
+            result = self.queries.command(cmd)
             seqNos.update({r.oRecordData.get('seqNo') for r in result})
         return len(seqNos)
 
@@ -697,8 +1050,9 @@ class IdentityGraph(OrientDbGraphStore):
             result[ROLE] = oRecordData.get(ROLE)
 
         if txnType == ATTRIB:
+            # All attribute fields are selected, the unset ones being None
             for n in [RAW, ENC, HASH]:
-                if n in oRecordData:
+                if oRecordData.get(n) is not None:
                     result[n] = oRecordData[n]
                     break
 
@@ -0,0 +1,658 @@
+import json
+import os
+import sqlite3
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Optional, Iterable, List, Tuple, Dict
+
+from ledger.util import F
+from plenum.common.error import fault
+from plenum.common.log import getlogger
+from plenum.common.txn import TXN_TYPE, TYPE, NAME, VERSION, DATA, RAW, ENC, \
+    HASH, ORIGIN, VERKEY
+from plenum.common.types import f
+from plenum.common.util import error
+from plenum.server.node import Node
+
+from sovrin.common.txn import NYM, TXN_ID, TARGET_NYM, SPONSOR, STEWARD, \
+    ROLE, REF, TXN_TIME, ATTRIB, CLAIM_DEF, ATTR_NAMES, ISSUER_KEY, TGB, \
+    TRUSTEE
+from sovrin.common.util import rawAttrName
+from sovrin.server.auth import Authoriser
+
+logger = getlogger()
+
+
+class Record:
+    """
+    Minimal stand-in for the records returned by pyorient so that callers
+    reading `oRecordData` work with either graph backend.
+    """
+    __slots__ = ('oRecordData', )
+
+    def __init__(self, oRecordData: dict):
+        self.oRecordData = oRecordData
+
+    def __repr__(self):
+        return "{}({})".format(self.__class__.__name__, self.oRecordData)
+
+
+class Snapshot:
+    """
+    A database as of when the snapshot was taken, read through a connection
+    of its own until closed. The connection can be used by another thread
+    than the one taking the snapshot.
+    """
+
+    def __init__(self, dbPath: str, lastSeqNoKey: str):
+        self.db = sqlite3.connect(dbPath, isolation_level=None,
+                                  check_same_thread=False)
+        # All the reads of a transaction see the database as of its first
+        self.db.execute("begin")
+        row = self.db.execute("select value from meta where name = ?",
+                              (lastSeqNoKey, )).fetchone()
+        self.lastSeqNo = row[0] if row else None
+
+    def copyTo(self, path: str, pages: int=1024):
+        """
+        Copy the snapshot to a new database at `path`, `pages` pages at a
+        time
+        """
+        target = sqlite3.connect(path)
+        try:
+            self.db.backup(target, pages=pages)
+        finally:
+            target.close()
+
+    def close(self):
+        self.db.close()
+
+
+class IdentityGraphSqlite:
+    """
+    Embedded implementation of the `IdentityGraph` query and write surface.
+
+    Nyms live in their own table and every transaction (NYM, ATTRIB,
+    CLAIM_DEF, ISSUER_KEY) is a row of the `txn` table, with indexes on the
+    columns the node looks up by, so no query needs a server round trip.
+    """
+
+    dbFileName = "identity_graph.db"
+
+    schema = """
+        create table if not exists nym (
+            nym text primary key,
+            verkey text,
+            role text,
+            txnId text,
+            seqNo integer,
+            sponsor text
+        );
+        create index if not exists nym_txn_id on nym (txnId);
+        create index if not exists nym_seq_no on nym (seqNo);
+        create index if not exists nym_role on nym (role);
+
+        create table if not exists txn (
+            txnId text primary key,
+            txnType text not null,
+            seqNo integer,
+            txnTime integer,
+            reqId integer,
+            identifier text,
+            dest text,
+            role text,
+            verkey text,
+            ref text,
+            name text,
+            version text,
+            type text,
+            attrNames text,
+            raw text,
+            enc text,
+            hash text,
+            data text,
+            attrName text
+        );
+        create index if not exists txn_seq_no on txn (seqNo);
+        create index if not exists txn_dest on txn (dest, txnType);
+        create index if not exists txn_claim_def
+            on txn (identifier, name, version);
+        create index if not exists txn_issuer_key on txn (identifier, ref);
+
+        create table if not exists meta (
+            name text primary key,
+            value integer
+        );
+    """
+
+    txnColumns = (TXN_ID, 'txnType', 'seqNo', 'txnTime', 'reqId',
+                  'identifier', 'dest', 'role', 'verkey', 'ref', 'name',
+                  'version', 'type', 'attrNames', 'raw', 'enc', 'hash', 'data',
+                  'attrName')
+
+    lastSeqNoKey = "lastSeqNo"
+
+    def __init__(self, dataDir: str, dbFileName: str=None):
+        os.makedirs(dataDir, exist_ok=True)
+        self.dbPath = os.path.join(dataDir, dbFileName or self.dbFileName)
+        self.db = sqlite3.connect(self.dbPath, check_same_thread=False)
+        self.db.row_factory = sqlite3.Row
+        self.db.execute("pragma journal_mode=WAL")
+        self.db.execute("pragma synchronous=NORMAL")
+        self._inBatch = False
+        self.bootstrap()
+
+    def bootstrap(self):
+        with self._transaction():
+            self.db.executescript(self.schema)
+        self._indexAttrNames()
+
+    def _indexAttrNames(self):
+        """
+        Add the name of raw attributes to databases created before names were
+        kept for them
+        """
+        columns = [row['name'] for row in
+                   self._all("pragma table_info(txn)")]
+        with self._transaction():
+            if 'attrName' not in columns:
+                self.db.execute("alter table txn add column attrName text")
+                rows = self._all("select txnId, raw from txn where raw is not "
+                                 "null")
+                self.db.executemany("update txn set attrName = ? where "
+                                    "txnId = ?",
+                                    [(rawAttrName(row['raw']), row[TXN_ID])
+                                     for row in rows])
+            self.db.execute("create index if not exists txn_attr_name on "
+                            "txn (dest, attrName, seqNo)")
+
+    def close(self):
+        self.db.close()
+
+    def snapshot(self) -> 'Snapshot':
+        """
+        Snapshot of the database as of its last committed transaction, for
+        copying it while the graph is written to
+        """
+        return Snapshot(self.dbPath, self.lastSeqNoKey)
+
+    @contextmanager
+    def _transaction(self):
+        if self._inBatch:
+            yield
+        else:
+            with self.db:
+                yield
+
+    @contextmanager
+    def batch(self):
+        """
+        Commit all writes done in this context as a single transaction
+        """
+        with self.db:
+            self._inBatch = True
+            try:
+                yield
+            finally:
+                self._inBatch = False
+
+    def _one(self, sql, *params):
+        return self.db.execute(sql, params).fetchone()
+
+    def _all(self, sql, *params):
+        return self.db.execute(sql, params).fetchall()
+
+    def addNym(self, txnId, nym, verkey, role, frm=None, reference=None,
+               seqNo=None):
+        with self._transaction():
+            self._insertNym(txnId, nym, verkey, role, frm, seqNo)
+
+    def _insertNym(self, txnId, nym, verkey, role, frm, seqNo):
+        self.db.execute("insert into nym (nym, verkey, role, txnId, seqNo, "
+                        "sponsor) values (?, ?, ?, ?, ?, ?)",
+                        (nym, verkey, role, txnId, seqNo, frm))
+
+    def updateNym(self, txnId, nym, verkey, seqNo, role):
+        with self._transaction():
+            self._updateNym(txnId, nym, verkey, seqNo, role)
+
+    def _updateNym(self, txnId, nym, verkey, seqNo, role):
+        if verkey is not None:
+            self.db.execute("update nym set txnId = ?, seqNo = ?, role = ?, "
+                            "verkey = ? where nym = ?",
+                            (txnId, seqNo, role, verkey, nym))
+        else:
+            self.db.execute("update nym set txnId = ?, seqNo = ?, role = ? "
+                            "where nym = ?", (txnId, seqNo, role, nym))
+
+    @staticmethod
+    def _txnRow(txn, **columns) -> dict:
+        row = {
+            TXN_ID: txn[TXN_ID],
+            'txnType': txn[TXN_TYPE],
+            'seqNo': txn.get(F.seqNo.name),
+            'txnTime': txn.get(TXN_TIME),
+            'reqId': txn.get(f.REQ_ID.nm),
+            'identifier': txn.get(f.IDENTIFIER.nm),
+            'dest': txn.get(TARGET_NYM),
+        }
+        row.update(columns)
+        return row
+
+    @staticmethod
+    def graphColumns(txn) -> dict:
+        """
+        Columns of the `txn` table specific to the type of a ledger txn
+        """
+        typ = txn[TXN_TYPE]
+        if typ == NYM:
+            return dict(role=txn.get(ROLE), verkey=txn.get(VERKEY),
+                        ref=txn.get(REF))
+        if typ == ATTRIB:
+            raw = txn.get(RAW)
+            return dict(raw=raw, enc=txn.get(ENC), hash=txn.get(HASH),
+                        attrName=rawAttrName(raw) if raw else None)
+        if typ == CLAIM_DEF:
+            data = txn.get(DATA)
+            return dict(name=data.get(NAME), version=data.get(VERSION),
+                        type=data.get(TYPE), attrNames=data.get(ATTR_NAMES))
+        if typ == ISSUER_KEY:
+            return dict(ref=str(txn.get(REF)), data=json.dumps(txn.get(DATA)))
+        return {}
+
+    def _insertTxn(self, txn, **columns):
+        row = self._txnRow(txn, **columns)
+        names = ", ".join(row.keys())
+        marks = ", ".join("?" * len(row))
+        # A txn that is already in the graph is being replayed, ignore it
+        self.db.execute("insert or ignore into txn ({}) values ({})".
+                        format(names, marks), tuple(row.values()))
+
+    def addAttribute(self, frm, txnId, raw=None, enc=None, hash=None, to=None):
+        # Only one of `raw`, `enc`, `hash` should be provided so 2 should be
+        # `None`
+        if (raw, enc, hash).count(None) != 2:
+            error("One and only one of raw, enc and hash should be provided")
+        txn = {
+            TXN_ID: txnId,
+            TXN_TYPE: ATTRIB,
+            f.IDENTIFIER.nm: frm,
+            TARGET_NYM: to
+        }
+        with self._transaction():
+            self._insertTxn(txn, raw=raw, enc=enc, hash=hash,
+                            attrName=rawAttrName(raw) if raw else None)
+
+    def addClaimDef(self, frm, txnId, name, version, attrNames,
+                    typ: Optional[str]=None):
+        txn = {
+            TXN_ID: txnId,
+            TXN_TYPE: CLAIM_DEF,
+            f.IDENTIFIER.nm: frm
+        }
+        with self._transaction():
+            self._insertTxn(txn, name=name, version=version, type=typ,
+                            attrNames=attrNames)
+
+    def addIssuerKey(self, frm, txnId, data, reference):
+        txn = {
+            TXN_ID: txnId,
+            TXN_TYPE: ISSUER_KEY,
+            f.IDENTIFIER.nm: frm
+        }
+        with self._transaction():
+            self._insertTxn(txn, ref=str(reference), data=json.dumps(data))
+
+    def getRawAttrs(self, frm, *attrNames):
+        if attrNames:
+            # With max() sqlite returns the rest of the row having the max
+            rows = self._all("select raw, max(seqNo) as seqNo from txn where "
+                             "dest = ? and attrName in ({}) and txnType = ? "
+                             "group by attrName".
+                             format(", ".join("?" * len(attrNames))),
+                             frm, *attrNames, ATTRIB)
+        else:
+            rows = self._all("select raw, seqNo from txn where dest = ? and "
+                             "txnType = ? and raw is not null order by seqNo",
+                             frm, ATTRIB)
+        result = {}
+        for row in rows:
+            key, value = json.loads(row['raw']).popitem()
+            if len(attrNames) == 0 or key in attrNames:
+                result[key] = [value, row['seqNo']]
+        return result
+
+    def getClaimDef(self, frm, name, version):
+        row = self._one("select type, attrNames, seqNo from txn where "
+                        "identifier = ? and name = ? and version = ? and "
+                        "txnType = ? order by seqNo desc limit 1",
+                        frm, name, version, CLAIM_DEF)
+        if row:
+            return {
+                NAME: name,
+                VERSION: version,
+                TYPE: row['type'],
+                F.seqNo.name: row['seqNo'],
+                ATTR_NAMES: row['attrNames'],
+                ORIGIN: frm,
+            }
+        return None
+
+    def getIssuerKeys(self, frm, ref):
+        row = self._one("select data, seqNo from txn where identifier = ? "
+                        "and ref = ? and txnType = ? order by seqNo desc "
+                        "limit 1", frm, str(ref), ISSUER_KEY)
+        if row:
+            return {
+                ORIGIN: frm,
+                REF: ref,
+                F.seqNo.name: row['seqNo'],
+                DATA: json.loads(row['data'])
+            }
+        return None
+
+    def getNym(self, nym, role=None):
+        """
+        Get a nym, if role is provided then get nym with that role
+        :param nym:
+        :param role:
+        :return:
+        """
+        row = self._one("select nym, verkey, role, txnId, seqNo from nym "
+                        "where nym = ?", nym)
+        if not row or (role and row[ROLE] != role):
+            return None
+        # Same property names as the `Nym` vertex of the OrientDB graph
+        data = {NYM: row['nym']}
+        data.update({k: row[k] for k in (VERKEY, ROLE, TXN_ID, F.seqNo.name)
+                     if row[k] is not None})
+        return Record(data)
+
+    def getTrustee(self, nym):
+        return self.getNym(nym, TRUSTEE)
+
+    def getTGB(self, nym):
+        return self.getNym(nym, TGB)
+
+    def getSteward(self, nym):
+        return self.getNym(nym, STEWARD)
+
+    def getSponsor(self, nym):
+        return self.getNym(nym, SPONSOR)
+
+    def hasTrustee(self, nym):
+        return bool(self.getTrustee(nym))
+
+    def hasTGB(self, nym):
+        return bool(self.getTGB(nym))
+
+    def hasSteward(self, nym):
+        return bool(self.getSteward(nym))
+
+    def hasSponsor(self, nym):
+        return bool(self.getSponsor(nym))
+
+    def hasNym(self, nym):
+        return bool(self.getNym(nym))
+
+    def getRole(self, nym):
+        nymV = self.getNym(nym)
+        if not nymV:
+            raise ValueError("Nym {} does not exist".format(nym))
+        else:
+            return nymV.oRecordData.get(ROLE)
+
+    def getSponsorFor(self, nym):
+        row = self._one("select sponsor from nym where nym = ?", nym)
+        return row['sponsor'] if row else None
+
+    def getNymStates(self, *nyms) -> Dict[str, Optional[dict]]:
+        """
+        Role, verkey, sponsor and sequence number of each of `nyms` present
+        in the graph, with a single query
+        """
+        nyms = set(nyms)
+        result = dict.fromkeys(nyms)
+        if not nyms:
+            return result
+        rows = self._all("select nym, role, verkey, sponsor, seqNo from nym "
+                         "where nym in ({})".
+                         format(", ".join("?" * len(nyms))), *nyms)
+        for row in rows:
+            result[row['nym']] = {k: row[k] for k in
+                                  (ROLE, VERKEY, 'sponsor', F.seqNo.name)}
+        return result
+
+    def countStewards(self):
+        return self._one("select count(*) from nym where role = ?",
+                         STEWARD)[0]
+
+    def getAddNymTxn(self, nym):
+        row = self._one("select txn.txnId, txn.role, txn.identifier, "
+                        "nym.verkey from txn join nym on nym.nym = txn.dest "
+                        "where txn.dest = ? and txn.txnType = ? "
+                        "order by txn.seqNo limit 1", nym, NYM)
+        if not row:
+            return None
+        return self._addNymTxn(nym, row)
+
+    @staticmethod
+    def _addNymTxn(nym, row):
+        result = {
+            TXN_ID: row[TXN_ID],
+            TARGET_NYM: nym,
+            ROLE: row[ROLE]
+        }
+        # Genesis nyms are not added by anyone
+        if row['identifier'] is not None:
+            result[f.IDENTIFIER.nm] = row['identifier']
+        if row[VERKEY] is not None:
+            result[VERKEY] = row[VERKEY]
+        return result
+
+    def getAddNymTxns(self, *nyms) -> Dict[str, Optional[dict]]:
+        """
+        Like `getAddNymTxn` for several nyms with a single query
+        """
+        nyms = set(nyms)
+        result = dict.fromkeys(nyms)
+        if not nyms:
+            return result
+        rows = self._all("select txn.txnId, txn.role, txn.identifier, "
+                         "txn.dest, txn.seqNo, nym.verkey from txn join nym "
+                         "on nym.nym = txn.dest where txn.dest in ({}) and "
+                         "txn.txnType = ? order by txn.seqNo".
+                         format(", ".join("?" * len(nyms))), *nyms, NYM)
+        for row in rows:
+            # The first NYM txn of a nym is the one adding it
+            if result[row['dest']] is None:
+                result[row['dest']] = self._addNymTxn(row['dest'], row)
+        return result
+
+    def getRawAttrsForNyms(self, attrName, *nyms) -> Dict[str, list]:
+        """
+        Latest value and sequence number of raw attribute `attrName` for
+        each of `nyms` that has it, with a single query
+        """
+        nyms = set(nyms)
+        if not nyms:
+            return {}
+        rows = self._all("select dest, raw, max(seqNo) as seqNo from txn "
+                         "where dest in ({}) and attrName = ? and txnType = ? "
+                         "group by dest".format(", ".join("?" * len(nyms))),
+                         *nyms, attrName, ATTRIB)
+        result = {}
+        for row in rows:
+            result[row['dest']] = [json.loads(row['raw'])[attrName],
+                                   row['seqNo']]
+        return result
+
+    def getAddAttributeTxnIds(self, nym):
+        return [row[TXN_ID] for row in
+                self._all("select txnId from txn where dest = ? and "
+                          "txnType = ? order by seqNo", nym, ATTRIB)]
+
+    def getTxn(self, identifier, reqId, **kwargs):
+        typ = kwargs[TXN_TYPE]
+        txnId = Node.genTxnId(identifier, reqId)
+        row = self._one("select * from txn where txnId = ? and txnType = ?",
+                        txnId, typ)
+        return None if not row else self.makeResult(row)
+
+    def getResultForTxnIds(self, *txnIds, seqNo=None, limit: int=None) \
+            -> dict:
+        if not txnIds:
+            return {}
+        sql = "select * from txn where txnId in ({})".\
+            format(", ".join("?" * len(set(txnIds))))
+        params = list(set(txnIds))
+        if seqNo:
+            sql += " and seqNo > ?"
+            params.append(int(seqNo))
+        if limit is not None:
+            sql += " order by seqNo limit ?"
+            params.append(limit)
+        return {row['seqNo']: self.makeResult(row)
+                for row in self._all(sql, *params)}
+
+    def addNymTxnToGraph(self, txn):
+        origin = txn.get(f.IDENTIFIER.nm)
+        role = txn.get(ROLE)
+        if not Authoriser.isValidRole(role):
+            raise ValueError("Unknown role {} for nym, cannot add nym to graph"
+                             .format(role))
+        nym = txn[TARGET_NYM]
+        verkey = txn.get(VERKEY)
+        txnId = txn[TXN_ID]
+        seqNo = txn.get(F.seqNo.name)
+        try:
+            with self._transaction():
+                if self._one("select 1 from nym where nym = ?", nym):
+                    self._updateNym(txnId, nym, verkey, seqNo, role)
+                else:
+                    self._insertNym(txnId, nym, verkey, role, origin, seqNo)
+                self._insertTxn(txn, **self.graphColumns(txn))
+        except sqlite3.Error as ex:
+            fault(ex, "An exception was raised while adding "
+                      "nym {}: {}".format(nym, ex))
+
+    def addAttribTxnToGraph(self, txn):
+        try:
+            with self._transaction():
+                self._insertTxn(txn, **self.graphColumns(txn))
+        except sqlite3.Error as ex:
+            fault(ex, "An exception was raised while adding attribute: {}".
+                  format(ex))
+
+    def addClaimDefTxnToGraph(self, txn):
+        try:
+            with self._transaction():
+                self._insertTxn(txn, **self.graphColumns(txn))
+        except Exception as ex:
+            fault(ex, "Error adding cred def to sqlite")
+
+    def addIssuerKeyTxnToGraph(self, txn):
+        try:
+            with self._transaction():
+                self._insertTxn(txn, **self.graphColumns(txn))
+        except Exception as ex:
+            fault(ex, "Error adding issuer key to sqlite")
+
+    @classmethod
+    def bulkRows(cls, txns: Iterable[dict]) -> Tuple[List, List, List]:
+        """
+        Rows to add a sequence of ledger txns with `bulkInsert`: new nyms,
+        nym updates and txns. Does not touch the database so it can be run
+        in a worker process.
+        """
+        added = OrderedDict()
+        updated = OrderedDict()
+        txnRows = []
+        for txn in txns:
+            if txn[TXN_TYPE] == NYM:
+                role = txn.get(ROLE)
+                if not Authoriser.isValidRole(role):
+                    raise ValueError("Unknown role {} for nym, cannot add nym "
+                                     "to graph".format(role))
+                nym = txn[TARGET_NYM]
+                verkey = txn.get(VERKEY)
+                txnId = txn[TXN_ID]
+                seqNo = txn.get(F.seqNo.name)
+                added.setdefault(nym, (nym, verkey, role, txnId, seqNo,
+                                       txn.get(f.IDENTIFIER.nm)))
+                if verkey is None and nym in updated:
+                    verkey = updated[nym][3]
+                updated[nym] = (txnId, seqNo, role, verkey, nym)
+            row = cls._txnRow(txn, **cls.graphColumns(txn))
+            txnRows.append(tuple(row.get(c) for c in cls.txnColumns))
+        return list(added.values()), list(updated.values()), txnRows
+
+    def bulkInsert(self, nymRows, nymUpdateRows, txnRows):
+        """
+        Add rows made by `bulkRows`, the updates of a nym are applied after
+        all nyms are added
+        """
+        with self._transaction():
+            # Nyms already in the graph are only updated
+            self.db.executemany("insert or ignore into nym (nym, verkey, "
+                                "role, txnId, seqNo, sponsor) values "
+                                "(?, ?, ?, ?, ?, ?)", nymRows)
+            self.db.executemany("update nym set txnId = ?, seqNo = ?, "
+                                "role = ?, verkey = coalesce(?, verkey) "
+                                "where nym = ?", nymUpdateRows)
+            self.db.executemany("insert or ignore into txn ({}) values ({})".
+                                format(", ".join(self.txnColumns),
+                                       ", ".join("?" * len(self.txnColumns))),
+                                txnRows)
+
+    def getLastSeqNo(self) -> Optional[int]:
+        """
+        Sequence number of the last ledger txn applied to the graph, `None`
+        if no txn has been applied
+        """
+        row = self._one("select value from meta where name = ?",
+                        self.lastSeqNoKey)
+        return None if not row else row['value']
+
+    def setLastSeqNo(self, seqNo: int):
+        with self._transaction():
+            # Never move the watermark back
+            self.db.execute("insert or replace into meta (name, value) "
+                            "values (?, max(?, coalesce((select value from "
+                            "meta where name = ?), 0)))",
+                            (self.lastSeqNoKey, int(seqNo),
+                             self.lastSeqNoKey))
+
+    def countTxns(self):
+        return self._one("select count(distinct seqNo) from txn")[0]
+
+    @staticmethod
+    def makeResult(row):
+        result = {
+            F.seqNo.name: row['seqNo'],
+            TXN_TYPE: row['txnType'],
+            TXN_ID: row[TXN_ID],
+            f.REQ_ID.nm: row['reqId'],
+            f.IDENTIFIER.nm: row['identifier'],
+        }
+        if row['txnTime'] is not None:
+            result[TXN_TIME] = row['txnTime']
+
+        if row['dest'] is not None:
+            result[TARGET_NYM] = row['dest']
+
+        txnType = row['txnType']
+        if txnType == NYM:
+            result[ROLE] = row['role']
+
+        if txnType == ATTRIB:
+            for n in [RAW, ENC, HASH]:
+                if row[n] is not None:
+                    result[n] = row[n]
+                    break
+
+        if txnType == CLAIM_DEF:
+            result[DATA] = {n: row[n] for n in (TYPE, NAME, VERSION)
+                            if row[n] is not None}
+
+        return result
@@ -0,0 +1,135 @@
+import base64
+import threading
+from typing import Dict, Iterable, List
+
+from ledger.tree_hasher import TreeHasher
+from ledger.util import F
+
+from sovrin.common.cache import LRUCache
+
+
+def contiguousRuns(seqNos: Iterable[int]) -> List[List[int]]:
+    """
+    The distinct `seqNos` in ascending order, split where they are not
+    consecutive
+    """
+    runs = []
+    for seqNo in sorted(set(seqNos)):
+        if runs and runs[-1][-1] == seqNo - 1:
+            runs[-1].append(seqNo)
+        else:
+            runs.append([seqNo])
+    return runs
+
+
+class MerkleProofs:
+    """
+    Merkle info (root hash and audit path) of ledger txns, as given by the
+    ledger's `merkleInfo`: the proof of the txn with sequence number `seqNo`
+    is against the tree of the first `seqNo` txns. Proofs are kept in an
+    LRU cache keyed by (seqNo, tree size).
+
+    For a run of consecutive sequence numbers the proofs are computed in one
+    pass over their leaves. The audit path of the last leaf of a tree are
+    the roots of the full subtrees of the tree without that leaf, so going
+    through the leaves in order only needs those roots to be kept, the way
+    a compact merkle tree does. Storages other than a ledger with a compact
+    merkle tree get their proofs from `merkleInfo` one at a time.
+    """
+
+    def __init__(self, ledger, cacheSize: int):
+        self.ledger = ledger
+        self._cache = LRUCache(cacheSize)
+        self._lock = threading.Lock()
+        self.hasher = TreeHasher()
+
+    @property
+    def canBatch(self) -> bool:
+        return hasattr(getattr(self.ledger, "tree", None), "merkle_tree_hash")
+
+    def hashToStr(self, h: bytes) -> str:
+        hashToStr = getattr(self.ledger, "hashToStr", None)
+        return hashToStr(h) if hashToStr else base64.b64encode(h).decode()
+
+    def add(self, seqNo: int, merkleInfo: dict):
+        """
+        Cache the merkle info given when the txn was appended to the ledger
+        """
+        seqNo = int(seqNo)
+        with self._lock:
+            self._cache.put((seqNo, seqNo), {
+                F.rootHash.name: merkleInfo[F.rootHash.name],
+                F.auditPath.name: merkleInfo[F.auditPath.name]
+            })
+
+    def merkleInfo(self, seqNo) -> dict:
+        return self.merkleInfos([seqNo])[int(seqNo)]
+
+    def merkleInfos(self, seqNos: Iterable) -> Dict[int, dict]:
+        """
+        Merkle info for each of `seqNos`, keyed by the sequence numbers as
+        ints
+        """
+        result = {}
+        missing = []
+        with self._lock:
+            for seqNo in map(int, seqNos):
+                info = self._cache.get((seqNo, seqNo))
+                if info is None:
+                    missing.append(seqNo)
+                else:
+                    result[seqNo] = info
+        if not missing:
+            return result
+        if self.canBatch:
+            for run in contiguousRuns(missing):
+                result.update(self._computeRun(run[0], run[-1]))
+        else:
+            for seqNo in missing:
+                info = self.ledger.merkleInfo(seqNo)
+                result[seqNo] = {
+                    F.rootHash.name: info[F.rootHash.name],
+                    F.auditPath.name: info[F.auditPath.name]
+                }
+        with self._lock:
+            for seqNo in missing:
+                self._cache.put((seqNo, seqNo), result[seqNo])
+        return result
+
+    def _computeRun(self, frm: int, to: int) -> Dict[int, dict]:
+        tree = self.ledger.tree
+        # Roots of the full subtrees of the first `frm - 1` leaves, largest
+        # first, and their sizes
+        hashes = []
+        sizes = []
+        start = 0
+        for bit in reversed(range((frm - 1).bit_length())):
+            size = 1 << bit
+            if (frm - 1) & size:
+                hashes.append(tree.merkle_tree_hash(start, start + size))
+                sizes.append(size)
+                start += size
+        result = {}
+        for seqNo in range(frm, to + 1):
+            leaf = tree.merkle_tree_hash(seqNo - 1, seqNo)
+            root = leaf
+            for h in reversed(hashes):
+                root = self.hasher.hash_children(h, root)
+            result[seqNo] = {
+                F.rootHash.name: self.hashToStr(root),
+                F.auditPath.name: [self.hashToStr(h) for h in
+                                   reversed(hashes)]
+            }
+            # Add the leaf, merging the subtrees of equal size
+            h, size = leaf, 1
+            while sizes and sizes[-1] == size:
+                h = self.hasher.hash_children(hashes.pop(), h)
+                size += sizes.pop()
+            hashes.append(h)
+            sizes.append(size)
+        return result
+
+    @property
+    def stats(self) -> dict:
+        with self._lock:
+            return self._cache.stats
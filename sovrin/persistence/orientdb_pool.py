@@ -0,0 +1,195 @@
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterable
+
+import pyorient
+from plenum.common.log import getlogger
+
+from sovrin.common.metrics import LatencyHistogram
+
+logger = getlogger()
+
+# Errors after which a connection is not reused
+CONNECTION_ERRORS = (pyorient.PyOrientConnectionException, OSError)
+
+# Statements that only read, and so can be run again when the connection
+# fails while running them
+READ_STATEMENTS = ("select", "traverse")
+
+
+def isRead(cmd: str) -> bool:
+    return cmd.lstrip()[:8].lower().startswith(READ_STATEMENTS)
+
+
+def orientDbConnector(user: str, password: str, dbName: str,
+                      host: str="localhost", port: int=2424) -> \
+        Callable[[], pyorient.OrientDB]:
+    """
+    Function opening a new connection to the database `dbName`, which should
+    exist
+    """
+    def connect():
+        client = pyorient.OrientDB(host=host, port=port)
+        client.connect(user, password)
+        client.db_open(dbName, user, password)
+        return client
+    return connect
+
+
+class OrientDbConnectionPool:
+    """
+    Up to `size` OrientDB connections, opened by `connect` as needed, each
+    used by one thread at a time. A thread wanting a connection while all of
+    them are in use waits up to `acquireTimeout` seconds for one.
+
+    A connection raising one of `CONNECTION_ERRORS` is closed and replaced.
+    A read is then run once more on the new connection, but not a write, as
+    it may have been applied before the connection failed.
+    """
+
+    def __init__(self, connect: Callable[[], pyorient.OrientDB], size: int,
+                 acquireTimeout: float=30,
+                 clients: Iterable[pyorient.OrientDB]=()):
+        assert size > 0, "size should be positive, got {}".format(size)
+        self.connect = connect
+        self.size = size
+        self.acquireTimeout = acquireTimeout
+        self._idle = queue.LifoQueue()
+        for client in clients:
+            self._idle.put(client)
+        self._lock = threading.Lock()
+        self.opened = self._idle.qsize()
+        self.inUse = 0
+        self.acquired = 0
+        self.waits = 0
+        self.reconnects = 0
+        self.failures = 0
+        self.failedWrites = 0
+        self.acquireLatency = LatencyHistogram()
+
+    def _acquire(self) -> pyorient.OrientDB:
+        start = time.perf_counter()
+        with self._lock:
+            self.acquired += 1
+            self.inUse += 1
+            openNew = self._idle.empty() and self.opened < self.size
+            if openNew:
+                self.opened += 1
+        try:
+            if openNew:
+                try:
+                    return self.connect()
+                except Exception:
+                    with self._lock:
+                        self.opened -= 1
+                        self.failures += 1
+                    raise
+            try:
+                return self._idle.get_nowait()
+            except queue.Empty:
+                with self._lock:
+                    self.waits += 1
+            try:
+                return self._idle.get(timeout=self.acquireTimeout)
+            except queue.Empty:
+                raise TimeoutError("No OrientDB connection free after {} "
+                                   "seconds".format(self.acquireTimeout))
+        except Exception:
+            with self._lock:
+                self.inUse -= 1
+            raise
+        finally:
+            with self._lock:
+                self.acquireLatency.observe(time.perf_counter() - start)
+
+    def _release(self, client, broken=False):
+        with self._lock:
+            self.inUse -= 1
+            if broken:
+                self.opened -= 1
+        if broken:
+            self._close(client)
+        else:
+            self._idle.put(client)
+
+    @contextmanager
+    def connection(self):
+        client = self._acquire()
+        broken = False
+        try:
+            yield client
+        except CONNECTION_ERRORS:
+            broken = True
+            raise
+        finally:
+            self._release(client, broken)
+
+    def command(self, cmd: str, retry: bool=None):
+        """
+        Run `cmd` on a connection of the pool, once more on a new one if the
+        connection fails and `retry` is set, which by default it is for reads
+        only
+        """
+        try:
+            with self.connection() as client:
+                return client.command(cmd)
+        except CONNECTION_ERRORS as ex:
+            if not (isRead(cmd) if retry is None else retry):
+                with self._lock:
+                    self.failedWrites += 1
+                raise
+            with self._lock:
+                self.reconnects += 1
+            logger.warning("{} reconnecting after {}".format(self, ex))
+            with self.connection() as client:
+                return client.command(cmd)
+
+    @staticmethod
+    def _close(client):
+        try:
+            client.db_close()
+        except Exception as ex:
+            logger.debug("Error closing OrientDB connection: {}".format(ex))
+
+    def close(self):
+        while True:
+            try:
+                client = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            with self._lock:
+                self.opened -= 1
+            self._close(client)
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "size": self.size,
+            "opened": self.opened,
+            "inUse": self.inUse,
+            "idle": self._idle.qsize(),
+            "acquired": self.acquired,
+            "waits": self.waits,
+            "reconnects": self.reconnects,
+            "failures": self.failures,
+            "failedWrites": self.failedWrites,
+            "acquireLatency": self.acquireLatency.stats
+        }
+
+    def __repr__(self):
+        return self.__class__.__name__
+
+
+def getOrientDbPool(store, dbName: str, config) -> OrientDbConnectionPool:
+    """
+    Pool of connections to the database of `store`, starting with the
+    connection of `store`
+    """
+    orientDb = config.OrientDB
+    connect = orientDbConnector(orientDb["user"], orientDb["password"], dbName,
+                                orientDb.get("host", "localhost"),
+                                orientDb.get("port", 2424))
+    return OrientDbConnectionPool(connect, config.OrientDbPoolSize,
+                                  clients=[store.client])
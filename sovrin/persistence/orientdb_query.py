@@ -0,0 +1,138 @@
+import datetime
+import re
+import threading
+import time
+from functools import lru_cache
+from typing import Dict, Iterable
+
+from plenum.common.log import getlogger
+
+from sovrin.common.metrics import LatencyHistogram
+
+logger = getlogger()
+
+# `:name` placeholders, not preceded by another colon or a word character
+# so that rids like `#12:3` are left alone
+PLACEHOLDER = re.compile(r"(?<![\w:]):([A-Za-z_]\w*)")
+
+
+class Rid(str):
+    """
+    Record id, like `#12:3`, which is bound as a link rather than a string
+    """
+
+
+def literal(value) -> str:
+    """
+    OrientDB SQL literal for `value`
+    """
+    if value is None:
+        return "null"
+    if isinstance(value, Rid):
+        if not re.fullmatch(r"#\d+:\d+", value):
+            raise ValueError("{} is not a record id".format(value))
+        return value
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (int, float)):
+        return repr(value)
+    if isinstance(value, datetime.datetime):
+        return literal(value.strftime("%Y-%m-%d %H:%M:%S"))
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return "[{}]".format(", ".join(literal(v) for v in value))
+    if isinstance(value, dict):
+        return "{{{}}}".format(", ".join("{}: {}".format(literal(str(k)),
+                                                         literal(v))
+                                         for k, v in value.items()))
+    return "'{}'".format(str(value).replace("\\", "\\\\").
+                         replace("'", "\\'").replace("\n", "\\n").
+                         replace("\r", "\\r"))
+
+
+class Query:
+    """
+    A statement template with `:name` placeholders for values, split once
+    into its text and placeholders so that statements are built by joining
+    the text with the literals of the bound values.
+
+    Class and property names are not values and are put in the template
+    when it is written.
+    """
+
+    def __init__(self, template: str):
+        self.template = template
+        parts = PLACEHOLDER.split(template)
+        self._text = parts[0::2]
+        self.params = tuple(parts[1::2])
+
+    def bind(self, **params) -> str:
+        missing = set(self.params).difference(params)
+        if missing:
+            raise KeyError("No values for {} in {}".
+                           format(", ".join(sorted(missing)), self.template))
+        out = [self._text[0]]
+        for name, text in zip(self.params, self._text[1:]):
+            out.append(literal(params[name]))
+            out.append(text)
+        return "".join(out)
+
+    def __repr__(self):
+        return self.template
+
+
+@lru_cache(maxsize=1024)
+def prepare(template: str) -> Query:
+    """
+    The `Query` for `template`, split only the first time it is used
+    """
+    return Query(template)
+
+
+def assignments(names: Iterable[str], joiner: str=", ") -> str:
+    """
+    `name = :name` for each of `names`, for the `set` and `where` clauses of
+    templates
+    """
+    return joiner.join("{0} = :{0}".format(name) for name in names)
+
+
+class QueryRunner:
+    """
+    Runs statements built from templates with the values bound to them,
+    keeping a latency histogram per template.
+
+    Statements run on `client`, or if given on a connection of `pool` (like
+    an `OrientDbConnectionPool`) so that several threads can run them at
+    once.
+    """
+
+    def __init__(self, client, pool=None):
+        self.client = client
+        self.pool = pool
+        self.latencies = {}  # type: Dict[str, LatencyHistogram]
+        self._lock = threading.Lock()
+
+    def command(self, template: str, **params):
+        query = prepare(template)
+        cmd = query.bind(**params)
+        start = time.perf_counter()
+        try:
+            return (self.pool or self.client).command(cmd)
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                histogram = self.latencies.get(query.template)
+                if histogram is None:
+                    histogram = self.latencies[query.template] = \
+                        LatencyHistogram()
+                histogram.observe(elapsed)
+
+    @property
+    def stats(self) -> Dict[str, dict]:
+        """
+        Latency stats per template, the ones taking most time in total first
+        """
+        with self._lock:
+            return {template: histogram.stats for template, histogram in
+                    sorted(self.latencies.items(),
+                           key=lambda item: item[1].total, reverse=True)}
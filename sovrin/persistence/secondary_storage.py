@@ -3,14 +3,32 @@ from plenum.common.txn import TXN_TYPE
 from plenum.persistence.secondary_storage import SecondaryStorage as PlenumSS
 
 from sovrin.common.txn import NYM
+from sovrin.persistence.merkle_proofs import MerkleProofs
 
 
 class SecondaryStorage(PlenumSS):
 
+    def __init__(self, txnStore, primaryStorage=None,
+                 merkleProofs: MerkleProofs=None):
+        super().__init__(txnStore, primaryStorage)
+        # Merkle info of txns is looked up through `merkleProofs` if given
+        self.merkleProofs = merkleProofs
+
+    def merkleInfos(self, seqNos) -> dict:
+        """
+        Merkle info for each of `seqNos`, keyed by the sequence numbers as
+        given
+        """
+        if self.merkleProofs:
+            infos = self.merkleProofs.merkleInfos(seqNos)
+            return {s: infos[int(s)] for s in seqNos}
+        return {s: self._primaryStorage.merkleInfo(s) for s in seqNos}
+
     def getReply(self, identifier, reqId, **kwargs):
         txn = self._txnStore.getTxn(identifier, reqId, **kwargs)
         if txn:
-            txn.update(self._primaryStorage.merkleInfo(txn.get(F.seqNo.name)))
+            seqNo = txn.get(F.seqNo.name)
+            txn.update(self.merkleInfos([seqNo])[seqNo])
             return txn
 
     def getReplies(self, *txnIds, seqNo=None):
@@ -18,10 +36,27 @@ class SecondaryStorage(PlenumSS):
         if not txnData:
             return txnData
         else:
-            for seqNo in txnData:
-                txnData[seqNo].update(self._primaryStorage.merkleInfo(seqNo))
+            for seqNo, info in self.merkleInfos(list(txnData)).items():
+                txnData[seqNo].update(info)
             return txnData
 
+    def getRepliesPage(self, *txnIds, seqNo=None, pageSize: int):
+        """
+        Like `getReplies` but only for the `pageSize` txns with the lowest
+        sequence numbers, the others are not read past the first of them
+
+        :return: the replies and whether there are more txns after them
+        """
+        # One more txn than the page tells if there are more
+        txnData = self._txnStore.getResultForTxnIds(*txnIds, seqNo=seqNo,
+                                                    limit=pageSize + 1)
+        seqNos = sorted(txnData, key=int)
+        page = {}
+        for s, info in self.merkleInfos(seqNos[:pageSize]).items():
+            page[s] = txnData[s]
+            page[s].update(info)
+        return page, len(seqNos) > pageSize
+
     def getAddNymTxn(self, nym):
         return self._txnStore.getAddNymTxn(nym)
 
@@ -0,0 +1,129 @@
+import time
+from collections import defaultdict
+from typing import Callable, Dict, Optional, Tuple
+
+from sovrin.common.cache import LRUCache
+
+# Requests per second and burst of a token bucket
+Limit = Tuple[float, float]
+
+
+class TokenBucket:
+    """
+    Bucket of up to `burst` tokens, refilled at `rate` tokens per second,
+    one of which is taken for each request admitted
+    """
+
+    def __init__(self, rate: float, burst: float, now: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = now
+
+    def refill(self, now: float):
+        self.tokens = min(self.burst,
+                          self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def setLimit(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = min(self.tokens, burst)
+
+
+class WriteAdmission:
+    """
+    Admission of the write requests of clients by token buckets, one per
+    identifier and one for all the identifiers of each role, limited by the
+    role of the identifier as given by `limits`:
+
+        {role: {"identifier": (rate, burst), "role": (rate, burst)}}
+
+    Identifiers of a role not in `limits` are not limited. The role of an
+    identifier is only looked up when it has no bucket yet, so rejecting the
+    requests of an identifier over its limit reads nothing but its bucket.
+    """
+
+    def __init__(self, limits: Dict[Optional[str], Dict[str, Limit]],
+                 maxIdentifiers: int,
+                 clock: Callable[[], float]=time.perf_counter):
+        self.limits = limits
+        self.clock = clock
+        # identifier -> [bucket or None if not limited, role]
+        self._identifiers = LRUCache(maxIdentifiers)
+        self._roles = {}  # type: Dict[Optional[str], TokenBucket]
+        self.admitted = defaultdict(int)
+        self.rejectedByIdentifier = defaultdict(int)
+        self.rejectedByRole = defaultdict(int)
+
+    def admit(self, identifier: str,
+              roleOf: Callable[[str], Optional[str]]) -> Optional[str]:
+        """
+        Take a token for a write request of `identifier`
+
+        :return: why the request is not admitted, `None` if it is
+        """
+        now = self.clock()
+        entry = self._identifiers.get(identifier)
+        if entry is None:
+            role = roleOf(identifier)
+            entry = [self._bucket(role, "identifier", now), role]
+            self._identifiers.put(identifier, entry)
+        bucket, role = entry
+        if bucket is not None:
+            bucket.refill(now)
+            if bucket.tokens < 1:
+                self.rejectedByIdentifier[role] += 1
+                return "too many write requests from {}, retry later".\
+                    format(identifier)
+        roleBucket = self._roleBucket(role, now)
+        if roleBucket is not None:
+            roleBucket.refill(now)
+            if roleBucket.tokens < 1:
+                self.rejectedByRole[role] += 1
+                return "too many write requests from identifiers with role " \
+                       "{}, retry later".format(role)
+            roleBucket.tokens -= 1
+        if bucket is not None:
+            bucket.tokens -= 1
+        self.admitted[role] += 1
+
+    def onRoleChanged(self, identifier: str, role: Optional[str]):
+        """
+        Limit `identifier` by the limits of its new `role` from now on,
+        keeping the tokens it has up to the new burst
+        """
+        entry = self._identifiers.peek(identifier)
+        if entry is None or entry[1] == role:
+            return
+        limit = self.limits.get(role, {}).get("identifier")
+        if limit is None:
+            entry[0] = None
+        elif entry[0] is None:
+            entry[0] = TokenBucket(*limit, now=self.clock())
+        else:
+            entry[0].refill(self.clock())
+            entry[0].setLimit(*limit)
+        entry[1] = role
+
+    def _bucket(self, role, kind, now) -> Optional[TokenBucket]:
+        limit = self.limits.get(role, {}).get(kind)
+        return TokenBucket(*limit, now=now) if limit else None
+
+    def _roleBucket(self, role, now) -> Optional[TokenBucket]:
+        if role not in self._roles:
+            self._roles[role] = self._bucket(role, "role", now)
+        return self._roles[role]
+
+    @property
+    def stats(self) -> dict:
+        """
+        Write requests admitted and rejected, by role, rejections being
+        counted separately for the identifier and role limits
+        """
+        return {
+            "admitted": dict(self.admitted),
+            "rejectedByIdentifier": dict(self.rejectedByIdentifier),
+            "rejectedByRole": dict(self.rejectedByRole),
+            "identifiers": len(self._identifiers)
+        }
@@ -1,28 +1,26 @@
-from hashlib import sha256
-from copy import deepcopy
-
 from plenum.common.exceptions import UnknownIdentifier
-from plenum.common.txn import TXN_TYPE, RAW, ENC, HASH
+from plenum.common.txn import TXN_TYPE
 from plenum.server.client_authn import NaclAuthNr
 
 from sovrin.common.txn import ATTRIB
-from sovrin.persistence.identity_graph import IdentityGraph
+from sovrin.common.txn_view import TxnView
+from sovrin.server.identity_cache import IdentityCache
 
 
 class TxnBasedAuthNr(NaclAuthNr):
     """
     Transaction-based client authenticator.
     """
-    def __init__(self, storage: IdentityGraph):
+    def __init__(self, storage, cache: IdentityCache=None):
+        # `IdentityGraph` or `IdentityGraphSqlite`
         self.storage = storage
+        self.cache = cache
 
     def serializeForSig(self, msg):
         if msg["operation"].get(TXN_TYPE) == ATTRIB:
-            msgCopy = deepcopy(msg)
-            keyName = {RAW, ENC, HASH}.intersection(
-                set(msgCopy["operation"].keys())).pop()
-            msgCopy["operation"][keyName] = sha256(msgCopy["operation"][keyName]
-                                                   .encode()).hexdigest()
+            msgCopy = dict(msg)
+            msgCopy["operation"] = TxnView(msg["operation"]).hashedAttrib().\
+                toDict()
             return super().serializeForSig(msgCopy)
         else:
             return super().serializeForSig(msg)
@@ -31,6 +29,11 @@ class TxnBasedAuthNr(NaclAuthNr):
         raise RuntimeError('Add verification keys through the ADDNYM txn')
 
     def getVerkey(self, identifier):
+        if self.cache:
+            state = self.cache.getNymState(identifier)
+            if state is None:
+                raise UnknownIdentifier(identifier)
+            return state.verkey or ''
         nym = self.storage.getNym(identifier)
         if not nym:
             raise UnknownIdentifier(identifier)
@@ -0,0 +1,150 @@
+from typing import Iterable, NamedTuple, Optional
+
+from ledger.util import F
+from plenum.common.txn import VERKEY
+from plenum.common.types import f
+
+from sovrin.common.cache import LRUCache
+from sovrin.common.txn import ROLE, TARGET_NYM, TRUSTEE
+
+NymState = NamedTuple("NymState", [
+    ("role", Optional[str]),
+    ("verkey", Optional[str]),
+    ("sponsor", Optional[str]),
+    ("seqNo", Optional[int])
+])
+
+_notCached = object()
+
+
+class IdentityCache:
+    """
+    Bounded, write-through cache of nym -> (role, verkey, sponsor, seqNo) in
+    front of the identity graph.
+
+    Nyms not present in the graph are cached as `None` so that a NYM txn
+    adding such a nym can populate the cache directly. A NYM txn updating a
+    nym invalidates its entry.
+
+    If graph writes are deferred, `pendingWrites` (a `GraphWriter`) provides
+    the NYM txns not yet in the graph, which are applied to what is read
+    from the graph.
+    """
+
+    def __init__(self, graphStore, maxSize: int, pendingWrites=None):
+        self.graphStore = graphStore
+        self.pendingWrites = pendingWrites
+        self._cache = LRUCache(maxSize)
+
+    def getNymState(self, nym) -> Optional[NymState]:
+        state = self._cache.get(nym, _notCached)
+        if state is _notCached:
+            state = self._load(nym)
+            self._cache.put(nym, state)
+        return state
+
+    def _load(self, nym) -> Optional[NymState]:
+        # Pending txns are fetched before reading the graph, a txn written in
+        # between is then applied twice which gives the same state
+        pending = self.pendingWrites.getPendingNymTxns(nym) \
+            if self.pendingWrites else ()
+        nymV = self.graphStore.getNym(nym)
+        if not nymV:
+            state = None
+        else:
+            data = nymV.oRecordData
+            state = NymState(role=data.get(ROLE),
+                             verkey=data.get(VERKEY),
+                             sponsor=self.graphStore.getSponsorFor(nym),
+                             seqNo=data.get(F.seqNo.name))
+        for txn in pending:
+            state = self.applyNymTxn(state, txn)
+        return state
+
+    def prefetch(self, nyms: Iterable[str]):
+        """
+        Load the nyms not cached yet of `nyms` with one lookup in the graph
+        """
+        missing = [nym for nym in set(nyms) if nym not in self._cache]
+        if not missing:
+            return
+        getNymStates = getattr(self.graphStore, "getNymStates", None)
+        if getNymStates is None:
+            for nym in missing:
+                self.getNymState(nym)
+            return
+        pending = {nym: self.pendingWrites.getPendingNymTxns(nym)
+                   for nym in missing} if self.pendingWrites else {}
+        for nym, data in getNymStates(*missing).items():
+            state = None if data is None else \
+                NymState(role=data.get(ROLE),
+                         verkey=data.get(VERKEY),
+                         sponsor=data.get("sponsor"),
+                         seqNo=data.get(F.seqNo.name))
+            for txn in pending.get(nym, ()):
+                state = self.applyNymTxn(state, txn)
+            self._cache.put(nym, state)
+
+    @staticmethod
+    def applyNymTxn(state: Optional[NymState], txn) -> NymState:
+        if state is None:
+            return NymState(role=txn.get(ROLE),
+                            verkey=txn.get(VERKEY),
+                            sponsor=txn.get(f.IDENTIFIER.nm),
+                            seqNo=txn.get(F.seqNo.name))
+        verkey = txn.get(VERKEY)
+        return state._replace(role=txn.get(ROLE),
+                              verkey=state.verkey if verkey is None else verkey,
+                              seqNo=txn.get(F.seqNo.name))
+
+    def hasNym(self, nym) -> bool:
+        return self.getNymState(nym) is not None
+
+    def getRole(self, nym):
+        state = self.getNymState(nym)
+        if state is None:
+            raise ValueError("Nym {} does not exist".format(nym))
+        return state.role
+
+    def getVerkey(self, nym):
+        state = self.getNymState(nym)
+        return None if state is None else state.verkey
+
+    def getSponsorFor(self, nym):
+        state = self.getNymState(nym)
+        return None if state is None else state.sponsor
+
+    def hasTrustee(self, nym) -> bool:
+        state = self.getNymState(nym)
+        return state is not None and state.role == TRUSTEE
+
+    def onNymTxn(self, txn):
+        """
+        Update the cache with a NYM txn that has been added to the graph
+        """
+        nym = txn[TARGET_NYM]
+        if nym not in self._cache:
+            return
+        if self._cache.peek(nym) is None:
+            # The nym was known to be absent so this txn adds it
+            self._cache.put(nym, self.applyNymTxn(None, txn))
+        else:
+            self.invalidate(nym)
+
+    def invalidate(self, nym):
+        self._cache.pop(nym)
+
+    def clear(self):
+        self._cache.clear()
+
+    @property
+    def hits(self):
+        return self._cache.hits
+
+    @property
+    def misses(self):
+        return self._cache.misses
+
+    @property
+    def stats(self) -> dict:
+        return self._cache.stats
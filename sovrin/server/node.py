@@ -1,11 +1,12 @@
 import json
-from copy import deepcopy
-from hashlib import sha256
+import os
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from operator import itemgetter
 from typing import Iterable, Any
 
-import pyorient
-
 from ledger.compact_merkle_tree import CompactMerkleTree
 from ledger.ledger import Ledger
 from ledger.serializers.compact_serializer import CompactSerializer
@@ -23,21 +24,38 @@ from plenum.persistence.storage import initStorage
 from plenum.server.node import Node as PlenumNode
 from sovrin.common.config_util import getConfig
 from sovrin.common.txn import TXN_TYPE, \
-    TARGET_NYM, allOpKeys, validTxnTypes, ATTRIB, SPONSOR, NYM,\
+    TARGET_NYM, ATTRIB, SPONSOR, NYM,\
     ROLE, STEWARD, GET_ATTR, DISCLO, DATA, GET_NYM, \
-    TXN_ID, TXN_TIME, reqOpKeys, GET_TXNS, LAST_TXN, TXNS, \
+    TXN_ID, TXN_TIME, GET_TXNS, LAST_TXN, TXNS, \
     getTxnOrderedFields, CLAIM_DEF, GET_CLAIM_DEF, openTxns, \
     ISSUER_KEY, GET_ISSUER_KEY, REF, TRUSTEE, TGB, IDENTITY_TXN_TYPES, \
-    CONFIG_TXN_TYPES, POOL_UPGRADE, ACTION, START, CANCEL, SCHEDULE, \
-    NODE_UPGRADE, COMPLETE, FAIL
+    CONFIG_TXN_TYPES, POOL_UPGRADE, ACTION, START, SCHEDULE, \
+    NODE_UPGRADE, COMPLETE, FAIL, GET_NYMS, GET_ATTRS, TARGETS, PAGE_SIZE, \
+    MORE_TXNS
+from sovrin.common.cache import LRUCache
+from sovrin.common.txn_view import TxnView
 from sovrin.common.types import Request
-from sovrin.common.util import dateTimeEncoding
-from sovrin.persistence import identity_graph
+from sovrin.common.util import dateTimeEncoding, composeJsonObject
+from sovrin.persistence.blob_store import BlobStore
+from sovrin.persistence.checkpoint import Checkpointer
+from sovrin.persistence.graph_rebuild import GraphRebuilder
+from sovrin.persistence.graph_writer import GraphWriter, GraphWriteError, \
+    addTxnToGraph, writeTxnsToGraph
+from sovrin.persistence.group_commit import GroupCommitter, durabilityMode, \
+    DURABILITY_FSYNC, DURABILITY_GROUP
+from sovrin.persistence.identity_graph_sqlite import IdentityGraphSqlite
+from sovrin.persistence.merkle_proofs import MerkleProofs
 from sovrin.persistence.secondary_storage import SecondaryStorage
+from sovrin.server.admission import WriteAdmission
 from sovrin.server.auth import Authoriser
 from sovrin.server.client_authn import TxnBasedAuthNr
+from sovrin.server.identity_cache import IdentityCache
 from sovrin.server.node_authn import NodeAuthNr
+from sovrin.server.op_validator import OperationValidator
 from sovrin.server.pool_manager import HasPoolManager
+from sovrin.server.read_cache import ReadReplyCache
+from sovrin.server.read_handlers import ReadHandlers
+from sovrin.server.sig_verifier import RequestVerifier, verifySig
 from sovrin.server.upgrader import Upgrader
 
 logger = getlogger()
@@ -59,7 +77,32 @@ class Node(PlenumNode, HasPoolManager):
                  storage=None,
                  config=None):
         self.config = config or getConfig()
-        self.graphStore = self.getGraphStorage(name)
+        self.graphStore = self.getGraphStorage(name, basedirpath)
+        self.graphWriter = None
+        # Sequence number of the last txn written to a graph without
+        # transactions, the graph's watermark is yet to be moved to
+        self._graphWatermark = None
+        self.idCache = self.getIdentityCache()
+        self.readCache = ReadReplyCache(self.config.ReadCacheSize,
+                                        self.config.ReadCacheMaxBytes)
+        # Last replies sent for write requests, to answer retries from
+        self.recentReplies = LRUCache(self.config.RecentReplyCacheSize)
+        self.graphReads = self.getGraphReadExecutor()
+        # Messages to clients from threads answering graph reads, sent by
+        # the node's own thread
+        self.graphReadOutbox = deque()
+        self._inGraphRead = threading.local()
+        self.sigVerifier = self.getRequestVerifier()
+        # (identifier, reqId, signature) of the request being handled after
+        # its signature was verified by `sigVerifier`
+        self._preVerified = None
+        self.opValidator = self.getOperationValidator()
+        # Outcome of the structure checks of the operations of the batch of
+        # requests being handled, by id of the operation, `None` for those
+        # well formed
+        self._structureChecked = {}
+        self.writeAdmission = self.getWriteAdmission()
+        self.readHandlers = self.getReadHandlers()
         super().__init__(name=name,
                          nodeRegistry=nodeRegistry,
                          clientAuthNr=clientAuthNr,
@@ -72,10 +115,14 @@ class Node(PlenumNode, HasPoolManager):
                          storage=storage,
                          config=self.config)
         self._addTxnsToGraphIfNeeded()
+        self.graphWriter = self.getGraphWriter(name, basedirpath)
+        self.idCache.pendingWrites = self.graphWriter
         self.configLedger = self.getConfigLedger()
         self.ledgerManager.addLedger(2, self.configLedger,
                                      postCatchupCompleteClbk=self.postConfigLedgerCaughtUp,
                                      postTxnAddedToLedgerClbk=self.postTxnFromCatchupAddedToLedger)
+        self.groupCommitter = self.getGroupCommitter()
+        self.checkpointer = self.getCheckpointer(basedirpath)
         self.upgrader = self.getUpgrader()
         self.nodeMsgRouter.routes[Request] = self.processNodeRequest
         self.nodeAuthNr = self.defaultNodeAuthNr()
@@ -84,11 +131,56 @@ class Node(PlenumNode, HasPoolManager):
         HasPoolManager.__init__(self, nodeRegistry, ha, cliname, cliha)
 
     def getSecondaryStorage(self):
-        return SecondaryStorage(self.graphStore, self.primaryStorage)
+        self.merkleProofs = MerkleProofs(self.primaryStorage,
+                                         self.config.MerkleProofCacheSize)
+        return SecondaryStorage(self.graphStore, self.primaryStorage,
+                                self.merkleProofs)
+
+    def getGraphStorage(self, name, basedirpath=None):
+        if self.config.graphStore == "sqlite":
+            baseDir = os.path.expanduser(basedirpath or self.config.baseDir)
+            return IdentityGraphSqlite(os.path.join(baseDir, "data", "nodes",
+                                                    name))
+        # Imported here so that nodes using an embedded graph do not need
+        # OrientDB at all
+        import pyorient
+        from sovrin.persistence.identity_graph import IdentityGraph
+        from sovrin.persistence.orientdb_pool import getOrientDbPool
+        store = self._getOrientDbStore(name, pyorient.DB_TYPE_GRAPH)
+        baseDir = os.path.expanduser(basedirpath or self.config.baseDir)
+        blobStore = BlobStore(os.path.join(baseDir, "data", "nodes", name,
+                                           "attributes"),
+                              self.config.AttributeBlobMmapSize)
+        return IdentityGraph(store, getOrientDbPool(store, name, self.config),
+                             blobStore, self.config.AttributeBlobMinSize)
+
+    def getGraphWriter(self, name, basedirpath=None):
+        if self.config.GraphWritesAsync:
+            # The writer's thread needs a graph store of its own
+            return GraphWriter(self.getGraphStorage(name, basedirpath),
+                               self.config.GraphWriteBatchSize,
+                               self.config.GraphWriteFlushInterval,
+                               self.config.GraphWriteRetryInterval,
+                               self.config.GraphWriteMaxRetries)
+
+    def getIdentityCache(self):
+        return IdentityCache(self.graphStore, self.config.IdentityCacheSize)
+
+    def getGraphReadExecutor(self):
+        """
+        Threads answering graph reads, if the graph store can be read by
+        several threads at once
+        """
+        queries = getattr(self.graphStore, "queries", None)
+        if self.config.GraphReadWorkers and queries and queries.pool:
+            return ThreadPoolExecutor(self.config.GraphReadWorkers)
 
-    def getGraphStorage(self, name):
-        return identity_graph.IdentityGraph(self._getOrientDbStore(name,
-                                                    pyorient.DB_TYPE_GRAPH))
+    def getRequestVerifier(self):
+        """
+        Threads verifying the signatures of client requests, if configured
+        """
+        if self.config.SigVerificationWorkers:
+            return RequestVerifier(self.config.SigVerificationWorkers)
 
     def getPrimaryStorage(self):
         """
@@ -100,7 +192,7 @@ class Node(PlenumNode, HasPoolManager):
                           dataDir=self.dataLocation,
                           serializer=CompactSerializer(fields=fields),
                           fileName=self.config.domainTransactionsFile,
-                          ensureDurability=self.config.EnsureLedgerDurability)
+                          ensureDurability=self.ensureLedgerDurability)
         else:
             return initStorage(self.config.primaryStorage,
                                name=self.name + NODE_PRIMARY_STORAGE_SUFFIX,
@@ -116,7 +208,52 @@ class Node(PlenumNode, HasPoolManager):
             fileNamePrefix='config', dataDir=self.dataLocation)),
             dataDir=self.dataLocation,
             fileName=self.config.configTransactionsFile,
-            ensureDurability=self.config.EnsureLedgerDurability)
+            ensureDurability=self.ensureLedgerDurability)
+
+    def getCheckpointer(self, basedirpath=None):
+        """
+        Checkpointer of the ledgers and the graph, if checkpoints are
+        configured
+        """
+        if not self.config.CheckpointInterval:
+            return None
+        baseDir = os.path.expanduser(basedirpath or self.config.baseDir)
+        return Checkpointer(self.dataLocation,
+                            {"pool": self.poolLedger,
+                             "domain": self.domainLedger,
+                             "config": self.configLedger},
+                            self.graphStore,
+                            os.path.join(baseDir, "checkpoints", self.name),
+                            keep=self.config.CheckpointsToKeep,
+                            blobStore=getattr(self.graphStore, "blobStore",
+                                              None))
+
+    def checkpointIfDue(self):
+        """
+        Take a checkpoint if `CheckpointInterval` txns were appended to the
+        domain ledger since the last one, whether ordered or caught up
+        """
+        if self.checkpointer and self.domainLedger.size >= \
+                self.checkpointer.lastSeqNo + self.config.CheckpointInterval:
+            self.checkpointer.create()
+
+    @property
+    def ensureLedgerDurability(self) -> bool:
+        """
+        Whether the domain and config ledgers fsync each txn they append
+        """
+        return durabilityMode(self.config) == DURABILITY_FSYNC
+
+    def getGroupCommitter(self):
+        """
+        Committer making the txns of the domain and config ledgers durable
+        together before their replies are sent, with the "group" durability
+        mode
+        """
+        if durabilityMode(self.config) == DURABILITY_GROUP:
+            return GroupCommitter([self.primaryStorage, self.configLedger],
+                                  self.config.GroupCommitMaxDelay,
+                                  self.config.GroupCommitMaxTxns)
 
     def postDomainLedgerCaughtUp(self):
         # TODO: Reconsider, shouldn't config ledger be synced before domain
@@ -202,9 +339,11 @@ class Node(PlenumNode, HasPoolManager):
 
     def postTxnFromCatchupAddedToLedger(self, ledgerType: int, txn: Any):
         if ledgerType == 2:
-            pass
+            self.upgrader.indexLedger()
         else:
             super().postTxnFromCatchupAddedToLedger(ledgerType, txn)
+            if ledgerType == 1:
+                self.checkpointIfDue()
 
     def validateNodeMsg(self, wrappedMsg):
         msg, frm = wrappedMsg
@@ -226,16 +365,100 @@ class Node(PlenumNode, HasPoolManager):
 
     def _addTxnsToGraphIfNeeded(self):
         i = 0
-        txnCountInGraph = self.graphStore.countTxns()
-        for seqNo, txn in self.domainLedger.getAllTxn().items():
-            if seqNo > txnCountInGraph:
-                txn[F.seqNo.name] = seqNo
-                self.storeTxnInGraph(txn)
-                i += 1
+        lastSeqNo = self.graphStore.getLastSeqNo()
+        if lastSeqNo is None:
+            # Graph was built before it recorded the last applied txn
+            lastSeqNo = self.graphStore.countTxns()
+        if self.domainLedger.size - lastSeqNo > \
+                self.config.GraphBulkRebuildThreshold:
+            rebuilder = GraphRebuilder(self.graphStore,
+                                       self.config.GraphRebuildChunkSize,
+                                       self.config.GraphRebuildWorkers)
+            i = rebuilder.rebuild(self.domainLedger, frm=lastSeqNo + 1)
+            self.idCache.clear()
+            self.readCache.clear()
+            return i
+        for seqNo, txn in self.domainLedger.getAllTxn(
+                frm=lastSeqNo + 1).items():
+            txn[F.seqNo.name] = seqNo
+            self.storeTxnInGraph(txn)
+            i += 1
+        self.moveGraphWatermark()
         logger.debug("{} adding {} transactions to graph from ledger".
                      format(self, i))
         return i
 
+    def handleOneClientMsg(self, wrappedMsg):
+        if not self.sigVerifier:
+            return super().handleOneClientMsg(wrappedMsg)
+        msg, frm = wrappedMsg
+        self.sigVerifier.submit(wrappedMsg, self._sigVerification(msg))
+
+    def _sigVerification(self, msg):
+        """
+        Verification of the signature of a client request to run on another
+        thread, `None` if the request is to be verified by the node's thread,
+        which also reports any error
+        """
+        if not isinstance(msg, dict) or \
+                not all(msg.get(k) for k in (OPERATION, f.IDENTIFIER.nm,
+                                             f.REQ_ID.nm, f.SIG.nm)) or \
+                not self.isSignatureVerificationNeeded(msg):
+            return None
+        authNr = self.authNr(msg)
+        if authNr is self.nodeAuthNr:
+            return None
+        identifier = msg[f.IDENTIFIER.nm]
+        try:
+            # The verkey is looked up in the identity cache and the request
+            # serialized here since neither is thread safe
+            verkey = authNr.getVerkey(identifier)
+            serialized = authNr.serializeForSig(msg)
+        except Exception:
+            return None
+        return partial(verifySig, verkey, identifier, msg[f.SIG.nm],
+                       serialized)
+
+    def serviceVerifiedRequests(self) -> int:
+        """
+        Handle the client messages whose signatures are verified, in the
+        order they were received. A request whose signature could not be
+        verified is verified again by the node's thread to report why.
+        """
+        if not self.sigVerifier:
+            return 0
+        batch = list(self.sigVerifier.ready())
+        if not batch:
+            return 0
+        self._checkBatchStructure(batch)
+        try:
+            for wrappedMsg, verified in batch:
+                self._handleVerified(wrappedMsg, verified)
+        finally:
+            self._structureChecked.clear()
+        return len(batch)
+
+    def _handleVerified(self, wrappedMsg, verified: bool):
+        msg, frm = wrappedMsg
+        if verified:
+            self._preVerified = (msg[f.IDENTIFIER.nm], msg[f.REQ_ID.nm],
+                                 msg[f.SIG.nm])
+        try:
+            super().handleOneClientMsg(wrappedMsg)
+        finally:
+            self._preVerified = None
+
+    def verifySignature(self, msg):
+        if self._preVerified is not None and isinstance(msg, Request) and \
+                (msg.identifier, msg.reqId, msg.signature) == \
+                self._preVerified:
+            return
+        super().verifySignature(msg)
+
+    @property
+    def sigVerificationStats(self) -> dict:
+        return self.sigVerifier.stats if self.sigVerifier else {}
+
     def isSignatureVerificationNeeded(self, msg: Any):
         op = msg.get(OPERATION)
         if op:
@@ -248,83 +471,74 @@ class Node(PlenumNode, HasPoolManager):
         super().checkValidOperation(identifier, reqId, operation)
 
     def checkValidSovrinOperation(self, identifier, reqId, operation):
-        unknownKeys = set(operation.keys()).difference(set(allOpKeys))
-        if unknownKeys:
-            raise InvalidClientRequest(identifier, reqId,
-                                       'invalid keys "{}"'.
-                                       format(",".join(unknownKeys)))
-
-        missingKeys = set(reqOpKeys).difference(set(operation.keys()))
-        if missingKeys:
-            raise InvalidClientRequest(identifier, reqId,
-                                       'missing required keys "{}"'.
-                                       format(",".join(missingKeys)))
-
-        if operation[TXN_TYPE] not in validTxnTypes:
-            raise InvalidClientRequest(identifier, reqId, 'invalid {}: {}'.
-                                       format(TXN_TYPE, operation[TXN_TYPE]))
-
-        if operation[TXN_TYPE] == ATTRIB:
-            dataKeys = {RAW, ENC, HASH}.intersection(set(operation.keys()))
-            if len(dataKeys) != 1:
-                raise InvalidClientRequest(identifier, reqId,
-                                           '{} should have one and only one of '
-                                           '{}, {}, {}'
-                                           .format(ATTRIB, RAW, ENC, HASH))
-            if RAW in dataKeys:
-                try:
-                    json.loads(operation[RAW])
-                except:
-                    raise InvalidClientRequest(identifier, reqId,
-                                               'raw attribute {} should be '
-                                               'JSON'.format(operation[RAW]))
-
-            if not (not operation.get(TARGET_NYM) or
-                    self.graphStore.hasNym(operation[TARGET_NYM])):
-                raise InvalidClientRequest(identifier, reqId,
-                                           '{} should be added before adding '
-                                           'attribute for it'.
-                                           format(TARGET_NYM))
-
-        if operation[TXN_TYPE] == NYM:
-            role = operation.get(ROLE)
-            nym = operation.get(TARGET_NYM)
-            if not nym:
-                raise InvalidClientRequest(identifier, reqId,
-                                           "{} needs to be present".
-                                           format(TARGET_NYM))
-            if not Authoriser.isValidRole(role):
-                raise InvalidClientRequest(identifier, reqId,
-                                           "{} not a valid role".
-                                           format(role))
-            # Only
-            if not self.canNymRequestBeProcessed(identifier, operation):
-                raise InvalidClientRequest(identifier, reqId,
-                                           "{} is already present".
-                                           format(nym))
-
-        if operation[TXN_TYPE] == POOL_UPGRADE:
-            action = operation.get(ACTION)
-            if action not in (START, CANCEL):
-                raise InvalidClientRequest(identifier, reqId,
-                                           "{} not a valid action".
-                                           format(action))
-            if action == START:
-                schedule = operation.get(SCHEDULE, {})
-                isValid, msg = self.upgrader.isScheduleValid(schedule,
-                                                             self.poolManager.nodeIds)
-                if not isValid:
-                    raise InvalidClientRequest(identifier, reqId,
-                                               "{} not a valid schedule since {}".
-                                               format(schedule, msg))
-
-            # TODO: Check if cancel is submitted before start
+        checked = self._structureChecked.get(id(operation), False)
+        if checked is False:
+            self.opValidator.checkStructure(identifier, reqId, operation)
+        elif checked is not None:
+            raise checked
+        self.opValidator.checkState(identifier, reqId, operation)
+
+    def getOperationValidator(self) -> OperationValidator:
+        validator = OperationValidator(self.config.MaxReadTargets)
+        validator.addStateCheck(ATTRIB, self._checkAttribTarget)
+        validator.addStateCheck(NYM, self._checkNymNotPresent)
+        validator.addStateCheck(POOL_UPGRADE, self._checkUpgradeSchedule)
+        return validator
+
+    def _checkAttribTarget(self, identifier, operation):
+        if operation.get(TARGET_NYM) and \
+                not self.idCache.hasNym(operation[TARGET_NYM]):
+            return '{} should be added before adding attribute for it'.\
+                format(TARGET_NYM)
+
+    def _checkNymNotPresent(self, identifier, operation):
+        if not self.canNymRequestBeProcessed(identifier, operation):
+            return "{} is already present".format(operation[TARGET_NYM])
+
+    def _checkUpgradeSchedule(self, identifier, operation):
+        # TODO: Check if cancel is submitted before start
+        if operation.get(ACTION) == START:
+            schedule = operation.get(SCHEDULE, {})
+            isValid, msg = self.upgrader.isScheduleValid(
+                schedule, self.poolManager.nodeIds)
+            if not isValid:
+                return "{} not a valid schedule since {}".format(schedule,
+                                                                  msg)
+
+    def _checkBatchStructure(self, batch):
+        """
+        Check the structure of the operations of a batch of client requests
+        and look up at once the nyms read by the state checks of those well
+        formed, so that malformed requests never cause a lookup
+        """
+        nyms = set()
+        for (msg, frm), verified in batch:
+            if not isinstance(msg, dict) or \
+                    not isinstance(msg.get(OPERATION), dict):
+                continue
+            identifier = msg.get(f.IDENTIFIER.nm)
+            operation = msg[OPERATION]
+            try:
+                self.opValidator.checkStructure(identifier,
+                                                msg.get(f.REQ_ID.nm),
+                                                operation)
+            except InvalidClientRequest as ex:
+                self._structureChecked[id(operation)] = ex
+                continue
+            self._structureChecked[id(operation)] = None
+            nyms.update(self.opValidator.nymsToLookUp(identifier, operation))
+        if nyms:
+            self.idCache.prefetch(nyms)
+
+    @property
+    def operationValidationStats(self) -> dict:
+        return self.opValidator.stats
 
     def checkRequestAuthorized(self, request: Request):
         op = request.operation
         typ = op[TXN_TYPE]
 
-        s = self.graphStore  # type: identity_graph.IdentityGraph
+        s = self.idCache
 
         origin = request.identifier
 
@@ -339,7 +553,7 @@ class Node(PlenumNode, HasPoolManager):
 
             role = op.get(ROLE)
 
-            nym = self.graphStore.getNym(op[TARGET_NYM])
+            nym = s.getNymState(op[TARGET_NYM])
             if not nym:
                 # If nym does not exist
                 r, msg = Authoriser.authorised(NYM, ROLE, originRole,
@@ -350,8 +564,7 @@ class Node(PlenumNode, HasPoolManager):
                         request.reqId,
                         "{} cannot add {}".format(originRole, role))
             else:
-                nym = nym.oRecordData
-                subjectRole = nym.get(ROLE)
+                subjectRole = nym.role
                 if subjectRole != role:
                     r, msg = Authoriser.authorised(NYM, ROLE, originRole,
                                                    oldVal=subjectRole,
@@ -374,7 +587,7 @@ class Node(PlenumNode, HasPoolManager):
 
         # TODO: Just for now. Later do something meaningful here
         elif typ in [DISCLO, GET_ATTR, CLAIM_DEF, GET_CLAIM_DEF, ISSUER_KEY,
-                     GET_ISSUER_KEY]:
+                     GET_ISSUER_KEY, GET_NYMS, GET_ATTRS]:
             pass
         elif request.operation.get(TXN_TYPE) in POOL_TXN_TYPES:
             return self.poolManager.checkRequestAuthorized(request)
@@ -405,14 +618,14 @@ class Node(PlenumNode, HasPoolManager):
 
     def canNymRequestBeProcessed(self, identifier, msg):
         nym = msg.get(TARGET_NYM)
-        if self.graphStore.hasNym(nym):
-            if not self.graphStore.hasTrustee(identifier) and \
-                            self.graphStore.getSponsorFor(nym) != identifier:
+        if self.idCache.hasNym(nym):
+            if not self.idCache.hasTrustee(identifier) and \
+                            self.idCache.getSponsorFor(nym) != identifier:
                     return False
         return True
 
     def defaultAuthNr(self):
-        return TxnBasedAuthNr(self.graphStore)
+        return TxnBasedAuthNr(self.graphStore, self.idCache)
 
     def defaultNodeAuthNr(self):
         return NodeAuthNr(self.poolLedger)
@@ -420,130 +633,371 @@ class Node(PlenumNode, HasPoolManager):
     async def prod(self, limit: int = None) -> int:
         c = await super().prod(limit)
         c += self.upgrader.service()
+        c += self.serviceGraphReads()
+        c += self.serviceVerifiedRequests()
+        if self.groupCommitter:
+            c += self.groupCommitter.service()
+        self.checkGraphWriter()
+        self.moveGraphWatermark()
         return c
 
-    def processGetNymReq(self, request: Request, frm: str):
-        self.transmitToClient(RequestAck(*request.key), frm)
-        nym = request.operation[TARGET_NYM]
-        txn = self.graphStore.getAddNymTxn(nym)
-        txnId = self.genTxnId(request.identifier, request.reqId)
+    def moveGraphWatermark(self):
+        """
+        Move the watermark of a graph without transactions to the last txn
+        written to it, once for all the txns written in a loop iteration. A
+        crash before that only has those txns written again at startup.
+        """
+        if self._graphWatermark is not None:
+            self.graphStore.setLastSeqNo(self._graphWatermark)
+            self._graphWatermark = None
+
+    def checkGraphWriter(self):
+        """
+        Stop the node if its graph writer gave up, the graph would no longer
+        follow the ledger. The txns not written are after the graph's
+        watermark and are written when the node starts again.
+        """
+        if self.graphWriter and self.graphWriter.faulted and self.isGoing():
+            logger.error("{} stopping, its graph writer gave up: {}".
+                         format(self, self.graphWriter.error))
+            self.stop()
+
+    def serviceGraphReads(self) -> int:
+        """
+        Send the messages of answered graph reads to their clients
+        """
+        count = 0
+        while self.graphReadOutbox:
+            msg, remoteName = self.graphReadOutbox.popleft()
+            self.transmitToClient(msg, remoteName)
+            count += 1
+        return count
+
+    def transmitToClient(self, msg: Any, remoteName: str):
+        if getattr(self._inGraphRead, "active", False):
+            self.graphReadOutbox.append((msg, remoteName))
+        elif isinstance(msg, Reply) and self.groupCommitter and \
+                self.groupCommitter.pendingCount:
+            # Replies could show txns that are not durable yet, so they
+            # wait for them to be
+            self.groupCommitter.defer(partial(super().transmitToClient, msg,
+                                              remoteName))
+        else:
+            super().transmitToClient(msg, remoteName)
+
+    def _processGraphRead(self, request: Request, frm: str):
+        self._inGraphRead.active = True
+        try:
+            self.processReadReq(request, frm)
+        except Exception as ex:
+            logger.error("{} could not answer request {}: {}".
+                         format(self, request.key, ex))
+            self.transmitToClient(RequestNack(*request.key, str(ex)), frm)
+        finally:
+            self._inGraphRead.active = False
+
+    def getReadResult(self, operation, read):
+        """
+        Result fields answering a graph read, from the read cache or else
+        computed by `read` and cached
+        """
+        fields = self.readCache.get(operation)
+        if fields is None:
+            # With txns yet to be written the graph may be stale. Txns are
+            # only queued by the node's thread, a txn queued during the read
+            # invalidates the read cache changing its version
+            version = self.readCache.version
+            stale = self.graphWriter and self.graphWriter.pendingCount
+            fields = read()
+            if not stale:
+                self.readCache.put(operation, fields, version)
+        return fields
+
+    def getReadResults(self, operations, readMany):
+        """
+        Like `getReadResult` for several reads, the ones not cached are
+        answered together by `readMany` which returns their result fields in
+        the order of the operations it is given
+        """
+        results = [self.readCache.get(op) for op in operations]
+        missing = [op for op, fields in zip(operations, results)
+                   if fields is None]
+        if missing:
+            version = self.readCache.version
+            stale = self.graphWriter and self.graphWriter.pendingCount
+            read = iter(readMany(missing))
+            for i, fields in enumerate(results):
+                if fields is None:
+                    results[i] = next(read)
+                    if not stale:
+                        self.readCache.put(operations[i], results[i],
+                                           version)
+        return results
+
+    @staticmethod
+    def nymReadResult(txn) -> dict:
         # TODO: We should have a single JSON encoder which does the
         # encoding for us, like sorting by keys, handling datetime objects.
-        result = {f.IDENTIFIER.nm: request.identifier,
-                  f.REQ_ID.nm: request.reqId,
-                  DATA: json.dumps(txn, sort_keys=True) if txn else None,
-                  TXN_ID: txnId
-                  }
+        return {DATA: json.dumps(txn, sort_keys=True) if txn else None}
+
+    @staticmethod
+    def attrReadResult(attrName, valueWithSeqNo) -> dict:
+        if not valueWithSeqNo:
+            return {}
+        attr = {attrName: valueWithSeqNo[0]}
+        return {DATA: json.dumps(attr, sort_keys=True),
+                F.seqNo.name: valueWithSeqNo[1]}
+
+    @property
+    def cacheStats(self) -> dict:
+        return {
+            "identity": self.idCache.stats,
+            "readReplies": self.readCache.stats,
+            "recentReplies": self.recentReplies.stats,
+            "merkleProofs": self.merkleProofs.stats
+        }
+
+    @property
+    def graphQueryStats(self) -> dict:
+        """
+        Latency stats per statement template of the graph, empty for graph
+        backends not running statements through a `QueryRunner`
+        """
+        queries = getattr(self.graphStore, "queries", None)
+        return queries.stats if queries else {}
+
+    @property
+    def graphPoolStats(self) -> dict:
+        queries = getattr(self.graphStore, "queries", None)
+        return queries.pool.stats if queries and queries.pool else {}
+
+    def getReadHandlers(self) -> ReadHandlers:
+        handlers = ReadHandlers(self)
+        handlers.register(GET_NYM, self.readNym)
+        # GET_TXNS also reads the ledger, which only the node's thread does
+        handlers.register(GET_TXNS, self.readTxns, graphOnly=False)
+        handlers.register(GET_CLAIM_DEF, self.readClaimDef)
+        handlers.register(GET_ATTR, self.readAttr)
+        handlers.register(GET_ISSUER_KEY, self.readIssuerKey)
+        handlers.register(GET_NYMS, self.readNyms)
+        handlers.register(GET_ATTRS, self.readAttrsOfNyms)
+        return handlers
+
+    @property
+    def readStats(self) -> dict:
+        return self.readHandlers.stats
+
+    def processReadReq(self, request: Request, frm: str):
+        try:
+            fields = self.readHandlers.handle(request.operation[TXN_TYPE],
+                                              request)
+        except (InvalidClientRequest, UnauthorizedClientRequest) as ex:
+            self.transmitToClient(RequestNack(*request.key, str(ex)), frm)
+            return
+        except GraphWriteError as ex:
+            # Answering from the graph would miss txns already ordered
+            logger.warning("{} cannot answer request {}: {}".
+                           format(self, request.key, ex))
+            self.transmitToClient(RequestNack(*request.key, str(ex)), frm)
+            return
+        if not self.config.CoalesceReadAcks:
+            self.transmitToClient(RequestAck(*request.key), frm)
+        self.transmitToClient(self.readReply(request, fields), frm)
+
+    def readReply(self, request: Request, fields: dict) -> Reply:
+        """
+        Reply to a read request, with the fields of its result given by the
+        read handler. The fields are already serialized, the read cache
+        holding them as sent.
+        """
+        result = {TXN_ID: self.genTxnId(request.identifier, request.reqId)}
         result.update(request.operation)
-        self.transmitToClient(Reply(result), frm)
+        result.update(fields)
+        result[f.IDENTIFIER.nm] = request.identifier
+        result[f.REQ_ID.nm] = request.reqId
+        return Reply(result)
+
+    def awaitGraphWrites(self, *nyms):
+        """
+        Wait for the txns of `nyms` queued for the graph writer to be written
+        so that reads of the graph see them
+
+        :raises GraphWriteError: if they are not written in
+        `GraphWriteFlushTimeout` seconds
+        """
+        if self.graphWriter and \
+                any(self.graphWriter.hasPendingTxnsFor(nym) for nym in nyms):
+            try:
+                self.graphWriter.flush(self.config.GraphWriteFlushTimeout)
+            except TimeoutError as ex:
+                raise GraphWriteError(str(ex)) from ex
+
+    def readNym(self, request: Request) -> dict:
+        nym = request.operation[TARGET_NYM]
+
+        def read():
+            self.awaitGraphWrites(nym)
+            return self.nymReadResult(self.graphStore.getAddNymTxn(nym))
+
+        return self.getReadResult(request.operation, read)
 
-    def processGetTxnReq(self, request: Request, frm: str):
+    def readTxns(self, request: Request) -> dict:
         nym = request.operation[TARGET_NYM]
         origin = request.identifier
         if nym != origin:
             # TODO not sure this is correct; why does it matter?
-            msg = "You can only receive transactions for yourself"
-            self.transmitToClient(RequestNack(*request.key, msg), frm)
-        else:
-            self.transmitToClient(RequestAck(*request.key), frm)
-            data = request.operation.get(DATA)
-            addNymTxn = self.graphStore.getAddNymTxn(origin)
-            txnIds = [addNymTxn[TXN_ID], ] + self.graphStore. \
-                getAddAttributeTxnIds(origin)
-            # If sending transactions to a user then should send user's
-            # sponsor creation transaction also
-            if addNymTxn.get(ROLE) is None:
-                sponsorNymTxn = self.graphStore.getAddNymTxn(
-                    addNymTxn.get(f.IDENTIFIER.nm))
-                txnIds = [sponsorNymTxn[TXN_ID], ] + txnIds
-            # TODO: Remove this log statement
-            logger.debug("{} getting replies for {}".format(self, txnIds))
-            result = self.secondaryStorage.getReplies(*txnIds, seqNo=data)
-            txns = sorted(list(result.values()), key=itemgetter(F.seqNo.name))
-            lastTxn = str(txns[-1][F.seqNo.name]) if len(txns) > 0 else data
-            result = {
-                TXN_ID: self.genTxnId(
-                    request.identifier, request.reqId)
-            }
-            result.update(request.operation)
-            # TODO: We should have a single JSON encoder which does the
-            # encoding for us, like sorting by keys, handling datetime objects.
-            result[DATA] = json.dumps({
-                LAST_TXN: lastTxn,
-                TXNS: txns
-            }, default=dateTimeEncoding, sort_keys=True)
-            result.update({
-                f.IDENTIFIER.nm: request.identifier,
-                f.REQ_ID.nm: request.reqId,
-            })
-            self.transmitToClient(Reply(result), frm)
-
-    def processGetClaimDefReq(self, request: Request, frm: str):
+            raise UnauthorizedClientRequest(
+                request.identifier, request.reqId,
+                "You can only receive transactions for yourself")
+        data = request.operation.get(DATA)
+        self.awaitGraphWrites(origin)
+        addNymTxn = self.graphStore.getAddNymTxn(origin)
+        if not addNymTxn:
+            raise InvalidClientRequest(request.identifier, request.reqId,
+                                       "{} not found".format(origin))
+        txnIds = [addNymTxn[TXN_ID], ] + self.graphStore. \
+            getAddAttributeTxnIds(origin)
+        # If sending transactions to a user then should send user's
+        # sponsor creation transaction also
+        if addNymTxn.get(ROLE) is None:
+            sponsorNymTxn = self.graphStore.getAddNymTxn(
+                addNymTxn.get(f.IDENTIFIER.nm))
+            txnIds = [sponsorNymTxn[TXN_ID], ] + txnIds
+        pageSize = min(request.operation.get(PAGE_SIZE) or
+                       self.config.GetTxnsPageSize,
+                       self.config.GetTxnsMaxPageSize)
+        # TODO: Remove this log statement
+        logger.debug("{} getting replies for {}".format(self, txnIds))
+        result, moreTxns = self.secondaryStorage.getRepliesPage(
+            *txnIds, seqNo=data, pageSize=pageSize)
+        txns = sorted(list(result.values()), key=itemgetter(F.seqNo.name))
+        lastTxn = str(txns[-1][F.seqNo.name]) if len(txns) > 0 else data
+        # TODO: We should have a single JSON encoder which does the
+        # encoding for us, like sorting by keys, handling datetime objects.
+        return {DATA: json.dumps({
+            LAST_TXN: lastTxn,
+            TXNS: txns,
+            MORE_TXNS: moreTxns
+        }, default=dateTimeEncoding, sort_keys=True)}
+
+    def readClaimDef(self, request: Request) -> dict:
         issuerNym = request.operation[TARGET_NYM]
         name = request.operation[DATA][NAME]
         version = request.operation[DATA][VERSION]
-        claimDef = self.graphStore.getClaimDef(issuerNym, name, version)
-        result = {
-            TXN_ID: self.genTxnId(
-                request.identifier, request.reqId)
-        }
-        result.update(request.operation)
-        result[DATA] = json.dumps(claimDef, sort_keys=True)
-        result.update({
-            f.IDENTIFIER.nm: request.identifier,
-            f.REQ_ID.nm: request.reqId,
-        })
-        self.transmitToClient(Reply(result), frm)
 
-    def processGetAttrsReq(self, request: Request, frm: str):
-        self.transmitToClient(RequestAck(*request.key), frm)
+        def read():
+            self.awaitGraphWrites(issuerNym)
+            claimDef = self.graphStore.getClaimDef(issuerNym, name, version)
+            return {DATA: json.dumps(claimDef, sort_keys=True)}
+
+        return self.getReadResult(request.operation, read)
+
+    def readAttr(self, request: Request) -> dict:
         attrName = request.operation[RAW]
         nym = request.operation[TARGET_NYM]
-        attrWithSeqNo = self.graphStore.getRawAttrs(nym, attrName)
-        result = {
-            TXN_ID: self.genTxnId(
-                request.identifier, request.reqId)
-        }
-        if attrWithSeqNo:
-            attr = {attrName: attrWithSeqNo[attrName][0]}
-            result[DATA] = json.dumps(attr, sort_keys=True)
-            result[F.seqNo.name] = attrWithSeqNo[attrName][1]
-        result.update(request.operation)
-        result.update({
-            f.IDENTIFIER.nm: request.identifier,
-            f.REQ_ID.nm: request.reqId,
-        })
-        self.transmitToClient(Reply(result), frm)
-
-    def processGetIssuerKeyReq(self, request: Request, frm: str):
-        self.transmitToClient(RequestAck(*request.key), frm)
-        keys = self.graphStore.getIssuerKeys(request.operation[ORIGIN],
-                                             request.operation[REF])
-        result = {
-            TXN_ID: self.genTxnId(
-                request.identifier, request.reqId)
-        }
-        result.update(request.operation)
-        result[DATA] = json.dumps(keys, sort_keys=True)
-        result.update({
-            f.IDENTIFIER.nm: request.identifier,
-            f.REQ_ID.nm: request.reqId,
-        })
-        self.transmitToClient(Reply(result), frm)
+
+        def read():
+            self.awaitGraphWrites(nym)
+            attrWithSeqNo = self.graphStore.getRawAttrs(nym, attrName)
+            return self.attrReadResult(attrName, attrWithSeqNo.get(attrName))
+
+        return self.getReadResult(request.operation, read)
+
+    def readNyms(self, request: Request) -> dict:
+        nyms = sorted(set(request.operation[TARGETS]))
+        operations = [{TXN_TYPE: GET_NYM, TARGET_NYM: nym} for nym in nyms]
+
+        def readMany(ops):
+            self.awaitGraphWrites(*(op[TARGET_NYM] for op in ops))
+            txns = self.graphStore.getAddNymTxns(
+                *(op[TARGET_NYM] for op in ops))
+            return [self.nymReadResult(txns[op[TARGET_NYM]]) for op in ops]
+
+        results = self.getReadResults(operations, readMany)
+        # The serialized txn of each nym is reused as is
+        return {DATA: composeJsonObject(
+            (nym, fields[DATA] or json.dumps(None))
+            for nym, fields in zip(nyms, results))}
+
+    def readAttrsOfNyms(self, request: Request) -> dict:
+        attrName = request.operation[RAW]
+        nyms = sorted(set(request.operation[TARGETS]))
+        operations = [{TXN_TYPE: GET_ATTR, TARGET_NYM: nym, RAW: attrName}
+                      for nym in nyms]
+
+        def readMany(ops):
+            self.awaitGraphWrites(*(op[TARGET_NYM] for op in ops))
+            attrs = self.graphStore.getRawAttrsForNyms(
+                attrName, *(op[TARGET_NYM] for op in ops))
+            return [self.attrReadResult(attrName, attrs.get(op[TARGET_NYM]))
+                    for op in ops]
+
+        def serialize(fields):
+            if not fields:
+                return json.dumps(None)
+            return composeJsonObject([
+                (DATA, fields[DATA]),
+                (F.seqNo.name, json.dumps(fields[F.seqNo.name]))])
+
+        results = self.getReadResults(operations, readMany)
+        return {DATA: composeJsonObject(
+            (nym, serialize(fields)) for nym, fields in zip(nyms, results))}
+
+    def readIssuerKey(self, request: Request) -> dict:
+        def read():
+            self.awaitGraphWrites(request.operation[ORIGIN])
+            keys = self.graphStore.getIssuerKeys(request.operation[ORIGIN],
+                                                 request.operation[REF])
+            return {DATA: json.dumps(keys, sort_keys=True)}
+
+        return self.getReadResult(request.operation, read)
 
     def processRequest(self, request: Request, frm: str):
-        if request.operation[TXN_TYPE] == GET_NYM:
-            self.processGetNymReq(request, frm)
-        elif request.operation[TXN_TYPE] == GET_TXNS:
-            self.processGetTxnReq(request, frm)
-        elif request.operation[TXN_TYPE] == GET_CLAIM_DEF:
-            self.processGetClaimDefReq(request, frm)
-        elif request.operation[TXN_TYPE] == GET_ATTR:
-            self.processGetAttrsReq(request, frm)
-        elif request.operation[TXN_TYPE] == GET_ISSUER_KEY:
-            self.processGetIssuerKeyReq(request, frm)
+        handler = self.readHandlers.get(request.operation[TXN_TYPE])
+        if handler is None and self.groupCommitter and \
+                self.groupCommitter.isPending(request.key):
+            # Ordered already, the reply is sent once the txn is durable
+            self.requestSender[request.key] = frm
+            self.transmitToClient(RequestAck(*request.key), frm)
+        elif handler is None:
+            if self.admitWrite(request, frm):
+                super().processRequest(request, frm)
+        elif self.graphReads and handler.graphOnly:
+            self.graphReads.submit(self._processGraphRead, request, frm)
         else:
-            super().processRequest(request, frm)
+            self.processReadReq(request, frm)
+
+    def getWriteAdmission(self):
+        """
+        Token buckets limiting the write requests of clients, if configured
+        """
+        if self.config.WriteRateLimits:
+            return WriteAdmission(self.config.WriteRateLimits,
+                                  self.config.WriteRateLimitIdentifiers)
+
+    def admitWrite(self, request: Request, frm: str) -> bool:
+        """
+        Whether a write request is admitted, the client getting a REQNACK if
+        not. Requests being processed or replied to already are always
+        admitted so that retries get their reply.
+        """
+        if not self.writeAdmission or request.key in self.recentReplies or \
+                self.isProcessingReq(*request.key):
+            return True
+        reason = self.writeAdmission.admit(request.identifier,
+                                           self._roleForAdmission)
+        if reason is None:
+            return True
+        self.transmitToClient(RequestNack(*request.key, reason), frm)
+        return False
+
+    def _roleForAdmission(self, identifier):
+        state = self.idCache.getNymState(identifier)
+        return state.role if state else None
+
+    @property
+    def writeAdmissionStats(self) -> dict:
+        return self.writeAdmission.stats if self.writeAdmission else {}
 
     def storeTxnAndSendToClient(self, reply):
         """
@@ -556,10 +1010,20 @@ class Node(PlenumNode, HasPoolManager):
         """
         result = reply.result
         txnWithMerkleInfo = self.storeTxnInLedger(result)
-        self.sendReplyToClient(Reply(txnWithMerkleInfo),
-                               (result[f.IDENTIFIER.nm], result[f.REQ_ID.nm]))
+        key = (result[f.IDENTIFIER.nm], result[f.REQ_ID.nm])
+        if self.groupCommitter:
+            self.groupCommitter.defer(partial(self.sendTxnReply,
+                                              txnWithMerkleInfo, key), key)
+        else:
+            self.sendTxnReply(txnWithMerkleInfo, key)
         reply.result[F.seqNo.name] = txnWithMerkleInfo.get(F.seqNo.name)
         self.storeTxnInGraph(reply.result)
+        if self.ledgerTypeForTxn(result[TXN_TYPE]) == 1:
+            self.checkpointIfDue()
+
+    def sendTxnReply(self, txnWithMerkleInfo, key):
+        self.sendReplyToClient(Reply(txnWithMerkleInfo), key)
+        self.recentReplies.put(key, dict(txnWithMerkleInfo))
 
     @staticmethod
     def ledgerTypeForTxn(txnType: str):
@@ -573,49 +1037,56 @@ class Node(PlenumNode, HasPoolManager):
     def storeTxnInLedger(self, result):
         if result[TXN_TYPE] == ATTRIB:
             result = self.hashAttribTxn(result)
+        else:
+            result = dict(result)
         merkleInfo = self.appendResultToLedger(result)
+        self.merkleProofs.add(merkleInfo[F.seqNo.name], merkleInfo)
         result.update(merkleInfo)
         return result
 
     @staticmethod
     def hashAttribTxn(result):
-        # Creating copy of result so that `RAW`, `ENC` or `HASH` can be
-        # replaced by their hashes. We do not insert actual attribute data
-        # in the ledger but only the hash of it.
-        result = deepcopy(result)
-        if RAW in result:
-            result[RAW] = sha256(result[RAW].encode()).hexdigest()
-        elif ENC in result:
-            result[ENC] = sha256(result[ENC].encode()).hexdigest()
-        elif HASH in result:
-            result[HASH] = result[HASH]
-        else:
+        # `RAW`, `ENC` or `HASH` are replaced by their hashes in a copy of
+        # result. We do not insert actual attribute data in the ledger but
+        # only the hash of it.
+        txn = TxnView(result)
+        if txn.attribKey is None:
             error("Transaction missing required field")
-        return result
+        return txn.hashedAttrib().toDict()
 
     def storeTxnInGraph(self, result):
-        result = deepcopy(result)
         # Remove root hash and audit path from result if present since they can
         # be generated on the fly from the ledger so no need to store it
-        result.pop(F.rootHash.name, None)
-        result.pop(F.auditPath.name, None)
+        result = TxnView(result).without(F.rootHash.name, F.auditPath.name)
 
-        if result[TXN_TYPE] == NYM:
-            self.graphStore.addNymTxnToGraph(result)
-        elif result[TXN_TYPE] == ATTRIB:
-            self.graphStore.addAttribTxnToGraph(result)
-        elif result[TXN_TYPE] == CLAIM_DEF:
-            self.graphStore.addClaimDefTxnToGraph(result)
-        elif result[TXN_TYPE] == ISSUER_KEY:
-            self.graphStore.addIssuerKeyTxnToGraph(result)
+        if self.graphWriter:
+            self.graphWriter.add(result)
+        elif hasattr(self.graphStore, "batch"):
+            # The watermark is moved in the txn's own transaction
+            writeTxnsToGraph(self.graphStore, [result])
         else:
-            logger.debug("Got an unknown type {} to process".
-                         format(result[TXN_TYPE]))
+            addTxnToGraph(self.graphStore, result)
+            if result.get(F.seqNo.name) is not None:
+                self._graphWatermark = max(self._graphWatermark or 0,
+                                           result[F.seqNo.name])
+        if result[TXN_TYPE] == NYM:
+            self.idCache.onNymTxn(result)
+            if self.writeAdmission:
+                self.writeAdmission.onRoleChanged(result[TARGET_NYM],
+                                                  result.get(ROLE))
+        self.readCache.onTxn(result)
 
     def getReplyFor(self, request):
+        if self.groupCommitter and self.groupCommitter.isPending(request.key):
+            # Its txn is not durable yet
+            return None
+        recent = self.recentReplies.get(request.key)
+        if recent:
+            return Reply(dict(recent))
         typ = request.operation.get(TXN_TYPE)
         if typ in IDENTITY_TXN_TYPES:
-            result = self.secondaryStorage.getReply(request.identifier,
+            result = self.getPendingReply(request) or \
+                     self.secondaryStorage.getReply(request.identifier,
                                                     request.reqId,
                                                     type=request.operation[TXN_TYPE])
             if result:
@@ -627,6 +1098,36 @@ class Node(PlenumNode, HasPoolManager):
         if typ in CONFIG_TXN_TYPES:
             return self.getReplyFromLedger(self.configLedger, request)
 
+    def getPendingReply(self, request):
+        """
+        Reply for a request whose txn is not yet written to the graph
+        """
+        if not self.graphWriter:
+            return None
+        txn = self.graphWriter.getPendingTxn(
+            self.genTxnId(request.identifier, request.reqId))
+        if txn:
+            result = dict(txn)
+            result.update(self.merkleProofs.merkleInfo(txn[F.seqNo.name]))
+            return result
+
+    def onStopping(self, *args, **kwargs):
+        if self.graphReads:
+            self.graphReads.shutdown()
+            self.serviceGraphReads()
+        if self.sigVerifier:
+            for wrappedMsg, verified in self.sigVerifier.drain():
+                self._handleVerified(wrappedMsg, verified)
+            self.sigVerifier.stop()
+        if self.groupCommitter:
+            self.groupCommitter.service(force=True)
+        if self.checkpointer:
+            self.checkpointer.stop()
+        if self.graphWriter:
+            self.graphWriter.stop(self.config.GraphWriteFlushTimeout)
+        self.moveGraphWatermark()
+        super().onStopping(*args, **kwargs)
+
     def doCustomAction(self, ppTime: float, req: Request) -> None:
         """
         Execute the REQUEST sent to this Node
@@ -1,4 +1,4 @@
-import functools
+from typing import Dict, Optional
 
 from ledger.ledger import Ledger
 from plenum.common.exceptions import UnknownIdentifier
@@ -6,22 +6,62 @@ from plenum.common.txn import TARGET_NYM, VERKEY
 from plenum.server.client_authn import NaclAuthNr
 
 
+class PoolVerkeyIndex:
+    """
+    Latest verkey of each target nym of the pool ledger, `None` for nyms
+    none of whose txns has a verkey.
+
+    The index is built once and then only reads the txns appended to the
+    ledger since it last did, so verkeys rotated by later txns are picked
+    up on the next lookup.
+    """
+
+    def __init__(self, ledger: Ledger):
+        self.ledger = ledger
+        self._verkeys = {}  # type: Dict[str, Optional[str]]
+        # Sequence number of the last ledger txn indexed
+        self.indexedUpTo = 0
+
+    def update(self):
+        size = self.ledger.size
+        if size < self.indexedUpTo:
+            # The ledger was replaced, index it again
+            self._verkeys.clear()
+            self.indexedUpTo = 0
+        if size == self.indexedUpTo:
+            return
+        for seqNo, txn in self.ledger.getAllTxn(
+                frm=self.indexedUpTo + 1).items():
+            nym = txn.get(TARGET_NYM)
+            if nym is None:
+                continue
+            if txn.get(VERKEY):
+                self._verkeys[nym] = txn[VERKEY]
+            else:
+                self._verkeys.setdefault(nym, None)
+            self.indexedUpTo = max(self.indexedUpTo, int(seqNo))
+        self.indexedUpTo = max(self.indexedUpTo, size)
+
+    def __contains__(self, nym):
+        self.update()
+        return nym in self._verkeys
+
+    def getVerkey(self, nym) -> Optional[str]:
+        """
+        :raises KeyError: if no txn of the ledger targets `nym`
+        """
+        self.update()
+        return self._verkeys[nym]
+
+
 class NodeAuthNr(NaclAuthNr):
     def __init__(self, ledger: Ledger):
         self.ledger = ledger
+        self.verkeys = PoolVerkeyIndex(ledger)
 
-    @functools.lru_cache(maxsize=20)
     def getVerkey(self, identifier):
-        # TODO: This is very inefficient
-        verkey = None
-        found = False
-        for txn in self.ledger.getAllTxn().values():
-            if txn[TARGET_NYM] == identifier:
-                found = True
-                if txn.get(VERKEY):
-                    verkey = txn[VERKEY]
-
-        if not found:
+        try:
+            verkey = self.verkeys.getVerkey(identifier)
+        except KeyError:
             raise UnknownIdentifier(identifier)
-        verkey = verkey or identifier
-        return verkey
+        return verkey or identifier
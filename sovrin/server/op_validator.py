@@ -0,0 +1,211 @@
+import json
+import time
+from collections import defaultdict
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+from plenum.common.exceptions import InvalidClientRequest
+
+from sovrin.common.metrics import LatencyHistogram
+from sovrin.common.txn import TXN_TYPE, TARGET_NYM, ROLE, RAW, NYM, \
+    ATTRIB, GET_TXNS, GET_NYMS, GET_ATTRS, POOL_UPGRADE, ACTION, START, \
+    CANCEL, PAGE_SIZE, TARGETS, allOpKeys, reqOpKeys, validTxnTypes, fields
+from sovrin.server.auth import Authoriser
+
+# A check of an operation sent by an identifier, giving why the operation
+# is not valid or `None` if it is
+Check = Callable[[str, dict], Optional[str]]
+
+# Txn types whose entry in `fields` is checked. Their required keys must
+# have a value and, for the types in `exclusiveFields`, exactly one of the
+# optional keys must be present.
+checkedFields = (NYM, ATTRIB)
+exclusiveFields = (ATTRIB, )
+
+
+def requiredKeysCheck(keys: Iterable[str]) -> Check:
+    keys = tuple(keys)
+
+    def check(identifier, operation):
+        for key in keys:
+            if not operation.get(key):
+                return "{} needs to be present".format(key)
+    return check
+
+
+def exclusiveKeysCheck(txnType: str, keys: Iterable[str]) -> Check:
+    keys = tuple(keys)
+    error = "{} should have one and only one of {}".format(txnType,
+                                                          ", ".join(keys))
+
+    def check(identifier, operation):
+        if sum(1 for key in keys if key in operation) != 1:
+            return error
+    return check
+
+
+def checkRawIsJson(identifier, operation):
+    if RAW in operation:
+        try:
+            json.loads(operation[RAW])
+        except:
+            return "raw attribute {} should be JSON".format(operation[RAW])
+
+
+def checkRole(identifier, operation):
+    role = operation.get(ROLE)
+    if not Authoriser.isValidRole(role):
+        return "{} not a valid role".format(role)
+
+
+def checkPageSize(identifier, operation):
+    if PAGE_SIZE in operation:
+        pageSize = operation[PAGE_SIZE]
+        if not isinstance(pageSize, int) or pageSize < 1:
+            return "{} should be a positive integer".format(PAGE_SIZE)
+
+
+def targetsCheck(maxTargets: int) -> Check:
+    def check(identifier, operation):
+        targets = operation.get(TARGETS)
+        if not targets or not isinstance(targets, list):
+            return "{} should be a non empty list".format(TARGETS)
+        if len(targets) > maxTargets:
+            return "{} can have at most {} {}".format(operation[TXN_TYPE],
+                                                      maxTargets, TARGETS)
+    return check
+
+
+def checkGetAttrsRaw(identifier, operation):
+    if not operation.get(RAW):
+        return "{} needs {} to be present".format(GET_ATTRS, RAW)
+
+
+def checkUpgradeAction(identifier, operation):
+    action = operation.get(ACTION)
+    if action not in (START, CANCEL):
+        return "{} not a valid action".format(action)
+
+
+class OperationValidator:
+    """
+    Validation of the operations of client requests, with the checks of each
+    txn type put together once instead of on every request.
+
+    The checks of the operation alone run first, so a malformed request is
+    rejected without reading the node's state. The checks reading the
+    state, like whether a nym exists in the graph, are added by the node
+    with `addStateCheck` and run after them.
+    """
+
+    def __init__(self, maxReadTargets: int):
+        self.allowedKeys = frozenset(allOpKeys)
+        self.requiredKeys = frozenset(reqOpKeys)
+        self.structureChecks = self.compile(maxReadTargets)
+        self.stateChecks = defaultdict(list)  # type: Dict[str, List[Check]]
+        self.structureLatency = defaultdict(LatencyHistogram)
+        self.stateLatency = defaultdict(LatencyHistogram)
+        self.rejected = defaultdict(int)
+
+    @staticmethod
+    def compile(maxReadTargets: int) -> Dict[str, List[Check]]:
+        checks = {typ: [] for typ in validTxnTypes}
+        for typ in checkedFields:
+            required, optional = fields[typ]
+            if required:
+                checks[typ].append(requiredKeysCheck(required))
+            if typ in exclusiveFields:
+                checks[typ].append(exclusiveKeysCheck(typ, optional))
+        checks[NYM].append(checkRole)
+        checks[ATTRIB].append(checkRawIsJson)
+        checks[GET_TXNS].append(checkPageSize)
+        for typ in (GET_NYMS, GET_ATTRS):
+            checks[typ].append(targetsCheck(maxReadTargets))
+        checks[GET_ATTRS].append(checkGetAttrsRaw)
+        checks[POOL_UPGRADE].append(checkUpgradeAction)
+        return checks
+
+    def addStateCheck(self, txnType: str, check: Check):
+        self.stateChecks[txnType].append(check)
+
+    def validate(self, identifier, reqId, operation: dict):
+        """
+        :raises InvalidClientRequest: if the operation is not valid
+        """
+        self.checkStructure(identifier, reqId, operation)
+        self.checkState(identifier, reqId, operation)
+
+    def checkStructure(self, identifier, reqId, operation: dict):
+        start = time.perf_counter()
+        keys = operation.keys()
+        unknownKeys = keys - self.allowedKeys
+        if unknownKeys:
+            self._reject(identifier, reqId, None,
+                         'invalid keys "{}"'.format(",".join(unknownKeys)))
+        missingKeys = self.requiredKeys - keys
+        if missingKeys:
+            self._reject(identifier, reqId, None,
+                         'missing required keys "{}"'.
+                         format(",".join(missingKeys)))
+        typ = operation[TXN_TYPE]
+        checks = self.structureChecks.get(typ) \
+            if isinstance(typ, str) else None
+        if checks is None and isinstance(typ, str) and typ in validTxnTypes:
+            # A txn type added since, like the read requests of plugins
+            checks = self.structureChecks.setdefault(typ, [])
+        if checks is None:
+            self._reject(identifier, reqId, None,
+                         'invalid {}: {}'.format(TXN_TYPE, typ))
+        self._run(checks, identifier, reqId, operation, start,
+                  self.structureLatency[typ])
+
+    def checkState(self, identifier, reqId, operation: dict):
+        typ = operation[TXN_TYPE]
+        checks = self.stateChecks.get(typ)
+        if checks:
+            self._run(checks, identifier, reqId, operation,
+                      time.perf_counter(), self.stateLatency[typ])
+
+    def _run(self, checks: List[Check], identifier, reqId, operation,
+             start: float, latency: LatencyHistogram):
+        for check in checks:
+            error = check(identifier, operation)
+            if error:
+                latency.observe(time.perf_counter() - start)
+                self._reject(identifier, reqId, operation[TXN_TYPE], error)
+        latency.observe(time.perf_counter() - start)
+
+    def _reject(self, identifier, reqId, typ, error):
+        self.rejected[typ] += 1
+        raise InvalidClientRequest(identifier, reqId, error)
+
+    @staticmethod
+    def nymsToLookUp(identifier, operation) -> Set[str]:
+        """
+        Nyms whose state the state checks and the authorisation of an
+        operation read, for looking them all up at once for a batch of
+        requests
+        """
+        if not isinstance(operation, dict):
+            return set()
+        typ = operation.get(TXN_TYPE)
+        if typ == NYM:
+            nyms = {identifier, operation.get(TARGET_NYM)}
+        elif typ == ATTRIB:
+            nyms = {operation.get(TARGET_NYM)}
+        else:
+            return set()
+        return {nym for nym in nyms if nym and isinstance(nym, str)}
+
+    @property
+    def stats(self) -> dict:
+        """
+        Latency of the structure and state checks per txn type, and the
+        requests rejected per txn type, under `None` for those rejected
+        before their txn type was known to be valid
+        """
+        return {
+            "structure": {typ: h.stats for typ, h in
+                          self.structureLatency.items()},
+            "state": {typ: h.stats for typ, h in self.stateLatency.items()},
+            "rejected": dict(self.rejected)
+        }
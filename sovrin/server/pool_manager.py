@@ -27,7 +27,7 @@ class TxnPoolManager(PTxnPoolManager):
         operation = request.operation
         nodeNym = operation.get(TARGET_NYM)
         isSteward = self.node.secondaryStorage.isSteward(origin)
-        actorRole = self.node.graphStore.getRole(origin)
+        actorRole = self.node.idCache.getRole(origin)
         _, nodeInfo = self.getNodeInfoFromLedger(nodeNym, excludeLast=False)
         typ = operation.get(TXN_TYPE)
         data = deepcopy(operation.get(DATA))
@@ -0,0 +1,101 @@
+import threading
+from typing import Optional, List
+
+from plenum.common.txn import TXN_TYPE, TARGET_NYM, DATA, NAME, VERSION, \
+    RAW, ORIGIN
+from plenum.common.types import f
+
+from sovrin.common.cache import LRUCache
+from sovrin.common.txn import NYM, ATTRIB, CLAIM_DEF, ISSUER_KEY, REF, \
+    GET_NYM, GET_ATTR, GET_CLAIM_DEF, GET_ISSUER_KEY
+from sovrin.common.util import rawAttrName
+
+
+class ReadReplyCache:
+    """
+    Bounded cache of the result fields (like the serialized `DATA`) of
+    replies to graph reads, keyed by (txn type, target, query args).
+
+    Each write txn invalidates exactly the reads whose answer it can
+    change, see `keysForTxn`. Reads may be answered by several threads, a
+    read started before an invalidation is not cached, see `version`.
+    """
+
+    def __init__(self, maxSize: int, maxBytes: int):
+        self._cache = LRUCache(maxSize, maxWeight=maxBytes,
+                               weigher=self.sizeOf)
+        self._lock = threading.Lock()
+        # Incremented on every invalidation
+        self.version = 0
+
+    @staticmethod
+    def sizeOf(fields: dict) -> int:
+        return sum(len(str(v)) for v in fields.values())
+
+    @staticmethod
+    def keyForRead(operation) -> Optional[tuple]:
+        typ = operation.get(TXN_TYPE)
+        if typ == GET_NYM:
+            return GET_NYM, operation[TARGET_NYM]
+        if typ == GET_ATTR:
+            return GET_ATTR, operation[TARGET_NYM], operation[RAW]
+        if typ == GET_CLAIM_DEF:
+            return GET_CLAIM_DEF, operation[TARGET_NYM], \
+                   operation[DATA][NAME], operation[DATA][VERSION]
+        if typ == GET_ISSUER_KEY:
+            return GET_ISSUER_KEY, operation[ORIGIN], str(operation[REF])
+        return None
+
+    @staticmethod
+    def keysForTxn(txn) -> List[tuple]:
+        typ = txn.get(TXN_TYPE)
+        if typ == NYM:
+            return [(GET_NYM, txn[TARGET_NYM])]
+        if typ == ATTRIB:
+            # Only raw attributes of a nym can be read, attributes without
+            # a target are not read by any GET_ATTR
+            if txn.get(RAW) and txn.get(TARGET_NYM):
+                return [(GET_ATTR, txn[TARGET_NYM], rawAttrName(txn[RAW]))]
+            return []
+        if typ == CLAIM_DEF:
+            data = txn.get(DATA)
+            return [(GET_CLAIM_DEF, txn[f.IDENTIFIER.nm], data.get(NAME),
+                     data.get(VERSION))]
+        if typ == ISSUER_KEY:
+            return [(GET_ISSUER_KEY, txn[f.IDENTIFIER.nm], str(txn[REF]))]
+        return []
+
+    def get(self, operation) -> Optional[dict]:
+        key = self.keyForRead(operation)
+        if key is None:
+            return None
+        with self._lock:
+            return self._cache.get(key)
+
+    def put(self, operation, fields: dict, version: int=None):
+        """
+        Cache `fields` for `operation`, unless a write invalidated reads
+        since `version` was read
+        """
+        key = self.keyForRead(operation)
+        if key is not None:
+            with self._lock:
+                if version is None or version == self.version:
+                    self._cache.put(key, fields)
+
+    def onTxn(self, txn):
+        keys = self.keysForTxn(txn)
+        with self._lock:
+            self.version += 1
+            for key in keys:
+                self._cache.pop(key)
+
+    def clear(self):
+        with self._lock:
+            self.version += 1
+            self._cache.clear()
+
+    @property
+    def stats(self) -> dict:
+        with self._lock:
+            return self._cache.stats
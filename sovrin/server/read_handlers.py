@@ -0,0 +1,81 @@
+import threading
+import time
+from collections import defaultdict
+from functools import partial
+from typing import Callable, Dict, NamedTuple, Optional
+
+from sovrin.common.metrics import LatencyHistogram
+from sovrin.common.txn import validTxnTypes
+
+ReadHandler = NamedTuple("ReadHandler", [
+    # Gives the fields of the result of the reply to a request
+    ("handler", Callable),
+    # Whether the handler only reads the identity graph, and so can answer
+    # requests on the threads answering graph reads
+    ("graphOnly", bool)
+])
+
+# Read handlers registered by plugins, by txn type
+pluginReadHandlers = {}  # type: Dict[str, ReadHandler]
+
+
+def registerReadHandler(txnType: str, handler: Callable,
+                        graphOnly: bool=True):
+    """
+    Have nodes answer requests of `txnType` with `handler(node, request)`,
+    which gives the fields of the result of the reply. For plugins in
+    `PluginsToLoad` to add read requests with.
+    """
+    pluginReadHandlers[txnType] = ReadHandler(handler, graphOnly)
+    validTxnTypes.add(txnType)
+
+
+class ReadHandlers:
+    """
+    Handlers of the read requests of a node by txn type, counting the
+    requests of each type and how long they take to answer
+    """
+
+    def __init__(self, node):
+        self.node = node
+        self.handlers = {}  # type: Dict[str, ReadHandler]
+        self.counts = defaultdict(int)
+        self.failures = defaultdict(int)
+        self.latency = defaultdict(LatencyHistogram)
+        # Handlers run on the node's thread and on the graph read threads
+        self._lock = threading.Lock()
+
+    def register(self, txnType: str, handler: Callable[..., dict],
+                 graphOnly: bool=True):
+        self.handlers[txnType] = ReadHandler(handler, graphOnly)
+
+    def get(self, txnType) -> Optional[ReadHandler]:
+        handler = self.handlers.get(txnType)
+        if handler is None and txnType in pluginReadHandlers:
+            plugin = pluginReadHandlers[txnType]
+            handler = ReadHandler(partial(plugin.handler, self.node),
+                                  plugin.graphOnly)
+            self.handlers[txnType] = handler
+        return handler
+
+    def handle(self, txnType: str, request) -> dict:
+        start = time.perf_counter()
+        failed = True
+        try:
+            fields = self.get(txnType).handler(request)
+            failed = False
+            return fields
+        finally:
+            with self._lock:
+                self.counts[txnType] += 1
+                if failed:
+                    self.failures[txnType] += 1
+                self.latency[txnType].observe(time.perf_counter() - start)
+
+    @property
+    def stats(self) -> dict:
+        with self._lock:
+            return {typ: {"count": self.counts[typ],
+                          "failed": self.failures[typ],
+                          "latency": self.latency[typ].stats}
+                    for typ in self.counts}
@@ -0,0 +1,106 @@
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Callable, Iterator, Optional, Tuple
+
+import base58
+from plenum.common.log import getlogger
+from plenum.common.verifier import DidVerifier
+
+from sovrin.common.metrics import LatencyHistogram
+
+logger = getlogger()
+
+
+def verifySig(verkey: str, identifier: str, signature: str,
+              serialized: bytes) -> bool:
+    """
+    Whether `signature`, base58 encoded, is a signature of `serialized` by
+    `identifier` with verification key `verkey`. The ed25519 verification
+    releases the GIL so this can run on several threads at once.
+    """
+    try:
+        sig = base58.b58decode(signature)
+        return bool(DidVerifier(verkey, identifier=identifier).
+                    verify(sig, serialized))
+    except Exception as ex:
+        logger.debug("Could not verify signature of {}: {}".
+                     format(identifier, ex))
+        return False
+
+
+class RequestVerifier:
+    """
+    Verifies the signatures of client messages on `workers` threads and
+    hands the messages back in the order they were submitted.
+
+    A message is submitted with the verification to run for it, or `None`
+    if it is not verified here. The node gets each message back from
+    `ready` with whether it was verified, once it and all the messages
+    submitted before it are done.
+    """
+
+    def __init__(self, workers: int):
+        assert workers > 0, "workers should be positive, got {}".\
+            format(workers)
+        self.executor = ThreadPoolExecutor(workers)
+        # (message, future or None, time submitted) in submission order
+        self._pending = deque()
+        self.submitted = 0
+        self.verified = 0
+        self.failed = 0
+        self.latency = LatencyHistogram()
+
+    def submit(self, msg, verify: Optional[Callable[[], bool]]):
+        future = None
+        if verify is not None:
+            future = self.executor.submit(verify)
+            self.submitted += 1
+        self._pending.append((msg, future, time.perf_counter()))
+
+    def ready(self) -> Iterator[Tuple[object, bool]]:
+        """
+        Messages done in the order they were submitted, each with whether
+        its signature was verified
+        """
+        while self._pending and (self._pending[0][1] is None or
+                                 self._pending[0][1].done()):
+            msg, future, start = self._pending.popleft()
+            yield msg, self._outcome(future, start)
+
+    def _outcome(self, future: Optional[Future], start: float) -> bool:
+        if future is None:
+            return False
+        self.latency.observe(time.perf_counter() - start)
+        if future.exception() is None and future.result():
+            self.verified += 1
+            return True
+        self.failed += 1
+        return False
+
+    def drain(self) -> Iterator[Tuple[object, bool]]:
+        """
+        All the messages submitted, waiting for their verification
+        """
+        while self._pending:
+            msg, future, start = self._pending.popleft()
+            if future is not None:
+                future.exception()
+            yield msg, self._outcome(future, start)
+
+    def stop(self):
+        self.executor.shutdown()
+
+    @property
+    def pendingCount(self) -> int:
+        return len(self._pending)
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "submitted": self.submitted,
+            "verified": self.verified,
+            "failed": self.failed,
+            "pending": self.pendingCount,
+            "latency": self.latency.stats
+        }
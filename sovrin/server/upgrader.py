@@ -2,7 +2,7 @@ import os
 from collections import deque
 from datetime import datetime
 from functools import partial
-from typing import Tuple, Union, Optional
+from typing import Tuple, Union, Optional, Dict, List
 
 import dateutil.parser
 import dateutil.tz
@@ -37,35 +37,74 @@ class Upgrader(HasActionQueue):
         else:
             self.removeNextVersionFile()
         self.scheduledUpgrade = None    # type: Tuple[str, int]
+
+        # Latest action of each (name, version) in the config ledger
+        self._actions = {}  # type: Dict[Tuple[str, str], str]
+        # Schedules of the upgrades to versions higher than the current one
+        # started and not cancelled, in ledger order per version
+        self._pendingSchedules = {}  # type: Dict[str, List[dict]]
+        # Sequence number of the last config ledger txn indexed
+        self.indexedUpTo = 0
         HasActionQueue.__init__(self)
 
     def service(self):
         return self._serviceActions()
 
-    def processLedger(self):
-        # Assumption: Only version is enough to identify a release, no hash
-        # checking is done
+    def indexLedger(self):
+        """
+        Index the config ledger txns appended since it was last indexed
+        """
+        size = self.ledger.size
+        if size < self.indexedUpTo:
+            # The ledger was replaced, index it again
+            self._actions.clear()
+            self._pendingSchedules.clear()
+            self.indexedUpTo = 0
+        if size == self.indexedUpTo:
+            return
         currentVer = self.getVersion()
-        upgrades = {}   # Map of version to scheduled time
-        for txn in self.ledger.getAllTxn().values():
-            if txn[TXN_TYPE] == POOL_UPGRADE:
-                if txn[ACTION] == START:
-                    if self.isVersionHigher(currentVer, txn[VERSION]):
-                        if self.nodeId not in txn[SCHEDULE]:
-                            logger.warn('{} not present in schedule {}'.
-                                        format(self.nodeId, txn[SCHEDULE]))
-                        else:
-                            upgrades[txn[VERSION]] = txn[SCHEDULE][self.nodeId]
-                elif txn[ACTION] == CANCEL:
-                    if txn[VERSION] not in upgrades:
-                        logger.warn('{} encountered before {}'.
-                                    format(CANCEL, START))
-                    else:
-                        upgrades.pop(txn[VERSION])
+        for seqNo, txn in self.ledger.getAllTxn(
+                frm=self.indexedUpTo + 1).items():
+            self.indexedUpTo = max(self.indexedUpTo, int(seqNo))
+            if NAME in txn and VERSION in txn:
+                self._actions[(txn[NAME], txn[VERSION])] = txn.get(ACTION)
+            if txn.get(TXN_TYPE) != POOL_UPGRADE:
+                continue
+            # Assumption: Only version is enough to identify a release, no
+            # hash checking is done
+            if txn[ACTION] == START:
+                if self.isVersionHigher(currentVer, txn[VERSION]):
+                    self._pendingSchedules.setdefault(txn[VERSION], []).\
+                        append(txn[SCHEDULE])
+            elif txn[ACTION] == CANCEL:
+                if txn[VERSION] not in self._pendingSchedules:
+                    logger.warn('{} encountered before {}'.
+                                format(CANCEL, START))
                 else:
-                    logger.error('{} cannot be {}'.format(ACTION, txn[ACTION]))
+                    self._pendingSchedules.pop(txn[VERSION])
+            else:
+                logger.error('{} cannot be {}'.format(ACTION, txn[ACTION]))
+        self.indexedUpTo = max(self.indexedUpTo, size)
 
-        upgrades = sorted(upgrades.items(),
+    @property
+    def pendingUpgrades(self) -> Dict[str, str]:
+        """
+        Time of each upgrade of this node to a version higher than the
+        current one started and not cancelled
+        """
+        self.indexLedger()
+        upgrades = {}
+        for version, schedules in self._pendingSchedules.items():
+            for schedule in schedules:
+                if self.nodeId not in schedule:
+                    logger.warn('{} not present in schedule {}'.
+                                format(self.nodeId, schedule))
+                else:
+                    upgrades[version] = schedule[self.nodeId]
+        return upgrades
+
+    def processLedger(self):
+        upgrades = sorted(self.pendingUpgrades.items(),
                           key=lambda x: self.getNumericValueOfVersion(x[0]),
                           reverse=True)
         if upgrades:
@@ -162,16 +201,11 @@ class Upgrader(HasActionQueue):
         return True, ''
 
     def statusInLedger(self, name, version):
-        t = {}
-        for txn in self.ledger.getAllTxn().values():
-            if txn[NAME] == name and txn[VERSION] == version:
-                t = txn
-        if not t:
-            return None
-        else:
-            return t[ACTION]
+        self.indexLedger()
+        return self._actions.get((name, version))
 
     def handleUpgradeTxn(self, txn):
+        self.indexLedger()
         if txn[TXN_TYPE] == POOL_UPGRADE:
             if txn[ACTION] == START:
                 if self.nodeId not in txn[SCHEDULE]:
@@ -0,0 +1,101 @@
+import base64
+import json
+import os
+from collections import OrderedDict
+
+from ledger.compact_merkle_tree import CompactMerkleTree
+from ledger.util import F
+
+
+class FakeStore:
+    """
+    Store appending to a file, kept where `storeFiles` finds the file of a
+    ledger's file store
+    """
+
+    def __init__(self, path):
+        self._dbFile = open(path, "a+")
+
+    def append(self, data: str):
+        self._dbFile.write(data + "\n")
+
+
+class FakeFileHashStore:
+    """
+    Hash store keeping the hashes of a tree in memory and appending them to
+    node and leaf files too, like a file hash store
+    """
+
+    def __init__(self, dataDir: str):
+        self._hashes = CompactMerkleTree().hashStore
+        self.nodesFile = FakeStore(os.path.join(dataDir, "_merkleNodes"))
+        self.leavesFile = FakeStore(os.path.join(dataDir, "_merkleLeaves"))
+
+    def __getattr__(self, name):
+        return getattr(self._hashes, name)
+
+    def writeLeaf(self, leafHash):
+        self._hashes.writeLeaf(leafHash)
+        self.leavesFile.append(leafHash.hex())
+
+    def writeNode(self, node):
+        self._hashes.writeNode(node)
+        self.nodesFile.append(repr(node))
+
+
+class FakeLedger:
+    """
+    Ledger of txns kept in memory with a merkle tree of them, recording the
+    sequence numbers its txns are read from and the most txns read at once.
+
+    Given `dataDir`, txns are also appended to a transaction log file there,
+    one JSON per line, and the hashes of the tree to hash store files, for
+    the code flushing or copying the files of ledgers.
+    """
+
+    def __init__(self, txns=(), dataDir: str=None):
+        self.txns = []
+        self.reads = []
+        self.largestRead = 0
+        self.proofsComputed = []
+        self.tree = CompactMerkleTree(
+            hashStore=FakeFileHashStore(dataDir) if dataDir else None)
+        self._transactionLog = FakeStore(
+            os.path.join(dataDir, "transactions")) if dataDir else None
+        for txn in txns:
+            self.add(txn)
+
+    @property
+    def size(self):
+        return len(self.txns)
+
+    @staticmethod
+    def serialize(txn) -> str:
+        return json.dumps(txn, sort_keys=True)
+
+    @staticmethod
+    def hashToStr(h):
+        return base64.b64encode(h).decode()
+
+    def add(self, txn):
+        self.txns.append(txn)
+        data = self.serialize(txn)
+        self.tree.append(data.encode())
+        if self._transactionLog:
+            self._transactionLog.append(data)
+
+    def getAllTxn(self, frm=1, to=None):
+        to = to or self.size
+        self.reads.append(frm)
+        self.largestRead = max(self.largestRead, to - frm + 1)
+        return OrderedDict((seqNo, dict(txn)) for seqNo, txn in
+                           enumerate(self.txns[frm - 1:to], frm))
+
+    def merkleInfo(self, seqNo):
+        self.proofsComputed.append(seqNo)
+        return {
+            F.rootHash.name: self.hashToStr(
+                self.tree.merkle_tree_hash(0, seqNo)),
+            F.auditPath.name: [self.hashToStr(h) for h in
+                               self.tree.inclusion_proof(seqNo - 1, seqNo)]
+        }
@@ -0,0 +1,20 @@
+from hashlib import sha256
+
+from sovrin.persistence.blob_store import BlobStore
+
+
+def testBlobsStoredOnceByHash(tmpdir):
+    store = BlobStore(str(tmpdir), mmapSize=64)
+    small = '{"name": "Alice"}'
+    large = '{"photo": "' + "ab" * 100 + '"}'
+    key = store.put(small)
+    assert key == sha256(small.encode()).hexdigest()
+    assert store.path(key).startswith(str(tmpdir.join(key[:2], key[2:4])))
+    # The same value for another nym is not stored again
+    assert store.put(small) == key
+    assert len(tmpdir.join(key[:2], key[2:4]).listdir()) == 1
+
+    assert store.get(key) == small
+    assert store.get(store.put(large)) == large
+    assert store.has(key)
+    assert store.get("0" * 64) is None
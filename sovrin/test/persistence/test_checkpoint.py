@@ -0,0 +1,60 @@
+import os
+
+from ledger.util import F
+from plenum.common.txn import TXN_TYPE
+
+from sovrin.common.txn import NYM, TARGET_NYM, TXN_ID, ROLE, SPONSOR
+from sovrin.persistence.blob_store import BlobStore
+from sovrin.persistence.checkpoint import Checkpointer, loadCheckpoint, \
+    listCheckpoints
+from sovrin.persistence.identity_graph_sqlite import IdentityGraphSqlite
+from sovrin.test.fake_ledger import FakeLedger
+
+
+def testCheckpointLoadedByNewNode(tmpdir):
+    dataDir = str(tmpdir.mkdir("node"))
+    ledger = FakeLedger(dataDir=dataDir)
+    graph = IdentityGraphSqlite(dataDir)
+    ledger.add("txn1")
+    rootHash = ledger.hashToStr(ledger.tree.root_hash)
+    graph.addNymTxnToGraph({TXN_TYPE: NYM, TARGET_NYM: "user", ROLE: SPONSOR,
+                            TXN_ID: "n1", F.seqNo.name: 1})
+    graph.setLastSeqNo(1)
+    blobStore = BlobStore(os.path.join(dataDir, "attributes"))
+    key = blobStore.put('{"photo": "abcd"}')
+    # Files of the data directory other than the ledgers and blobs, like
+    # those rewritten in place, are not in checkpoints
+    with open(os.path.join(dataDir, "last_version"), "w") as f:
+        f.write("0.1")
+    checkpointDir = str(tmpdir.join("checkpoints"))
+    checkpointer = Checkpointer(dataDir, {"domain": ledger}, graph,
+                                checkpointDir, keep=1, blobStore=blobStore,
+                                snapshotPages=1)
+    written = checkpointer.create()
+    # Txns appended while the checkpoint is written are not in it
+    ledger.add("txn2")
+    graph.addNymTxnToGraph({TXN_TYPE: NYM, TARGET_NYM: "user2",
+                            TXN_ID: "n2", F.seqNo.name: 2})
+    graph.setLastSeqNo(2)
+    path = written.result()
+    checkpointer.stop()
+    assert listCheckpoints(checkpointDir) == [path]
+    assert checkpointer.lastSeqNo == 1
+    # A restarted node counts the txns since the last checkpoint it took
+    assert Checkpointer(dataDir, {"domain": ledger}, graph,
+                        checkpointDir).lastSeqNo == 1
+
+    newDataDir = str(tmpdir.join("newNode"))
+    manifest = loadCheckpoint(path, newDataDir)
+    assert manifest["ledgers"]["domain"] == {"size": 1, "rootHash": rootHash}
+    assert manifest["graph"]["lastSeqNo"] == 1
+    with open(os.path.join(newDataDir, "transactions")) as f:
+        assert f.read() == ledger.serialize("txn1") + "\n"
+    assert not os.path.exists(os.path.join(newDataDir, "last_version"))
+    assert BlobStore(os.path.join(newDataDir, "attributes")).has(key)
+    newGraph = IdentityGraphSqlite(newDataDir)
+    assert newGraph.hasNym("user")
+    assert not newGraph.hasNym("user2")
+    assert newGraph.getLastSeqNo() == 1
+    newGraph.close()
+    graph.close()
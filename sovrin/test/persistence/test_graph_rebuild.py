@@ -0,0 +1,71 @@
+import json
+
+import pytest
+from ledger.util import F
+from plenum.common.txn import TXN_TYPE, DATA, NAME, VERSION, RAW, VERKEY
+from plenum.common.types import f
+
+from sovrin.common.txn import NYM, TARGET_NYM, TXN_ID, ROLE, STEWARD, \
+    SPONSOR, ATTRIB, CLAIM_DEF, ISSUER_KEY, REF, ATTR_NAMES
+from sovrin.persistence.graph_rebuild import GraphRebuilder
+from sovrin.persistence.graph_writer import writeTxnsToGraph
+from sovrin.persistence.identity_graph_sqlite import IdentityGraphSqlite
+from sovrin.test.fake_ledger import FakeLedger
+
+
+@pytest.fixture(scope="module")
+def ledger():
+    txns = [{TXN_TYPE: NYM, TARGET_NYM: "steward", ROLE: STEWARD,
+             TXN_ID: "t0"}]
+    for i in range(1, 200):
+        sponsor = "sponsor{}".format(i % 5)
+        if i < 5:
+            txns.append({TXN_TYPE: NYM, TARGET_NYM: sponsor, ROLE: SPONSOR,
+                         TXN_ID: "t{}".format(i), f.IDENTIFIER.nm: "steward"})
+        elif i % 3 == 0:
+            txns.append({TXN_TYPE: ATTRIB, TARGET_NYM: "user{}".format(i - 1),
+                         RAW: json.dumps({"endpoint": str(i)}),
+                         TXN_ID: "t{}".format(i), f.IDENTIFIER.nm: sponsor})
+        elif i % 7 == 0:
+            # Key rotation of an earlier nym
+            txns.append({TXN_TYPE: NYM, TARGET_NYM: "user{}".format(i - 2),
+                         VERKEY: "~rotated{}".format(i),
+                         TXN_ID: "t{}".format(i), f.IDENTIFIER.nm: sponsor})
+        else:
+            txns.append({TXN_TYPE: NYM, TARGET_NYM: "user{}".format(i),
+                         VERKEY: "~key{}".format(i),
+                         TXN_ID: "t{}".format(i), f.IDENTIFIER.nm: sponsor})
+    txns.append({TXN_TYPE: CLAIM_DEF, TXN_ID: "c1",
+                 f.IDENTIFIER.nm: "sponsor1",
+                 DATA: {NAME: "GVT", VERSION: "1.0", ATTR_NAMES: "name"}})
+    txns.append({TXN_TYPE: ISSUER_KEY, TXN_ID: "k1",
+                 f.IDENTIFIER.nm: "sponsor1", REF: 201, DATA: {"N": "1"}})
+    return FakeLedger(txns)
+
+
+def graphContents(graph):
+    return (graph._all("select * from nym order by nym"),
+            graph._all("select * from txn order by seqNo"))
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def testBulkRebuildMatchesReplay(ledger, tmpdir, workers):
+    replayed = IdentityGraphSqlite(str(tmpdir.mkdir("replayed")))
+    for seqNo, txn in ledger.getAllTxn().items():
+        txn[F.seqNo.name] = seqNo
+        writeTxnsToGraph(replayed, [txn])
+
+    rebuilt = IdentityGraphSqlite(str(tmpdir.mkdir("rebuilt")))
+    # Part of the ledger is already in the graph
+    writeTxnsToGraph(rebuilt, [dict(ledger.getAllTxn()[1], **{
+        F.seqNo.name: 1})])
+    rebuilder = GraphRebuilder(rebuilt, chunkSize=16, workers=workers)
+    ledger.largestRead = 0
+    assert rebuilder.rebuild(ledger, frm=2) == ledger.size - 1
+    assert ledger.largestRead == 16
+
+    assert [tuple(r) for t in graphContents(rebuilt) for r in t] == \
+        [tuple(r) for t in graphContents(replayed) for r in t]
+    assert rebuilt.getLastSeqNo() == ledger.size
+    assert rebuilt.getNym("user5").oRecordData[VERKEY] == "~rotated7"
+    assert rebuilt.getSponsorFor("user5") == "sponsor0"
@@ -0,0 +1,143 @@
+import pytest
+from ledger.util import F
+from plenum.common.types import f
+
+from sovrin.common.txn import NYM, TARGET_NYM, TXN_ID, ROLE, STEWARD, \
+    SPONSOR, TXN_TYPE
+from sovrin.persistence.graph_writer import GraphWriter, GraphWriteError, \
+    writeTxnsToGraph
+from sovrin.persistence.identity_graph_sqlite import IdentityGraphSqlite
+from sovrin.server.identity_cache import IdentityCache
+
+
+def nymTxn(seqNo, nym, role=None, frm=None):
+    return {TXN_TYPE: NYM, TARGET_NYM: nym, ROLE: role,
+            TXN_ID: "t{}".format(seqNo), f.IDENTIFIER.nm: frm,
+            F.seqNo.name: seqNo}
+
+
+@pytest.fixture()
+def graph(tmpdir):
+    g = IdentityGraphSqlite(str(tmpdir))
+    g.addNymTxnToGraph(nymTxn(1, "steward", STEWARD))
+    return g
+
+
+def testTxnsWrittenInBatches(graph, tmpdir):
+    writer = GraphWriter(IdentityGraphSqlite(str(tmpdir)), batchSize=10,
+                         flushInterval=60)
+    for i in range(2, 22):
+        writer.add(nymTxn(i, "nym{}".format(i), frm="steward"))
+    writer.flush()
+    assert writer.pendingCount == 0
+    assert writer.txnsWritten == 20
+    assert writer.batchesWritten == 2
+    assert graph.getSponsorFor("nym21") == "steward"
+    assert graph.getLastSeqNo() == 21
+    writer.stop()
+
+
+def testPendingTxnsVisibleBeforeFlush(graph, tmpdir):
+    writer = GraphWriter(IdentityGraphSqlite(str(tmpdir)), batchSize=100,
+                         flushInterval=60)
+    cache = IdentityCache(graph, 10, pendingWrites=writer)
+    writer.add(nymTxn(2, "sponsor", SPONSOR, frm="steward"))
+    writer.add(nymTxn(3, "steward", None, frm="steward"))
+    assert writer.getPendingTxn("t2")[TARGET_NYM] == "sponsor"
+    assert cache.getRole("sponsor") == SPONSOR
+    assert cache.getSponsorFor("sponsor") == "steward"
+    assert cache.getRole("steward") is None
+    assert writer.hasPendingTxnsFor("sponsor")
+    assert not writer.hasPendingTxnsFor("user")
+    writer.stop()
+    assert not writer.hasPendingTxnsFor("sponsor")
+    assert writer.getPendingTxn("t2") is None
+    assert graph.getRole("sponsor") == SPONSOR
+    assert graph.getRole("steward") is None
+
+
+def testWatermarkOnlyMovesForward(graph):
+    assert graph.getLastSeqNo() is None
+    writeTxnsToGraph(graph, [nymTxn(2, "nym2", frm="steward"),
+                             nymTxn(3, "nym3", frm="steward")])
+    assert graph.getLastSeqNo() == 3
+    graph.setLastSeqNo(2)
+    assert graph.getLastSeqNo() == 3
+
+
+class FailingOnceGraph:
+    """
+    Graph failing to write the first txn with sequence number `failAt`
+    """
+
+    def __init__(self, graph, failAt):
+        self.graph = graph
+        self.failAt = failAt
+
+    def __getattr__(self, name):
+        return getattr(self.graph, name)
+
+    def addNymTxnToGraph(self, txn):
+        if txn[F.seqNo.name] == self.failAt:
+            self.failAt = None
+            raise RuntimeError("connection lost")
+        self.graph.addNymTxnToGraph(txn)
+
+
+def testFailedTxnNotSkipped(graph, tmpdir):
+    failing = FailingOnceGraph(graph, failAt=3)
+    txns = [nymTxn(i, "nym{}".format(i), frm="steward") for i in (2, 3, 4)]
+    with pytest.raises(RuntimeError):
+        writeTxnsToGraph(failing, txns)
+    assert graph.getLastSeqNo() in (None, 2)
+    assert not graph.hasNym("nym4")
+
+    writer = GraphWriter(FailingOnceGraph(IdentityGraphSqlite(str(tmpdir)),
+                                          failAt=6),
+                         batchSize=10, flushInterval=60, retryInterval=0.01)
+    for i in (5, 6, 7):
+        writer.add(nymTxn(i, "nym{}".format(i), frm="steward"))
+    writer.stop()
+    assert all(graph.hasNym("nym{}".format(i)) for i in (5, 6, 7))
+    assert graph.getLastSeqNo() == 7
+
+
+class FailingGraph(FailingOnceGraph):
+    """
+    Graph failing to write any txn from sequence number `failAt` on
+    """
+
+    def addNymTxnToGraph(self, txn):
+        if txn[F.seqNo.name] >= self.failAt:
+            raise RuntimeError("connection lost")
+        self.graph.addNymTxnToGraph(txn)
+
+
+def testWriterGivesUpAfterMaxRetries(graph, tmpdir):
+    writer = GraphWriter(FailingGraph(IdentityGraphSqlite(str(tmpdir)),
+                                      failAt=3),
+                         batchSize=10, flushInterval=60, retryInterval=0.01,
+                         maxRetries=2)
+    for i in (2, 3):
+        writer.add(nymTxn(i, "nym{}".format(i), frm="steward"))
+    with pytest.raises(GraphWriteError):
+        writer.flush()
+    assert writer.faulted
+    # The txn not written is still read from the writer
+    assert writer.getPendingTxn("t3")[TARGET_NYM] == "nym3"
+    assert graph.getLastSeqNo() in (None, 2)
+    assert not graph.hasNym("nym3")
+    writer.stop()
+
+
+def testFlushTimesOut(graph, tmpdir):
+    writer = GraphWriter(FailingGraph(IdentityGraphSqlite(str(tmpdir)),
+                                      failAt=2),
+                         batchSize=10, flushInterval=60, retryInterval=60)
+    writer.add(nymTxn(2, "nym2", frm="steward"))
+    with pytest.raises(TimeoutError):
+        writer.flush(timeout=0.1)
+    assert not writer.faulted
+    # Stopping gives up retrying rather than waiting on the retries left
+    writer.stop(timeout=0.1)
+    assert writer.getPendingTxn("t2") is not None
@@ -0,0 +1,67 @@
+import pytest
+
+from sovrin.persistence.group_commit import GroupCommitter, \
+    transactionLogFiles, hashStoreFiles, durabilityMode, DURABILITY_FSYNC, DURABILITY_GROUP, DURABILITY_NONE
+from sovrin.test.fake_ledger import FakeLedger
+
+
+class FakeConfig:
+    EnsureLedgerDurability = False
+
+
+def testDurabilityMode():
+    config = FakeConfig()
+    assert durabilityMode(config) == DURABILITY_NONE
+    config.EnsureLedgerDurability = True
+    assert durabilityMode(config) == DURABILITY_FSYNC
+    config.LedgerDurabilityMode = DURABILITY_GROUP
+    assert durabilityMode(config) == DURABILITY_GROUP
+    config.LedgerDurabilityMode = "sometimes"
+    with pytest.raises(ValueError):
+        durabilityMode(config)
+
+
+def testRepliesHeldUntilCommit(tmpdir):
+    ledger = FakeLedger(dataDir=str(tmpdir))
+    assert len(transactionLogFiles(ledger)) == 1
+    assert len(hashStoreFiles(ledger)) == 2
+    committer = GroupCommitter([ledger], maxDelay=60, maxTxns=3)
+    sent = []
+    for i in range(2):
+        ledger.add("txn{}".format(i))
+        committer.defer(lambda i=i: sent.append(i), key=("id", i))
+    assert committer.isPending(("id", 1))
+    # Neither waited long enough nor enough waiting
+    assert committer.service() == 0
+    assert sent == []
+
+    committer.defer(lambda: sent.append(2), key=("id", 2))
+    assert committer.service() == 3
+    assert sent == [0, 1, 2]
+    assert tmpdir.join("transactions").read() == '"txn0"\n"txn1"\n'
+    assert len(tmpdir.join("_merkleLeaves").readlines()) == 2
+    assert not committer.isPending(("id", 1))
+    assert committer.stats["commits"] == 1
+    assert committer.stats["txns"] == 3
+
+    # Actions sending no txn reply, like read replies, are not txns
+    committer.defer(lambda: sent.append(3))
+    assert committer.service(force=True) == 1
+    assert committer.stats["commits"] == 2
+    assert committer.stats["txns"] == 3
+
+
+def testLedgerWithoutFilesRefused(tmpdir):
+    ledger = FakeLedger()
+    with pytest.raises(ValueError):
+        GroupCommitter([ledger], maxDelay=60, maxTxns=3)
+
+
+def testLedgerWithoutHashStoreFilesRefused(tmpdir):
+    ledger = FakeLedger(dataDir=str(tmpdir))
+    # Like an OrientDB hash store, hashes are not kept in files
+    ledger.tree = FakeLedger().tree
+    assert transactionLogFiles(ledger)
+    assert not hashStoreFiles(ledger)
+    with pytest.raises(ValueError):
+        GroupCommitter([ledger], maxDelay=60, maxTxns=3)
@@ -1,10 +1,68 @@
+import json
 import time
 from datetime import datetime, timedelta
+from hashlib import sha256
 
+import pyorient
 from ledger.util import F
-from plenum.common.txn import TXN_TIME
+from plenum.common.txn import TXN_TIME, VERKEY, TXN_TYPE, RAW, ENC
+from plenum.common.types import f
 
-from sovrin.persistence.identity_graph import IdentityGraph
+from sovrin.common.txn import NYM, TXN_ID, TARGET_NYM, ROLE, STEWARD, ATTRIB
+from sovrin.persistence.blob_store import BlobStore
+from sovrin.persistence.identity_graph import IdentityGraph, Vertices, \
+    Edges, TXN_INDEX, GRAPH_META, RAW_BLOB, ENC_BLOB
+from sovrin.persistence.orientdb_query import QueryRunner
+
+
+class Record:
+    def __init__(self, **oRecordData):
+        self.oRecordData = oRecordData
+
+
+class RecordingClient:
+    """
+    Stands in for the OrientDB client, answering each query from
+    `records` by the class it selects from and counting round trips
+    """
+
+    def __init__(self, records):
+        self.records = records
+        self.commands = []
+
+    def command(self, cmd):
+        self.commands.append(cmd)
+        return self.records.get(cmd.split(" from ")[-1].split()[0], [])
+
+
+class WritingClient:
+    """
+    Stands in for the OrientDB client of a graph already indexed, giving each
+    vertex and edge created a record id and recording the statements run
+    """
+
+    def __init__(self):
+        self.commands = []
+
+    def command(self, cmd):
+        self.commands.append(cmd)
+        if cmd.startswith("select value from {}".format(GRAPH_META)):
+            return [Record(value=1)]
+        if cmd.startswith("create "):
+            record = Record()
+            record._rid = "#9:{}".format(len(self.commands))
+            return [record]
+        return []
+
+
+class FakeOrientDbStore:
+    dbType = pyorient.DB_TYPE_GRAPH
+
+    def __init__(self, client):
+        self.client = client
+
+    def createClasses(self, classesNeeded):
+        pass
 
 
 def testMakeResultTxnTimeString():
@@ -49,3 +107,138 @@ def testMakeResultTxnTimeNone():
         F.seqNo.name: 1,
     }
     assert TXN_TIME not in IdentityGraph.makeResult(0, oRecordData)
+
+
+def testTxnLookupsTakeOneRoundTrip():
+    client = RecordingClient({
+        TXN_INDEX: [
+            Record(__class=Vertices.Nym, __nym="steward", __role=STEWARD,
+                   __e_seqNo=1, __e_txnId="t1"),
+            Record(__class=Edges.AddsNym, __nym="user", __e_seqNo=2,
+                   __e_txnId="t2", __e_identifier="steward",
+                   __e_dest="user", __v_verkey="~key")],
+        Vertices.Nym: [
+            Record(**{NYM: "steward", TXN_ID: "t1", ROLE: STEWARD}),
+            Record(**{NYM: "user", TXN_ID: "t2", VERKEY: "~key",
+                      "__eTxnId": ["t2"], "__eRole": [None],
+                      "__frm": ["steward"]})]
+    })
+    graph = IdentityGraph.__new__(IdentityGraph)
+    graph.queries = QueryRunner(client)
+
+    results = graph.getResultForTxnIds("t1", "t2", "t3")
+    assert len(client.commands) == 1
+    assert results[1][TARGET_NYM] == "steward"
+    assert results[1][ROLE] == STEWARD
+    assert results[2][TXN_ID] == "t2"
+    assert results[2][f.IDENTIFIER.nm] == "steward"
+
+    # Genesis nyms and nyms added by someone alike
+    txns = graph.getAddNymTxns("steward", "user", "unknown")
+    assert len(client.commands) == 2
+    assert txns["steward"][TXN_ID] == "t1"
+    assert txns["user"] == {TXN_ID: "t2", ROLE: None, TARGET_NYM: "user",
+                            f.IDENTIFIER.nm: "steward", VERKEY: "~key"}
+    assert txns["unknown"] is None
+
+
+def testTxnPageReadInOneQuery():
+    client = RecordingClient({
+        TXN_INDEX: [Record(__class=Edges.AddsAttribute, __e_seqNo=seqNo,
+                           __e_txnId="a{}".format(seqNo))
+                    for seqNo in (4, 5)]
+    })
+    graph = IdentityGraph.__new__(IdentityGraph)
+    graph.queries = QueryRunner(client)
+
+    results = graph.getResultForTxnIds("a3", "a4", "a5", "a6", seqNo=3,
+                                       limit=2)
+    assert set(results) == {4, 5}
+    cmd, = client.commands
+    assert cmd.endswith("seqNo > 3 order by __e_seqNo limit 2")
+
+
+def testTxnsByTypeReadThroughQueryRunner():
+    client = RecordingClient({
+        Edges.AddsNym: [Record(txnId="t1"), Record(txnId="t2")]
+    })
+    graph = IdentityGraph.__new__(IdentityGraph)
+    graph.queries = QueryRunner(client)
+
+    assert graph.getTxnsByType(NYM) == [{"txnId": "t1"}, {"txnId": "t2"}]
+    assert graph.getTxnsByType("UNKNOWN") == []
+    assert len(client.commands) == 1
+    assert "select from {}".format(Edges.AddsNym) in graph.queries.stats
+
+
+def testAttributesReadFromBlobStore(tmpdir):
+    blobStore = BlobStore(str(tmpdir))
+    raw = json.dumps({"name": "x" * 100})
+    key = blobStore.put(raw)
+    client = RecordingClient({
+        Edges.AddsAttribute: [
+            Record(attrName="name", seqNo=3, dest="user", __raw=None,
+                   __rawBlob=key)]
+    })
+    graph = IdentityGraph.__new__(IdentityGraph)
+    graph.queries = QueryRunner(client)
+    graph.blobStore = blobStore
+
+    assert graph.getRawAttrs("user", "name") == {"name": ["x" * 100, 3]}
+    assert graph.getRawAttrsForNyms("name", "user") == {
+        "user": ["x" * 100, 3]}
+
+
+def testLargeAttributesWrittenToBlobStore(tmpdir):
+    client = WritingClient()
+    blobStore = BlobStore(str(tmpdir))
+    graph = IdentityGraph(FakeOrientDbStore(client), blobStore=blobStore,
+                          blobMinSize=32)
+    small = json.dumps({"name": "x"})
+    # Under the threshold in characters but not in bytes
+    large = '{"name": "' + "\u00e9" * 12 + '"}'
+    assert len(large) < 32 <= len(large.encode())
+    enc = "y" * 32
+
+    graph.addAttribute("sponsor", "t1", raw=small, to="user")
+    graph.addAttribute("sponsor", "t2", raw=large, to="user")
+    graph.addAttribute("sponsor", "t3", enc=enc, to="user")
+    createAttribute = "create vertex {}".format(Vertices.Attribute)
+    vertices = [cmd for cmd in client.commands
+                if cmd.startswith(createAttribute)]
+    assert len(vertices) == 3
+    assert "raw = " in vertices[0] and RAW_BLOB not in vertices[0]
+    for cmd, blobName, value in ((vertices[1], RAW_BLOB, large),
+                                 (vertices[2], ENC_BLOB, enc)):
+        key = sha256(value.encode()).hexdigest()
+        assert "{} = '{}'".format(blobName, key) in cmd
+        assert value not in cmd
+        assert blobStore.get(key) == value
+
+
+def testRepliesToResentAttributesReadFromBlobStore(tmpdir):
+    blobStore = BlobStore(str(tmpdir))
+    raw = json.dumps({"name": "x" * 100})
+    enc = "y" * 100
+    client = RecordingClient({
+        Edges.AddsAttribute: [
+            Record(__e_seqNo=3, __e_txnId="t3", __e_identifier="sponsor",
+                   __e_dest="user", __v_raw=None, __v_enc=None,
+                   __v_hash=None, __v_rawBlob=blobStore.put(raw),
+                   __v_encBlob=None)]
+    })
+    graph = IdentityGraph.__new__(IdentityGraph)
+    graph.queries = QueryRunner(client)
+    graph.blobStore = blobStore
+
+    reply = graph.getTxn("sponsor", 1, **{TXN_TYPE: ATTRIB})
+    assert reply[RAW] == raw
+    assert RAW_BLOB not in reply
+
+    client.records[Edges.AddsAttribute] = [
+        Record(__e_seqNo=4, __e_txnId="t4", __e_identifier="sponsor",
+               __e_dest="user", __v_raw=None, __v_enc=None, __v_hash=None,
+               __v_rawBlob=None, __v_encBlob=blobStore.put(enc))]
+    reply = graph.getTxn("sponsor", 2, **{TXN_TYPE: ATTRIB})
+    assert reply[ENC] == enc
+    assert RAW not in reply
@@ -0,0 +1,162 @@
+import json
+import os
+import sqlite3
+
+import pytest
+from ledger.util import F
+from plenum.common.txn import TXN_TYPE, DATA, NAME, VERSION, RAW, VERKEY
+from plenum.common.types import f
+
+from sovrin.common.txn import NYM, TARGET_NYM, TXN_ID, ROLE, STEWARD, \
+    SPONSOR, ATTRIB, CLAIM_DEF, ISSUER_KEY, REF, ATTR_NAMES
+from sovrin.common.util import composeJsonObject
+from sovrin.persistence.identity_graph_sqlite import IdentityGraphSqlite
+
+steward = "stewardNym"
+sponsor = "sponsorNym"
+user = "userNym"
+
+
+@pytest.fixture()
+def graph(tmpdir):
+    g = IdentityGraphSqlite(str(tmpdir))
+    txns = [
+        {TXN_TYPE: NYM, TARGET_NYM: steward, ROLE: STEWARD, TXN_ID: "t1",
+         F.seqNo.name: 1},
+        {TXN_TYPE: NYM, TARGET_NYM: sponsor, ROLE: SPONSOR, TXN_ID: "t2",
+         f.IDENTIFIER.nm: steward, f.REQ_ID.nm: 1, F.seqNo.name: 2},
+        {TXN_TYPE: NYM, TARGET_NYM: user, TXN_ID: "t3", VERKEY: "~key",
+         f.IDENTIFIER.nm: sponsor, f.REQ_ID.nm: 1, F.seqNo.name: 3},
+    ]
+    for txn in txns:
+        g.addNymTxnToGraph(txn)
+    yield g
+    g.close()
+
+
+def testNymsAdded(graph):
+    assert graph.hasSteward(steward)
+    assert graph.hasSponsor(sponsor)
+    assert not graph.hasSteward(sponsor)
+    assert graph.getRole(user) is None
+    assert graph.getSponsorFor(user) == sponsor
+    assert graph.getSponsorFor(steward) is None
+    assert graph.countStewards() == 1
+    assert graph.getNym(user).oRecordData[VERKEY] == "~key"
+    with pytest.raises(ValueError):
+        graph.getRole("unknownNym")
+
+
+def testNymUpdated(graph):
+    graph.addNymTxnToGraph({TXN_TYPE: NYM, TARGET_NYM: user, ROLE: SPONSOR,
+                            TXN_ID: "t4", f.IDENTIFIER.nm: steward,
+                            F.seqNo.name: 4})
+    assert graph.getRole(user) == SPONSOR
+    assert graph.getNym(user).oRecordData[VERKEY] == "~key"
+    # Sponsor and the add nym txn do not change on update
+    assert graph.getSponsorFor(user) == sponsor
+    assert graph.getAddNymTxn(user)[TXN_ID] == "t3"
+    assert graph.countTxns() == 4
+
+
+def testGetAddNymTxn(graph):
+    genesis = graph.getAddNymTxn(steward)
+    assert genesis[ROLE] == STEWARD
+    assert f.IDENTIFIER.nm not in genesis
+    txn = graph.getAddNymTxn(user)
+    assert txn[f.IDENTIFIER.nm] == sponsor
+    assert txn[VERKEY] == "~key"
+    assert graph.getAddNymTxn("unknownNym") is None
+
+
+def testAttributes(graph):
+    for seqNo, value in ((4, "a"), (5, "b")):
+        graph.addAttribTxnToGraph({
+            TXN_TYPE: ATTRIB, TARGET_NYM: user, TXN_ID: "a{}".format(seqNo),
+            RAW: json.dumps({"endpoint": value}), f.IDENTIFIER.nm: sponsor,
+            F.seqNo.name: seqNo})
+    assert graph.getRawAttrs(user, "endpoint") == {"endpoint": ["b", 5]}
+    assert graph.getRawAttrs(user, "unknown") == {}
+    assert graph.getAddAttributeTxnIds(user) == ["a4", "a5"]
+    txns = graph.getResultForTxnIds("t3", "a4", "a5", seqNo=3)
+    assert set(txns) == {4, 5}
+    assert txns[5][TXN_TYPE] == ATTRIB
+    assert set(graph.getResultForTxnIds("t3", "a4", "a5", limit=2)) == {3, 4}
+    assert set(graph.getResultForTxnIds("t3", "a4", "a5", seqNo=3,
+                                        limit=1)) == {4}
+
+
+def testClaimDefAndIssuerKey(graph):
+    graph.addClaimDefTxnToGraph({
+        TXN_TYPE: CLAIM_DEF, TXN_ID: "c1", f.IDENTIFIER.nm: sponsor,
+        F.seqNo.name: 4,
+        DATA: {NAME: "GVT", VERSION: "1.0", ATTR_NAMES: "name,age"}})
+    graph.addIssuerKeyTxnToGraph({
+        TXN_TYPE: ISSUER_KEY, TXN_ID: "k1", f.IDENTIFIER.nm: sponsor,
+        F.seqNo.name: 5, REF: 4, DATA: {"N": "123"}})
+    claimDef = graph.getClaimDef(sponsor, "GVT", "1.0")
+    assert claimDef[F.seqNo.name] == 4
+    assert claimDef[ATTR_NAMES] == "name,age"
+    assert graph.getClaimDef(sponsor, "GVT", "2.0") is None
+    keys = graph.getIssuerKeys(sponsor, 4)
+    assert keys[DATA] == {"N": "123"}
+    assert keys[F.seqNo.name] == 5
+    assert graph.getIssuerKeys(steward, 4) is None
+
+
+def testGraphPersisted(graph, tmpdir):
+    reopened = IdentityGraphSqlite(str(tmpdir))
+    assert reopened.hasSponsor(sponsor)
+    assert reopened.countTxns() == 3
+    reopened.close()
+
+
+def testBatchedLookups(graph):
+    txns = graph.getAddNymTxns(steward, user, "unknownNym")
+    assert txns["unknownNym"] is None
+    for nym in (steward, user):
+        assert txns[nym] == graph.getAddNymTxn(nym)
+    states = graph.getNymStates(steward, user, "unknownNym")
+    assert states["unknownNym"] is None
+    assert states[user] == {ROLE: None, VERKEY: "~key", "sponsor": sponsor,
+                            F.seqNo.name: 3}
+    assert states[steward]["sponsor"] is None
+    # Reply data composed from the serialized txns is what serializing
+    # all of them at once would give
+    assert composeJsonObject(
+        (nym, json.dumps(txn, sort_keys=True)) for nym, txn in txns.items()) \
+        == json.dumps(txns, sort_keys=True)
+
+    for seqNo, nym, value in ((4, user, "a"), (5, sponsor, "b"),
+                              (6, user, "c")):
+        graph.addAttribTxnToGraph({
+            TXN_TYPE: ATTRIB, TARGET_NYM: nym, TXN_ID: "a{}".format(seqNo),
+            RAW: json.dumps({"endpoint": value}), f.IDENTIFIER.nm: sponsor,
+            F.seqNo.name: seqNo})
+    assert graph.getRawAttrsForNyms("endpoint", user, sponsor, steward) == {
+        user: ["c", 6], sponsor: ["b", 5]}
+    assert graph.getRawAttrsForNyms("unknown", user) == {}
+
+
+def testAttributeNamesIndexedInOlderDatabase(tmpdir):
+    dataDir = str(tmpdir.mkdir("old"))
+    db = sqlite3.connect(os.path.join(dataDir, IdentityGraphSqlite.dbFileName))
+    # `txn` table as created before attribute names were kept
+    columns = [c for c in IdentityGraphSqlite.txnColumns if c != 'attrName']
+    db.execute("create table txn ({})".format(", ".join(columns)))
+    for seqNo, value in ((1, "a"), (2, "b")):
+        db.execute("insert into txn (txnId, txnType, seqNo, dest, raw) "
+                   "values (?, ?, ?, ?, ?)",
+                   ("a{}".format(seqNo), ATTRIB, seqNo, user,
+                    json.dumps({"endpoint": value})))
+    db.commit()
+    db.close()
+    graph = IdentityGraphSqlite(dataDir)
+    graph.addAttribTxnToGraph({
+        TXN_TYPE: ATTRIB, TARGET_NYM: user, TXN_ID: "a3",
+        RAW: json.dumps({"name": "c"}), F.seqNo.name: 3})
+    assert graph.getRawAttrs(user, "endpoint") == {"endpoint": ["b", 2]}
+    assert graph.getRawAttrs(user, "endpoint", "name") == {
+        "endpoint": ["b", 2], "name": ["c", 3]}
+    assert graph.getRawAttrsForNyms("name", user) == {user: ["c", 3]}
+    graph.close()
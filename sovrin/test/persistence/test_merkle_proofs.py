@@ -0,0 +1,29 @@
+from sovrin.persistence.merkle_proofs import MerkleProofs, contiguousRuns
+from sovrin.test.fake_ledger import FakeLedger
+
+
+def testContiguousRuns():
+    assert contiguousRuns([7, 3, 4, 5, 9, 10, 4]) == [[3, 4, 5], [7], [9, 10]]
+    assert contiguousRuns([]) == []
+
+
+def testBatchedProofsMatchLedger():
+    ledger = FakeLedger("txn{}".format(i) for i in range(37))
+    proofs = MerkleProofs(ledger, 100)
+    seqNos = [1, 2, 3] + list(range(5, 38))
+    infos = proofs.merkleInfos(seqNos)
+    expected = {s: ledger.merkleInfo(s) for s in seqNos}
+    assert infos == expected
+
+
+def testProofsCached():
+    ledger = FakeLedger("txn{}".format(i) for i in range(10))
+    proofs = MerkleProofs(ledger, 100)
+    proofs.add(10, ledger.merkleInfo(10))
+    ledger.proofsComputed.clear()
+    assert proofs.merkleInfos([4, 10]) == {4: ledger.merkleInfo(4),
+                                           10: ledger.merkleInfo(10)}
+    assert proofs.merkleInfo(4) == ledger.merkleInfo(4)
+    # Only the proofs checked against are computed by the ledger
+    assert ledger.proofsComputed == [4, 10, 4]
+    assert proofs.stats["hits"] == 2
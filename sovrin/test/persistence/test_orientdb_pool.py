@@ -0,0 +1,91 @@
+import threading
+
+import pyorient
+import pytest
+
+from sovrin.persistence.orientdb_pool import OrientDbConnectionPool
+from sovrin.persistence.orientdb_query import QueryRunner
+
+
+class FakeClient:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.closed = False
+        self.commands = []
+
+    def command(self, cmd):
+        if self.fail:
+            raise pyorient.PyOrientConnectionException("Socket closed", [])
+        self.commands.append(cmd)
+        return [threading.current_thread().name]
+
+    def db_close(self):
+        self.closed = True
+
+
+def testConcurrentStatementsUseSeparateConnections():
+    opened = []
+
+    def connect():
+        opened.append(FakeClient())
+        return opened[-1]
+
+    pool = OrientDbConnectionPool(connect, size=3)
+    started = threading.Barrier(3)
+
+    def hold():
+        with pool.connection():
+            started.wait(timeout=5)
+
+    threads = [threading.Thread(target=hold) for _ in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(opened) == 3
+    assert pool.stats["idle"] == 3
+    assert pool.stats["inUse"] == 0
+
+    queries = QueryRunner(None, pool)
+    queries.command("select from Nym where NYM = :nym", nym="a")
+    assert sum(len(c.commands) for c in opened) == 1
+    assert len(opened) == 3
+
+
+def testReconnectsAfterConnectionFailure():
+    broken = FakeClient(fail=True)
+    pool = OrientDbConnectionPool(FakeClient, size=1, clients=[broken])
+    assert pool.command("select count(*) from Nym")
+    assert broken.closed
+    assert pool.stats["reconnects"] == 1
+    assert pool.stats["opened"] == 1
+
+
+def testWritesNotRetriedAfterConnectionFailure():
+    broken = FakeClient(fail=True)
+    opened = []
+
+    def connect():
+        opened.append(FakeClient())
+        return opened[-1]
+
+    pool = OrientDbConnectionPool(connect, size=1, clients=[broken])
+    with pytest.raises(pyorient.PyOrientConnectionException):
+        pool.command("create vertex Nym set NYM = 'a'")
+    assert broken.closed
+    assert not opened
+    assert pool.stats["reconnects"] == 0
+    assert pool.stats["failedWrites"] == 1
+    # The connection is replaced for the statements that follow
+    pool.command("create vertex Nym set NYM = 'b'")
+    assert opened[0].commands == ["create vertex Nym set NYM = 'b'"]
+
+
+def testWaitsForFreeConnection():
+    pool = OrientDbConnectionPool(FakeClient, size=1, acquireTimeout=0.01)
+    with pool.connection():
+        with pytest.raises(TimeoutError):
+            with pool.connection():
+                pass
+    assert pool.stats["waits"] == 1
+    assert pool.stats["inUse"] == 0
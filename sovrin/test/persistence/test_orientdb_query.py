@@ -0,0 +1,45 @@
+import pytest
+
+from sovrin.persistence.orientdb_query import QueryRunner, Rid, prepare, \
+    assignments
+
+
+class RecordingClient:
+    def __init__(self):
+        self.commands = []
+
+    def command(self, cmd):
+        self.commands.append(cmd)
+        return []
+
+
+def testValuesAreBoundAsLiterals():
+    query = prepare("select from Nym where NYM = :nym and seqNo > :seqNo")
+    assert query is prepare(query.template)
+    assert query.bind(nym="it's \\ \"quoted\"", seqNo=5) == \
+        "select from Nym where NYM = 'it\\'s \\\\ \"quoted\"' and seqNo > 5"
+    assert prepare("select from :rids where a in :a and b = :b").bind(
+        rids=[Rid("#12:3"), Rid("#12:4")], a={"x"}, b=None) == \
+        "select from [#12:3, #12:4] where a in ['x'] and b = null"
+    assert prepare("update Nym set " + assignments(["role", "verkey"])).bind(
+        role="2", verkey="~a") == "update Nym set role = '2', verkey = '~a'"
+
+    with pytest.raises(KeyError):
+        query.bind(nym="a")
+    with pytest.raises(ValueError):
+        prepare("delete from TxnIndex where rec = :rid").bind(
+            rid=Rid("#1:1 or 1=1"))
+
+
+def testLatencyKeptPerTemplate():
+    client = RecordingClient()
+    queries = QueryRunner(client)
+    for nym in ("a", "b"):
+        queries.command("select from Nym where NYM = :nym", nym=nym)
+    queries.command("select count(*) from Nym")
+    assert client.commands == ["select from Nym where NYM = 'a'",
+                               "select from Nym where NYM = 'b'",
+                               "select count(*) from Nym"]
+    stats = queries.stats
+    assert stats["select from Nym where NYM = :nym"]["count"] == 2
+    assert stats["select count(*) from Nym"]["count"] == 1
@@ -0,0 +1,45 @@
+import json
+
+from ledger.util import F
+from plenum.common.txn import TXN_TYPE, RAW
+from plenum.common.types import f
+
+from sovrin.common.txn import NYM, ATTRIB, TARGET_NYM, TXN_ID, SPONSOR, \
+    ROLE
+from sovrin.persistence.identity_graph_sqlite import IdentityGraphSqlite
+from sovrin.persistence.secondary_storage import SecondaryStorage
+
+
+class FakePrimaryStorage:
+    def __init__(self):
+        self.proofsComputed = []
+
+    def merkleInfo(self, seqNo):
+        self.proofsComputed.append(seqNo)
+        return {F.rootHash.name: "root", F.auditPath.name: []}
+
+
+def testRepliesPaginated(tmpdir):
+    graph = IdentityGraphSqlite(str(tmpdir))
+    graph.addNymTxnToGraph({TXN_TYPE: NYM, TARGET_NYM: "user", ROLE: SPONSOR,
+                            TXN_ID: "n1", F.seqNo.name: 1})
+    for seqNo in range(2, 12):
+        graph.addAttribTxnToGraph({
+            TXN_TYPE: ATTRIB, TARGET_NYM: "user",
+            TXN_ID: "a{}".format(seqNo), f.IDENTIFIER.nm: "user",
+            RAW: json.dumps({"attr{}".format(seqNo): seqNo}),
+            F.seqNo.name: seqNo})
+    primary = FakePrimaryStorage()
+    storage = SecondaryStorage(graph, primary)
+    txnIds = ["n1"] + graph.getAddAttributeTxnIds("user")
+
+    page, more = storage.getRepliesPage(*txnIds, pageSize=4)
+    assert sorted(page) == [1, 2, 3, 4]
+    assert more
+    # Merkle proofs are only computed for the txns in the page
+    assert sorted(primary.proofsComputed) == [1, 2, 3, 4]
+
+    page, more = storage.getRepliesPage(*txnIds, seqNo=8, pageSize=4)
+    assert sorted(page) == [9, 10, 11]
+    assert not more
+    graph.close()
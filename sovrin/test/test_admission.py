@@ -0,0 +1,66 @@
+from sovrin.common.txn import SPONSOR, TRUSTEE
+from sovrin.server.admission import WriteAdmission
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def roles(mapping):
+    lookups = []
+
+    def roleOf(identifier):
+        lookups.append(identifier)
+        return mapping.get(identifier)
+    return roleOf, lookups
+
+
+def testIdentifierOverItsLimitRejectedWithoutLookups():
+    clock = Clock()
+    admission = WriteAdmission({SPONSOR: {"identifier": (2, 3)}}, 10, clock)
+    roleOf, lookups = roles({"flooder": SPONSOR, "trustee": TRUSTEE})
+
+    results = [admission.admit("flooder", roleOf) for _ in range(5)]
+    assert results[:3] == [None] * 3
+    assert "too many write requests from flooder" in results[3]
+    assert lookups == ["flooder"]
+    # Trustees are not limited
+    assert all(admission.admit("trustee", roleOf) is None for _ in range(10))
+
+    clock.now += 1
+    assert admission.admit("flooder", roleOf) is None
+    assert admission.admit("flooder", roleOf) is None
+    assert admission.admit("flooder", roleOf) is not None
+    assert admission.stats["admitted"] == {SPONSOR: 5, TRUSTEE: 10}
+    assert admission.stats["rejectedByIdentifier"] == {SPONSOR: 3}
+
+
+def testRoleLimitSharedByItsIdentifiers():
+    clock = Clock()
+    admission = WriteAdmission({None: {"identifier": (1, 2),
+                                       "role": (1, 3)}}, 10, clock)
+    roleOf, lookups = roles({})
+    assert admission.admit("a", roleOf) is None
+    assert admission.admit("a", roleOf) is None
+    assert admission.admit("b", roleOf) is None
+    assert "with role None" in admission.admit("b", roleOf)
+    assert admission.stats["rejectedByRole"] == {None: 1}
+
+
+def testRoleChangeAppliesNewLimits():
+    clock = Clock()
+    admission = WriteAdmission({None: {"identifier": (1, 1)},
+                                SPONSOR: {"identifier": (1, 5)}}, 10, clock)
+    roleOf, lookups = roles({})
+    assert admission.admit("user", roleOf) is None
+    assert admission.admit("user", roleOf) is not None
+    admission.onRoleChanged("user", SPONSOR)
+    clock.now += 2
+    assert all(admission.admit("user", roleOf) is None for _ in range(2))
+    admission.onRoleChanged("user", TRUSTEE)
+    assert all(admission.admit("user", roleOf) is None for _ in range(10))
+    assert lookups == ["user"]
@@ -0,0 +1,14 @@
+from plenum.common.eventually import eventually
+
+from sovrin.test.helper import addRole
+
+
+def testGraphWatermarkFollowsDomainLedger(nodeSet, looper, steward,
+                                          stewardWallet):
+    addRole(looper, steward, stewardWallet, "watermarkUser")
+
+    def check():
+        for node in nodeSet:
+            assert node.graphStore.getLastSeqNo() == node.domainLedger.size
+
+    looper.run(eventually(check, retryWait=1, timeout=10))
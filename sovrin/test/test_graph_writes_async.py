@@ -0,0 +1,55 @@
+import pytest
+
+from plenum.common.eventually import eventually
+from plenum.common.txn import REPLY, DATA, REQNACK
+from plenum.common.types import f, OP_FIELD_NAME
+
+from sovrin.test.helper import genTestClient, addRole, makeGetNymRequest
+
+
+@pytest.fixture(scope="module")
+def tconf(tconf, request):
+    oldAsync = tconf.GraphWritesAsync
+    oldInterval = tconf.GraphWriteFlushInterval
+    tconf.GraphWritesAsync = True
+    # Long enough for the reads below to come before the writer flushes on
+    # its own
+    tconf.GraphWriteFlushInterval = 60
+
+    def reset():
+        tconf.GraphWritesAsync = oldAsync
+        tconf.GraphWriteFlushInterval = oldInterval
+
+    request.addfinalizer(reset)
+    return tconf
+
+
+def checkReplies(client, reqId, nodeCount=4):
+    nacks = [x for x, _ in client.inBox if x[OP_FIELD_NAME] == REQNACK and
+             x[f.REQ_ID.nm] == reqId]
+    assert not nacks
+    replies = [x[f.RESULT.nm] for x, _ in client.inBox
+               if x[OP_FIELD_NAME] == REPLY and
+               x[f.RESULT.nm][f.REQ_ID.nm] == reqId]
+    assert len(replies) == nodeCount
+    return replies
+
+
+def testNymReadRightAfterItIsWritten(nodeSet, looper, tdir, steward,
+                                     stewardWallet):
+    wallet = addRole(looper, steward, stewardWallet, "asyncWriteUser")
+    nym = wallet.defaultId
+    client, _ = genTestClient(nodeSet, tmpdir=tdir, usePoolLedger=True)
+    client.registerObserver(wallet.handleIncomingReply)
+    looper.add(client)
+    looper.run(client.ensureConnectedToNodes())
+
+    req, = makeGetNymRequest(client, wallet, nym)
+    replies = looper.run(eventually(checkReplies, client, req.reqId,
+                                    retryWait=1, timeout=10))
+    assert all(r[DATA] is not None and nym in r[DATA] for r in replies)
+
+    wallet.pendSyncRequests()
+    req, = client.submitReqs(*wallet.preparePending())
+    looper.run(eventually(checkReplies, client, req.reqId,
+                          retryWait=1, timeout=10))
@@ -0,0 +1,95 @@
+import pytest
+from ledger.util import F
+from plenum.common.txn import VERKEY
+from plenum.common.types import f
+
+from sovrin.common.cache import LRUCache
+from sovrin.common.txn import TARGET_NYM, ROLE, TRUSTEE, SPONSOR, NYM
+from sovrin.persistence.identity_graph_sqlite import Record
+from sovrin.server.identity_cache import IdentityCache
+
+
+class CountingGraph:
+    def __init__(self):
+        self.nyms = {}
+        self.sponsors = {}
+        self.reads = 0
+
+    def getNym(self, nym):
+        self.reads += 1
+        data = self.nyms.get(nym)
+        return Record(data) if data else None
+
+    def getSponsorFor(self, nym):
+        self.reads += 1
+        return self.sponsors.get(nym)
+
+
+@pytest.fixture()
+def graph():
+    g = CountingGraph()
+    g.nyms["trustee"] = {NYM: "trustee", ROLE: TRUSTEE, F.seqNo.name: 1}
+    return g
+
+
+def testLRUCacheEvictsLeastRecentlyUsed():
+    c = LRUCache(2)
+    c.put("a", 1)
+    c.put("b", 2)
+    assert c.get("a") == 1
+    c.put("c", 3)
+    assert "b" not in c
+    assert c.get("b") is None
+    assert (c.hits, c.misses, c.evictions) == (1, 1, 1)
+    assert c.hitRate == 0.5
+
+
+def testNymReadFromGraphOnce(graph):
+    cache = IdentityCache(graph, 10)
+    assert cache.getRole("trustee") == TRUSTEE
+    assert cache.hasTrustee("trustee")
+    assert cache.getSponsorFor("trustee") is None
+    assert graph.reads == 2
+    assert (cache.hits, cache.misses) == (2, 1)
+
+
+def testAbsentNymPopulatedByNymTxn(graph):
+    cache = IdentityCache(graph, 10)
+    assert not cache.hasNym("newNym")
+    with pytest.raises(ValueError):
+        cache.getRole("newNym")
+    cache.onNymTxn({TARGET_NYM: "newNym", ROLE: SPONSOR, VERKEY: "~vk",
+                    f.IDENTIFIER.nm: "trustee", F.seqNo.name: 2})
+    reads = graph.reads
+    assert cache.getRole("newNym") == SPONSOR
+    assert cache.getVerkey("newNym") == "~vk"
+    assert cache.getSponsorFor("newNym") == "trustee"
+    assert graph.reads == reads
+
+
+def testNymUpdateInvalidates(graph):
+    cache = IdentityCache(graph, 10)
+    assert cache.getRole("trustee") == TRUSTEE
+    graph.nyms["trustee"][ROLE] = None
+    cache.onNymTxn({TARGET_NYM: "trustee", ROLE: None,
+                    f.IDENTIFIER.nm: "trustee", F.seqNo.name: 3})
+    assert cache.getRole("trustee") is None
+
+
+def testNymsPrefetchedWithOneLookup(graph):
+    lookups = []
+
+    def getNymStates(*nyms):
+        lookups.append(set(nyms))
+        return {nym: {ROLE: TRUSTEE, VERKEY: None, "sponsor": None,
+                      F.seqNo.name: 1} if nym == "trustee" else None
+                for nym in nyms}
+
+    graph.getNymStates = getNymStates
+    cache = IdentityCache(graph, 10)
+    cache.prefetch(["trustee", "newNym", "trustee"])
+    cache.prefetch(["trustee", "newNym"])
+    assert lookups == [{"trustee", "newNym"}]
+    assert cache.hasTrustee("trustee")
+    assert not cache.hasNym("newNym")
+    assert graph.reads == 0
@@ -0,0 +1,59 @@
+import pytest
+
+from plenum.common.eventually import eventually
+from plenum.common.signer_did import DidSigner
+from plenum.common.txn import REPLY
+from plenum.common.types import f, OP_FIELD_NAME
+
+from sovrin.client.wallet.wallet import Wallet
+from sovrin.common.identity import Identity
+from sovrin.persistence.group_commit import DURABILITY_GROUP
+
+
+@pytest.fixture(scope="module")
+def tconf(tconf, request):
+    oldMode = tconf.LedgerDurabilityMode
+    oldDelay = tconf.GroupCommitMaxDelay
+    oldHashStore = tconf.hashStore
+    tconf.LedgerDurabilityMode = DURABILITY_GROUP
+    # Group commits need the hashes of the ledgers kept in files
+    tconf.hashStore = {"type": "file"}
+    # Long enough for the checks below to come before the txns are made
+    # durable on their own
+    tconf.GroupCommitMaxDelay = 60
+
+    def reset():
+        tconf.LedgerDurabilityMode = oldMode
+        tconf.GroupCommitMaxDelay = oldDelay
+        tconf.hashStore = oldHashStore
+
+    request.addfinalizer(reset)
+    return tconf
+
+
+def replies(client, reqId):
+    return [x for x, _ in client.inBox if x[OP_FIELD_NAME] == REPLY and
+            x[f.RESULT.nm][f.REQ_ID.nm] == reqId]
+
+
+def testNoReplyBeforeTxnIsDurable(nodeSet, looper, steward, stewardWallet):
+    idr, _ = Wallet("groupCommitUser").addIdentifier(signer=DidSigner())
+    stewardWallet.addSponsoredIdentity(Identity(identifier=idr))
+    req, = steward.submitReqs(*stewardWallet.preparePending())
+
+    def checkPending():
+        for node in nodeSet:
+            assert node.groupCommitter.isPending(req.key)
+            # Retries are not answered from the graph either
+            assert node.getReplyFor(req) is None
+
+    looper.run(eventually(checkPending, retryWait=1, timeout=10))
+    assert not replies(steward, req.reqId)
+
+    for node in nodeSet:
+        node.groupCommitter.service(force=True)
+
+    def checkReplies():
+        assert len(replies(steward, req.reqId)) == len(nodeSet)
+
+    looper.run(eventually(checkReplies, retryWait=1, timeout=10))
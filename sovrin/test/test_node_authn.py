@@ -0,0 +1,26 @@
+import pytest
+from plenum.common.exceptions import UnknownIdentifier
+from plenum.common.txn import TARGET_NYM, VERKEY
+
+from sovrin.server.node_authn import NodeAuthNr
+from sovrin.test.fake_ledger import FakeLedger
+
+
+def testVerkeysIndexedIncrementally():
+    ledger = FakeLedger()
+    ledger.add({TARGET_NYM: "node1", VERKEY: "key1"})
+    ledger.add({TARGET_NYM: "node2"})
+    authNr = NodeAuthNr(ledger)
+    assert authNr.getVerkey("node1") == "key1"
+    # A nym without verkey is its own verkey
+    assert authNr.getVerkey("node2") == "node2"
+    with pytest.raises(UnknownIdentifier):
+        authNr.getVerkey("node3")
+    assert ledger.reads == [1]
+
+    # Rotated keys are used once their txns are in the ledger
+    ledger.add({TARGET_NYM: "node1", VERKEY: "key2"})
+    ledger.add({TARGET_NYM: "node3", VERKEY: "key3"})
+    assert authNr.getVerkey("node1") == "key2"
+    assert authNr.getVerkey("node3") == "key3"
+    assert ledger.reads == [1, 3]
@@ -0,0 +1,67 @@
+import json
+
+import pytest
+from plenum.common.exceptions import InvalidClientRequest
+
+from sovrin.common.txn import TXN_TYPE, TARGET_NYM, ROLE, RAW, ENC, NYM, \
+    ATTRIB, GET_NYMS, TARGETS, STEWARD
+from sovrin.server.op_validator import OperationValidator
+
+
+@pytest.fixture()
+def validator():
+    v = OperationValidator(maxReadTargets=2)
+    v.lookups = []
+
+    def nymExists(identifier, operation):
+        v.lookups.append(operation[TARGET_NYM])
+        if operation[TARGET_NYM] != "known":
+            return "{} should be added".format(TARGET_NYM)
+
+    v.addStateCheck(ATTRIB, nymExists)
+    return v
+
+
+def reason(validator, operation):
+    with pytest.raises(InvalidClientRequest) as ex:
+        validator.validate("id", 1, operation)
+    return str(ex.value)
+
+
+def testMalformedRequestsRejectedWithoutStateLookups(validator):
+    assert "invalid keys" in reason(validator, {TXN_TYPE: NYM, "bad": 1})
+    assert "missing required keys" in reason(validator, {TARGET_NYM: "x"})
+    assert "invalid type" in reason(validator, {TXN_TYPE: "UNKNOWN"})
+    assert "should have one and only one of raw, enc, hash" in \
+        reason(validator, {TXN_TYPE: ATTRIB, TARGET_NYM: "x", RAW: "{}",
+                           ENC: "a"})
+    assert "should be JSON" in reason(validator, {TXN_TYPE: ATTRIB,
+                                                  TARGET_NYM: "x",
+                                                  RAW: "{bad"})
+    assert "dest needs to be present" in reason(validator, {TXN_TYPE: NYM})
+    assert "not a valid role" in reason(validator, {TXN_TYPE: NYM,
+                                                    TARGET_NYM: "x",
+                                                    ROLE: "KING"})
+    assert "at most 2" in reason(validator, {TXN_TYPE: GET_NYMS,
+                                             TARGETS: ["a", "b", "c"]})
+    assert validator.lookups == []
+    assert validator.stats["rejected"] == {None: 3, ATTRIB: 2, NYM: 2,
+                                           GET_NYMS: 1}
+
+
+def testStateChecksRunAfterStructureChecks(validator):
+    raw = json.dumps({"name": "Alice"})
+    validator.validate("id", 1, {TXN_TYPE: ATTRIB, TARGET_NYM: "known",
+                                 RAW: raw})
+    validator.validate("id", 2, {TXN_TYPE: NYM, TARGET_NYM: "x",
+                                 ROLE: STEWARD})
+    assert "should be added" in reason(validator, {TXN_TYPE: ATTRIB,
+                                                   TARGET_NYM: "unknown",
+                                                   RAW: raw})
+    assert validator.lookups == ["known", "unknown"]
+    stats = validator.stats
+    assert stats["structure"][ATTRIB]["count"] == 2
+    assert stats["state"][ATTRIB]["count"] == 2
+    assert NYM not in stats["state"]
+    assert OperationValidator.nymsToLookUp(
+        "id", {TXN_TYPE: NYM, TARGET_NYM: "x"}) == {"id", "x"}
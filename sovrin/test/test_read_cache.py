@@ -0,0 +1,71 @@
+import json
+
+from plenum.common.txn import TXN_TYPE, TARGET_NYM, DATA, NAME, VERSION, \
+    RAW, ORIGIN
+from plenum.common.types import f
+
+from sovrin.common.txn import NYM, ATTRIB, CLAIM_DEF, ISSUER_KEY, REF, \
+    GET_NYM, GET_ATTR, GET_CLAIM_DEF, GET_ISSUER_KEY
+from sovrin.server.read_cache import ReadReplyCache
+
+getEndpoint = {TXN_TYPE: GET_ATTR, TARGET_NYM: "user", RAW: "endpoint"}
+getName = {TXN_TYPE: GET_ATTR, TARGET_NYM: "user", RAW: "name"}
+getClaimDef = {TXN_TYPE: GET_CLAIM_DEF, TARGET_NYM: "issuer",
+               DATA: {NAME: "GVT", VERSION: "1.0"}}
+getIssuerKey = {TXN_TYPE: GET_ISSUER_KEY, ORIGIN: "issuer", REF: 10}
+getNym = {TXN_TYPE: GET_NYM, TARGET_NYM: "user"}
+
+
+def testWritesInvalidateOnlyAffectedReads():
+    cache = ReadReplyCache(100, 10000)
+    for op in (getEndpoint, getName, getClaimDef, getIssuerKey, getNym):
+        cache.put(op, {DATA: json.dumps(op)})
+
+    cache.onTxn({TXN_TYPE: ATTRIB, TARGET_NYM: "user",
+                 RAW: json.dumps({"endpoint": "127.0.0.1:5555"})})
+    assert cache.get(getEndpoint) is None
+    assert cache.get(getName) is not None
+
+    # Attributes without a target invalidate nothing
+    cache.onTxn({TXN_TYPE: ATTRIB, f.IDENTIFIER.nm: "user",
+                 RAW: json.dumps({"name": "Alice"})})
+    assert cache.get(getName) is not None
+
+    cache.onTxn({TXN_TYPE: CLAIM_DEF, f.IDENTIFIER.nm: "issuer",
+                 DATA: {NAME: "GVT", VERSION: "2.0"}})
+    assert cache.get(getClaimDef) is not None
+    cache.onTxn({TXN_TYPE: CLAIM_DEF, f.IDENTIFIER.nm: "issuer",
+                 DATA: {NAME: "GVT", VERSION: "1.0"}})
+    assert cache.get(getClaimDef) is None
+
+    cache.onTxn({TXN_TYPE: ISSUER_KEY, f.IDENTIFIER.nm: "issuer", REF: "10",
+                 DATA: {}})
+    assert cache.get(getIssuerKey) is None
+
+    assert cache.get(getNym) is not None
+    cache.onTxn({TXN_TYPE: NYM, TARGET_NYM: "user"})
+    assert cache.get(getNym) is None
+    assert cache.stats["hits"] == 4
+
+
+def testCacheBoundedBySize():
+    cache = ReadReplyCache(100, 100)
+    cache.put(getEndpoint, {DATA: "x" * 60})
+    cache.put(getName, {DATA: "y" * 30})
+    assert cache.stats["weight"] == 90
+    cache.put(getNym, {DATA: "z" * 30})
+    assert cache.get(getEndpoint) is None
+    assert cache.get(getName) == {DATA: "y" * 30}
+    assert cache.stats["weight"] == 60
+    assert cache.stats["evictions"] == 1
+
+
+def testReadStartedBeforeWriteNotCached():
+    cache = ReadReplyCache(100, 10000)
+    version = cache.version
+    # A NYM txn is written while the read is going on
+    cache.onTxn({TXN_TYPE: NYM, TARGET_NYM: "user"})
+    cache.put(getNym, {DATA: "stale"}, version)
+    assert cache.get(getNym) is None
+    cache.put(getNym, {DATA: "fresh"}, cache.version)
+    assert cache.get(getNym) == {DATA: "fresh"}
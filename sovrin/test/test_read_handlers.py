@@ -0,0 +1,42 @@
+import pytest
+from plenum.common.exceptions import UnauthorizedClientRequest
+
+from sovrin.common.txn import GET_NYM, GET_TXNS, validTxnTypes
+from sovrin.server.op_validator import OperationValidator
+from sovrin.server.read_handlers import ReadHandlers, registerReadHandler, \
+    pluginReadHandlers
+
+
+def testRequestsCountedAndTimedPerType():
+    handlers = ReadHandlers(node=None)
+    handlers.register(GET_NYM, lambda request: {"data": request})
+
+    def readTxns(request):
+        raise UnauthorizedClientRequest("id", 1, "not yours")
+
+    handlers.register(GET_TXNS, readTxns, graphOnly=False)
+    assert handlers.get(GET_NYM).graphOnly
+    assert not handlers.get(GET_TXNS).graphOnly
+    assert handlers.get("UNKNOWN") is None
+
+    assert handlers.handle(GET_NYM, "req") == {"data": "req"}
+    assert handlers.handle(GET_NYM, "req") == {"data": "req"}
+    with pytest.raises(UnauthorizedClientRequest):
+        handlers.handle(GET_TXNS, "req")
+    stats = handlers.stats
+    assert (stats[GET_NYM]["count"], stats[GET_NYM]["failed"]) == (2, 0)
+    assert (stats[GET_TXNS]["count"], stats[GET_TXNS]["failed"]) == (1, 1)
+    assert stats[GET_NYM]["latency"]["count"] == 2
+
+
+def testPluginReadHandlersBoundToNode():
+    validator = OperationValidator(maxReadTargets=10)
+    registerReadHandler("GET_COLOR", lambda node, request: {"data": node})
+    try:
+        handlers = ReadHandlers(node="Alpha")
+        assert handlers.handle("GET_COLOR", "req") == {"data": "Alpha"}
+        # The new txn type is valid for validators built before too
+        validator.validate("id", 1, {"type": "GET_COLOR"})
+    finally:
+        pluginReadHandlers.pop("GET_COLOR")
+        validTxnTypes.discard("GET_COLOR")
@@ -0,0 +1,36 @@
+import threading
+
+from sovrin.server.sig_verifier import RequestVerifier
+
+
+def testVerifiedInSubmissionOrder():
+    verifier = RequestVerifier(2)
+    release = threading.Event()
+
+    def slow():
+        release.wait(5)
+        return True
+
+    verifier.submit("first", slow)
+    verifier.submit("unchecked", None)
+    verifier.submit("bad", lambda: False)
+    # Nothing is handed back before the first message is verified
+    assert list(verifier.ready()) == []
+    release.set()
+    assert list(verifier.drain()) == [("first", True), ("unchecked", False),
+                                      ("bad", False)]
+    assert verifier.stats["verified"] == 1
+    assert verifier.stats["failed"] == 1
+    assert verifier.pendingCount == 0
+    verifier.stop()
+
+
+def testFailingVerificationNotVerified():
+    verifier = RequestVerifier(1)
+
+    def broken():
+        raise ValueError("bad key")
+
+    verifier.submit("msg", broken)
+    assert list(verifier.drain()) == [("msg", False)]
+    verifier.stop()
@@ -0,0 +1,32 @@
+from hashlib import sha256
+
+from plenum.common.txn import TXN_TYPE, RAW, HASH
+
+from sovrin.common.txn import ATTRIB, TARGET_NYM
+from sovrin.common.txn_view import TxnView
+
+
+def testViewLeavesTxnUnchanged():
+    txn = {TXN_TYPE: ATTRIB, TARGET_NYM: "nym", RAW: '{"name": "Alice"}',
+           "rootHash": "root"}
+    view = TxnView(txn).without("rootHash").replace(seqNo=3)
+    assert dict(view) == {TXN_TYPE: ATTRIB, TARGET_NYM: "nym",
+                          RAW: '{"name": "Alice"}', "seqNo": 3}
+    assert "rootHash" not in view and view.get("rootHash") is None
+    assert len(view) == 4
+    assert view.toDict() == dict(view)
+    assert "seqNo" not in txn and txn["rootHash"] == "root"
+    # A field replaced and then removed is left out
+    assert "seqNo" not in view.without("seqNo")
+
+
+def testAttribHashedOnce():
+    raw = '{"name": "Alice"}'
+    view = TxnView({TXN_TYPE: ATTRIB, TARGET_NYM: "nym", RAW: raw})
+    hashed = view.hashedAttrib()
+    assert hashed[RAW] == sha256(raw.encode()).hexdigest()
+    assert view[RAW] == raw
+    # Views keeping the value keep its hash
+    assert view.replace(seqNo=1).without(TARGET_NYM)._attribHash == \
+        hashed[RAW]
+    assert TxnView({HASH: "abc"}).hashedAttrib()[HASH] == "abc"
@@ -0,0 +1,44 @@
+from datetime import datetime, timedelta
+
+from plenum.common.txn import NAME, VERSION, TXN_TYPE
+
+from sovrin.common.txn import POOL_UPGRADE, ACTION, START, CANCEL, SCHEDULE
+from sovrin.server.upgrader import Upgrader
+from sovrin.test.fake_ledger import FakeLedger
+
+
+class FakeConfig:
+    lastRunVersionFile = 'last_version'
+    nextVersionFile = 'next_version'
+
+
+def upgradeTxn(version, action, when=None):
+    txn = {TXN_TYPE: POOL_UPGRADE, NAME: "sovrin", VERSION: version,
+           ACTION: action}
+    if action == START:
+        txn[SCHEDULE] = {"node1": when, "node2": when}
+    return txn
+
+
+def testUpgradesIndexedIncrementally(tmpdir):
+    ledger = FakeLedger()
+    upgrader = Upgrader("node1", FakeConfig, str(tmpdir), ledger)
+    *head, last = upgrader.getVersion().split('.')
+    higher = '.'.join(head + [str(int(last) + 1)])
+    highest = '.'.join(head + [str(int(last) + 2)])
+    when = (datetime.utcnow() + timedelta(days=1)).isoformat() + "+00:00"
+
+    assert upgrader.statusInLedger("sovrin", higher) is None
+    ledger.add(upgradeTxn(higher, START, when))
+    ledger.add(upgradeTxn(highest, START, when))
+    assert upgrader.statusInLedger("sovrin", higher) == START
+    assert set(upgrader.pendingUpgrades) == {higher, highest}
+
+    ledger.add(upgradeTxn(highest, CANCEL))
+    assert upgrader.statusInLedger("sovrin", highest) == CANCEL
+    assert set(upgrader.pendingUpgrades) == {higher}
+    # Only the txns appended since the last lookup are read
+    assert ledger.reads == [1, 3]
+
+    upgrader.processLedger()
+    assert upgrader.scheduledUpgrade[0] == higher